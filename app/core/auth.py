@@ -80,6 +80,19 @@ def auth_debug_snapshot() -> Dict[str, Any]:
     }
 
 
+def _parse_expiry(s: str) -> datetime:
+    # Python 3.11+ parses the trailing "Z" natively; the replace() copy is only for older interpreters.
+    try:
+        dt = datetime.fromisoformat(s)
+    except ValueError:
+        dt = datetime.fromisoformat(s.replace("Z", "+00:00"))
+    return dt if dt.tzinfo is timezone.utc else dt.astimezone(timezone.utc)
+
+
+# Only what the revoked/expiry checks and g.account_id need (same columns web_auth_service reads).
+_SESSION_COLS = "id,account_id,expires_at,revoked,revoked_at,last_seen_at"
+
+
 def _lookup_session(raw: str, source: str, table: str) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
     th = token_hash(raw)
     th_prefix = th[:12]
@@ -89,7 +102,7 @@ def _lookup_session(raw: str, source: str, table: str) -> Tuple[Optional[Dict[st
     res = (
         _sb()
         .table(table)
-        .select("*")
+        .select(_SESSION_COLS)
         .eq("token_hash", th)
         .limit(1)
         .execute()
@@ -108,8 +121,7 @@ def _lookup_session(raw: str, source: str, table: str) -> Tuple[Optional[Dict[st
 
     expires_at = row.get("expires_at")
     if expires_at:
-        v = str(expires_at).replace("Z", "+00:00")
-        exp_dt = datetime.fromisoformat(v).astimezone(timezone.utc)
+        exp_dt = _parse_expiry(str(expires_at))
         if _now_utc() > exp_dt:
             _dbg(f"[auth] token_expired: src={source} token_hash_prefix={th_prefix} exp={exp_dt.isoformat()}")
             return None, {
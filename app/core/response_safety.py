@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import copy
+import hmac
 import os
 from typing import Any, Mapping, Optional
 
@@ -83,7 +84,7 @@ def debug_response_allowed(request_obj: Optional[Request] = None) -> bool:
         (request_obj.headers.get("X-NTG-Debug-Key") if hasattr(request_obj, "headers") else "")
         or (request_obj.args.get("debug_key") if hasattr(request_obj, "args") else "")
     )
-    return bool(supplied_key and supplied_key == expected_key)
+    return bool(supplied_key) and hmac.compare_digest(supplied_key.encode("utf-8"), expected_key.encode("utf-8"))
 
 
 def sanitize_response_payload(payload: Any, request_obj: Optional[Request] = None) -> Any:
@@ -1,12 +1,23 @@
 # app/core/security.py
 from __future__ import annotations
 
+import hmac
 import os
 from typing import Optional
 
 from flask import jsonify, request
 
 
+def keys_match(supplied: Optional[str], expected: Optional[str]) -> bool:
+    """
+    Constant-time comparison for shared secrets (admin keys, cron/bypass tokens).
+    False when either side is empty.
+    """
+    if not supplied or not expected:
+        return False
+    return hmac.compare_digest(str(supplied).encode("utf-8"), str(expected).encode("utf-8"))
+
+
 def require_admin_key() -> Optional[tuple]:
     """
     Returns a Flask response tuple (json, status) if unauthorized, otherwise None.
@@ -22,7 +33,7 @@ def require_admin_key() -> Optional[tuple]:
         if not got:
             return jsonify({"ok": False, "error": "missing_admin_key_header"}), 401
 
-        if got != expected:
+        if not keys_match(got, expected):
             return jsonify({"ok": False, "error": "invalid_admin_key"}), 401
 
         return None
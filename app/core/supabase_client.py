@@ -1,12 +1,19 @@
 # app/core/supabase_client.py
 from __future__ import annotations
 
+import atexit
 import os
-from typing import Optional
+import random
+import time
+from typing import Callable, Dict, Optional, Tuple, TypeVar
 
+import httpx
+from postgrest.exceptions import APIError
 from supabase import create_client
 from supabase.client import Client
 
+T = TypeVar("T")
+
 
 # Lazy singletons
 _client_admin: Optional[Client] = None
@@ -17,6 +24,62 @@ def _env(name: str, default: str = "") -> str:
     return (os.getenv(name) or default).strip()
 
 
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(_env(name) or default)
+    except Exception:
+        return default
+
+
+# One pooled, keep-alive HTTP transport per client so PostgREST calls reuse
+# TCP/TLS connections instead of paying a handshake under load.
+HTTP_MAX_CONNECTIONS = int(_env_float("SUPABASE_HTTP_MAX_CONNECTIONS", 20))
+HTTP_MAX_KEEPALIVE = int(_env_float("SUPABASE_HTTP_MAX_KEEPALIVE", 10))
+# httpx drops idle connections after 5s by default; between sparse webhook/cron calls
+# that meant a fresh TLS handshake almost every time.
+HTTP_KEEPALIVE_EXPIRY_SECONDS = _env_float("SUPABASE_HTTP_KEEPALIVE_EXPIRY_SECONDS", 30.0)
+HTTP_TIMEOUT_SECONDS = _env_float("SUPABASE_HTTP_TIMEOUT_SECONDS", 30.0)
+HTTP_CONNECT_TIMEOUT_SECONDS = _env_float("SUPABASE_HTTP_CONNECT_TIMEOUT_SECONDS", 5.0)
+
+
+def _configure_http_pool(client: Client) -> Client:
+    """
+    Swap the PostgREST session for an httpx.Client with explicit pool limits
+    and timeouts. Keeps base_url and auth headers from the session the SDK built.
+    Best-effort: if the SDK internals differ, the default session is kept.
+    """
+    try:
+        postgrest = client.postgrest
+        default_session = postgrest.session
+        postgrest.session = httpx.Client(
+            base_url=default_session.base_url,
+            headers=default_session.headers,
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY_SECONDS,
+            ),
+            timeout=httpx.Timeout(HTTP_TIMEOUT_SECONDS, connect=HTTP_CONNECT_TIMEOUT_SECONDS),
+        )
+        default_session.close()
+    except Exception:
+        pass
+    return client
+
+
+def _close_clients() -> None:
+    for c in (_client_admin, _client_anon):
+        if c is None:
+            continue
+        try:
+            c.postgrest.session.close()
+        except Exception:
+            pass
+
+
+atexit.register(_close_clients)
+
+
 def _get_supabase_url() -> str:
     url = _env("SUPABASE_URL") or _env("NEXT_PUBLIC_SUPABASE_URL")
     if not url:
@@ -60,29 +123,29 @@ def get_supabase_client(admin: bool = True) -> Client:
     """
     global _client_admin, _client_anon
 
-    url = _get_supabase_url()
-
     if admin:
         if _client_admin is not None:
             return _client_admin
 
+        url = _get_supabase_url()
         key = _get_service_key() or _get_anon_key()
         if not key:
             raise RuntimeError(
                 "SUPABASE_SERVICE_ROLE_KEY or SUPABASE_ANON_KEY is missing"
             )
 
-        _client_admin = create_client(url, key)
+        _client_admin = _configure_http_pool(create_client(url, key))
         return _client_admin
 
     if _client_anon is not None:
         return _client_anon
 
+    url = _get_supabase_url()
     anon_key = _get_anon_key()
     if not anon_key:
         raise RuntimeError("SUPABASE_ANON_KEY is missing")
 
-    _client_anon = create_client(url, anon_key)
+    _client_anon = _configure_http_pool(create_client(url, anon_key))
     return _client_anon
 
 
@@ -106,6 +169,87 @@ client: Client = supabase
 db: Client = supabase
 
 
+# -------------------------------------------------------------------
+# Transient-error retry
+# -------------------------------------------------------------------
+# PostgREST codes for "could not reach / timed out on the database pool",
+# plus Postgres SQLSTATEs that are safe to retry (cancelled by timeout,
+# too many connections, serialization failure, deadlock). Class 08 is
+# connection exceptions and is matched by prefix below.
+_TRANSIENT_API_CODES = frozenset({
+    "PGRST000",
+    "PGRST001",
+    "PGRST002",
+    "PGRST003",
+    "57014",
+    "53300",
+    "40001",
+    "40P01",
+})
+# Gateway failures in front of PostgREST (non-JSON body) surface as the bare HTTP status.
+_TRANSIENT_HTTP_CODES = frozenset({"502", "503", "504"})
+
+
+def is_transient_error(exc: BaseException) -> bool:
+    """
+    True for network/pool failures that are worth retrying.
+    Anything else (bad column, RLS, constraint violation) is a real answer and is not retried.
+    """
+    if isinstance(exc, (httpx.TimeoutException, httpx.NetworkError, httpx.RemoteProtocolError, ConnectionError)):
+        return True
+    if isinstance(exc, APIError):
+        code = str(getattr(exc, "code", "") or "")
+        return code in _TRANSIENT_API_CODES or code in _TRANSIENT_HTTP_CODES or code.startswith("08")
+    return False
+
+
+# -------------------------------------------------------------------
+# Optional-column probe
+# -------------------------------------------------------------------
+# Column probes are remembered for the life of the process once PostgREST gives a
+# definite answer; network errors and timeouts are not cached and are re-probed.
+_MISSING_SCHEMA_CODES = frozenset({"42703", "PGRST204", "42P01", "PGRST205"})
+_column_cache: Dict[Tuple[str, str], bool] = {}
+
+
+def has_column(table: str, col: str) -> bool:
+    """
+    True if `table.col` is selectable. Used by callers that tolerate older schemas.
+    """
+    key = (table, col)
+    hit = _column_cache.get(key)
+    if hit is not None:
+        return hit
+    try:
+        supabase.table(table).select(col).limit(1).execute()
+        _column_cache[key] = True
+        return True
+    except Exception as e:
+        if str(getattr(e, "code", "") or "") in _MISSING_SCHEMA_CODES:
+            _column_cache[key] = False
+        return False
+
+
+def execute_with_retry(fn: Callable[[], T], *, attempts: int = 3, base_delay: float = 0.05) -> T:
+    """
+    Run a Supabase call, retrying transient failures with jittered exponential backoff.
+
+    Usage: execute_with_retry(lambda: sb.table("x").select("id").execute())
+    Only wrap reads and idempotent writes. The last error (or any
+    non-transient one) is re-raised unchanged, so callers' existing
+    except blocks still decide the fallback.
+    """
+    attempts = max(1, int(attempts))
+    for attempt in range(attempts):
+        try:
+            return fn()
+        except Exception as e:
+            if attempt >= attempts - 1 or not is_transient_error(e):
+                raise
+            time.sleep(random.uniform(0, base_delay * (2 ** attempt)))
+    raise RuntimeError("unreachable")
+
+
 def get_supabase() -> Client:
     return get_supabase_client(admin=True)
 
@@ -5,6 +5,7 @@ from typing import Any, Dict
 
 from flask import Blueprint, jsonify, request
 
+from app.core.security import keys_match
 from app.core.supabase_client import supabase
 
 bp = Blueprint("_debug", __name__)
@@ -20,7 +21,7 @@ def _admin_ok(req) -> bool:
     expected = (os.getenv("ADMIN_KEY") or "").strip()
 
     got = (req.headers.get("X-Admin-Key") or "").strip()
-    return bool(expected) and got == expected
+    return keys_match(got, expected)
 
 
 @bp.get("/_debug/ping")
@@ -4,7 +4,7 @@ from typing import Any, Dict, Optional, Tuple
 
 from flask import Blueprint, jsonify, request
 
-from app.core.supabase_client import supabase
+from app.core.supabase_client import has_column, supabase
 from app.services.accounts_service import upsert_account
 from app.services.web_auth_service import get_account_id_from_request
 
@@ -42,14 +42,6 @@ def _fail(
     return jsonify(out), status
 
 
-def _has_column(table: str, col: str) -> bool:
-    try:
-        _sb().table(table).select(col).limit(1).execute()
-        return True
-    except Exception:
-        return False
-
-
 def _get_account_row(account_id: str) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
     """
     account_id here is canonical accounts.account_id from web auth.
@@ -75,7 +67,7 @@ def _get_account_row(account_id: str) -> Tuple[Optional[Dict[str, Any]], Optiona
         "email",
         "has_used_trial",
     ]
-    safe_select = ",".join([c for c in select_cols if _has_column("accounts", c)]) or "*"
+    safe_select = ",".join([c for c in select_cols if has_column("accounts", c)]) or "*"
 
     try:
         q = (
@@ -245,10 +237,10 @@ def update_account_me():
 
     patch: Dict[str, Any] = {}
 
-    if "display_name" in body and _has_column("accounts", "display_name"):
+    if "display_name" in body and has_column("accounts", "display_name"):
         patch["display_name"] = display_name or None
 
-    if "email" in body and _has_column("accounts", "email"):
+    if "email" in body and has_column("accounts", "email"):
         if email and "@" not in email:
             return _fail(
                 error="invalid_email",
@@ -257,13 +249,13 @@ def update_account_me():
             )
         patch["email"] = email or None
 
-    if "phone" in body and _has_column("accounts", "phone"):
+    if "phone" in body and has_column("accounts", "phone"):
         patch["phone"] = phone or None
 
-    if "phone" in body and _has_column("accounts", "phone_e164"):
+    if "phone" in body and has_column("accounts", "phone_e164"):
         patch["phone_e164"] = phone or None
 
-    if _has_column("accounts", "updated_at"):
+    if has_column("accounts", "updated_at"):
         from datetime import datetime, timezone
         patch["updated_at"] = datetime.now(timezone.utc).isoformat()
 
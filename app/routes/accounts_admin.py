@@ -3,7 +3,10 @@ from __future__ import annotations
 import os
 
 from flask import Blueprint, jsonify, request
-from supabase import Client, create_client
+from supabase import Client
+
+from app.core.security import keys_match
+from app.core.supabase_client import get_supabase_client
 
 from app.services.payout_service import (
     PayoutNotFoundError,
@@ -51,34 +54,14 @@ def _require_admin() -> None:
     if not expected:
         raise PermissionError("Admin API key is not configured on the backend.")
 
-    if not supplied or supplied != expected:
+    if not keys_match(supplied, expected):
         raise PermissionError("Invalid or missing admin API key.")
 
 
 def _build_supabase_client() -> Client:
-    supabase_url = (
-        os.getenv("SUPABASE_URL")
-        or os.getenv("NEXT_PUBLIC_SUPABASE_URL")
-        or ""
-    ).strip()
-
-    supabase_key = (
-        os.getenv("SUPABASE_SERVICE_ROLE_KEY")
-        or os.getenv("SUPABASE_SERVICE_KEY")
-        or os.getenv("SUPABASE_ANON_KEY")
-        or os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY")
-        or ""
-    ).strip()
-
-    if not supabase_url:
-        raise RuntimeError("SUPABASE_URL is not configured on the backend.")
-
-    if not supabase_key:
-        raise RuntimeError(
-            "No Supabase key found. Set SUPABASE_SERVICE_ROLE_KEY or SUPABASE_ANON_KEY."
-        )
-
-    return create_client(supabase_url, supabase_key)
+    # Shared process-wide admin client (pooled keep-alive session) instead of a new
+    # client, and a fresh TLS connection, on every admin request.
+    return get_supabase_client(admin=True)
 
 
 def _get_service() -> PayoutService:
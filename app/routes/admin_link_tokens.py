@@ -54,7 +54,7 @@ def admin_create_link_token():
     except Exception as e:
         return _bad(f"RPC error: {str(e)}", 500)
 
-    row = (res.data or [None])[0]
+    row = res.data[0] if res.data else None
     if not row or not row.get("ok"):
         return jsonify({"ok": False, "provider": provider, "error": row or "Token creation failed"}), 400
 
@@ -4,6 +4,8 @@ import os
 
 from flask import Blueprint, jsonify, request
 
+from app.core.security import keys_match
+
 from app.services.admin_semantic_service import (
     semantic_dashboard_summary,
     list_embeddings,
@@ -33,7 +35,7 @@ def _require_admin():
             "root_cause": "ADMIN_KEY env var is missing",
         }), 500
 
-    if got != expected:
+    if not keys_match(got, expected):
         return jsonify({
             "ok": False,
             "error": "unauthorized",
@@ -8,6 +8,7 @@ from typing import Any, Dict, Optional, Tuple
 
 from flask import Blueprint, jsonify, request, session
 
+from app.core.security import keys_match
 from app.core.supabase_client import supabase
 from app.services.ask_service import ASK_SERVICE_VERSION, ask_guarded
 from app.services.web_auth_service import get_account_id_from_request
@@ -245,7 +246,7 @@ def _is_dev_bypass_request() -> bool:
 
     bearer = _get_bearer_token()
     x_token = (request.headers.get("X-Auth-Token") or "").strip()
-    return bearer == expected or x_token == expected
+    return keys_match(bearer, expected) or keys_match(x_token, expected)
 
 
 def _extract_account_id(auth_result: Any) -> Tuple[Optional[str], Dict[str, Any]]:
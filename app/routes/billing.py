@@ -3,6 +3,7 @@ from __future__ import annotations
 
 import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -68,6 +69,13 @@ logger = logging.getLogger(__name__)
 
 BILLING_ROUTE_VERSION = "2026-05-23-v2-web-paystack-topup-channel-safe"
 
+# Opt-in: referral qualification (chain lookup + reward rows) does not affect the
+# activation itself, so it can run after the Paystack webhook / verify call returns.
+# Off by default because a worker restart mid-task drops it; the qualification is
+# idempotent, so re-verifying the reference later re-runs it safely.
+REFERRAL_ASYNC_QUALIFICATION = (os.getenv("REFERRAL_ASYNC_QUALIFICATION", "0").strip() == "1")
+_POST_PAYMENT_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="billing-post-payment")
+
 
 # -----------------------------------------------------------------------------
 # Official locked add-on packages
@@ -911,9 +919,26 @@ def _activate_subscription(
     if not plan:
         return {"ok": False, "error": "plan_not_found", "plan_code": plan_code}
 
+    # The callback, verify endpoint and webhook all apply the same reference. Only the
+    # first may reset credits and extend the period; later deliveries are no-ops.
+    already, tx = _is_already_successful(reference)
+    tx_meta = _normalize_metadata((tx or {}).get("metadata"))
+    if already and bool(tx_meta.get("applied_subscription")):
+        return {
+            "ok": True,
+            "already_applied": True,
+            "account_id": account_id,
+            "plan_code": plan_code,
+            "expires_at": tx_meta.get("expires_at"),
+            "current_period_end": tx_meta.get("expires_at"),
+            "reference": reference,
+            "message": "Subscription was already applied for this reference.",
+        }
+
     duration_days = _duration_days_for(plan_code)
-    now_iso = _now_iso()
-    expires_at = (_now() + timedelta(days=duration_days)).isoformat()
+    now = _now()
+    now_iso = now.isoformat()
+    expires_at = (now + timedelta(days=duration_days)).isoformat()
     plan_family = _plan_family_from_code(plan_code)
 
     rich_payload = {
@@ -987,6 +1012,10 @@ def _activate_subscription(
             "fix": "Confirm user_subscriptions supports account_id, plan_code, status, current_period_end, created_at, and updated_at.",
         }
 
+    # Referral qualification only touches the referral tables, so it overlaps with the
+    # credit, transaction-note and notification round trips below instead of following them.
+    referral_future = _POST_PAYMENT_POOL.submit(_qualify_referral_if_needed, account_id, reference, plan_code)
+
     try:
         credit_result = init_credits_for_plan(account_id, plan_code)
     except Exception as exc:
@@ -1023,8 +1052,12 @@ def _activate_subscription(
         paid_at=metadata.get("paid_at") or now_iso,
     )
 
-    referral_result = _qualify_referral_if_needed(account_id, reference, plan_code)
     notification_result = _notify_channel_if_needed(account_id, plan_code, metadata)
+    if REFERRAL_ASYNC_QUALIFICATION:
+        # _qualify_referral_if_needed logs and swallows its own failures.
+        referral_result = {"ok": True, "queued": True}
+    else:
+        referral_result = referral_future.result()
 
     return {
         "ok": True,
@@ -4,6 +4,8 @@ import os
 
 from flask import Blueprint, jsonify, request
 
+from app.core.security import keys_match
+
 from app.scripts.seed_tax_sources import seed_sources
 
 bp = Blueprint("dev_tools", __name__)
@@ -33,7 +35,7 @@ def seed_tax():
     expected = (os.getenv("SEED_TAX_TOKEN") or "").strip()
     if expected:
         provided = (request.headers.get("X-Seed-Token") or "").strip()
-        if provided != expected:
+        if not keys_match(provided, expected):
             return jsonify({"ok": False, "error": "Unauthorized"}), 401
 
     allow_reseed = _truthy(os.getenv("SEED_TAX_ALLOW_RESEED", "0"))
@@ -42,7 +42,7 @@ def link_email_with_code():
     except Exception as e:
         return _bad(f"RPC error: {str(e)}", 500)
 
-    row = (res.data or [None])[0]
+    row = res.data[0] if res.data else None
     if not row or not row.get("ok"):
         return _bad("Invalid or expired code", 400)
 
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from flask import Blueprint, request, jsonify, current_app
+from app.core.security import keys_match
 from app.core.supabase_client import supabase
 
 bp = Blueprint("internal_cron", __name__)
@@ -13,9 +14,7 @@ def _check_admin():
     admin_key = request.headers.get("X-Admin-Key")
     expected = current_app.config.get("ADMIN_KEY")
 
-    if not admin_key or admin_key != expected:
-        return False
-    return True
+    return keys_match(admin_key, expected)
 
 
 # ---------------------------------------------------------
@@ -78,3 +77,35 @@ def expire_credits():
             "ok": False,
             "error": str(e)
         }), 500
+
+
+# ---------------------------------------------------------
+# Clean up expired web OTPs / sessions
+# ---------------------------------------------------------
+@bp.post("/internal/cron/cleanup-web-auth")
+def cleanup_web_auth():
+
+    if not _check_admin():
+        return jsonify({"ok": False, "error": "Unauthorized"}), 401
+
+    body = request.get_json(silent=True) or {}
+    batch_limit = body.get("batch_limit", 5000)
+    keep_hours = body.get("keep_hours", 24)
+
+    try:
+        res = supabase.rpc(
+            "cleanup_expired_web_auth",
+            {"p_batch_limit": batch_limit, "p_keep_hours": keep_hours}
+        ).execute()
+
+        return jsonify({
+            "ok": True,
+            "rpc": "cleanup_expired_web_auth",
+            "result": res.data
+        })
+
+    except Exception as e:
+        return jsonify({
+            "ok": False,
+            "error": str(e)
+        }), 500
@@ -41,16 +41,21 @@ def _iso(dt: datetime) -> str:
     return dt.astimezone(timezone.utc).isoformat()
 
 
-def _normalize_provider(provider: Optional[str]) -> Tuple[str, str, str]:
-    raw = (provider or "wa").strip().lower()
-
-    if raw in {"wa", "whatsapp", "whats_app", "whats-app"}:
-        return "wa", "whatsapp", "WhatsApp"
+_WA = ("wa", "whatsapp", "WhatsApp")
+_TG = ("tg", "telegram", "Telegram")
+_PROVIDERS = {
+    "wa": _WA,
+    "whatsapp": _WA,
+    "whats_app": _WA,
+    "whats-app": _WA,
+    "tg": _TG,
+    "telegram": _TG,
+}
 
-    if raw in {"tg", "telegram"}:
-        return "tg", "telegram", "Telegram"
 
-    return raw, raw, raw.title()
+def _normalize_provider(provider: Optional[str]) -> Tuple[str, str, str]:
+    raw = (provider or "wa").strip().lower()
+    return _PROVIDERS.get(raw) or (raw, raw, raw.title())
 
 
 def _random_code(length: int = CODE_LENGTH) -> str:
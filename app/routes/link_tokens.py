@@ -9,8 +9,8 @@ from typing import Any, Dict, Optional, Tuple
 from urllib.parse import quote
 
 from flask import Blueprint, jsonify, request
-from supabase import create_client
 
+from app.core.supabase_client import get_supabase_client
 from app.services.channel_identity_runtime_service import get_channel_identity_by_account
 from app.services.channel_linking_service import consume_and_link, unlink_channel
 from app.services.web_auth_service import get_account_id_from_request
@@ -21,7 +21,8 @@ SUPABASE_SERVICE_ROLE_KEY = (os.getenv("SUPABASE_SERVICE_ROLE_KEY") or "").strip
 if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
     raise RuntimeError("SUPABASE env vars missing")
 
-sb = create_client(SUPABASE_URL, SUPABASE_SERVICE_ROLE_KEY)
+# Reuse the shared admin client (pooled keep-alive session) rather than a second one.
+sb = get_supabase_client(admin=True)
 
 bp = Blueprint("link_tokens", __name__, url_prefix="/link")
 
@@ -50,17 +51,22 @@ def _json_error(message: str, status: int = 400, **extra: Any):
     return jsonify(payload), status
 
 
+_PROVIDER_ALIASES = {
+    "tg": "tg",
+    "telegram": "tg",
+    "wa": "wa",
+    "whatsapp": "wa",
+    "waba": "wa",
+    "msgr": "msgr",
+    "messenger": "msgr",
+    "ig": "ig",
+    "instagram": "ig",
+}
+
+
 def _normalize_provider(raw: str) -> str:
     v = (raw or "").strip().lower()
-    if v in {"tg", "telegram"}:
-        return "tg"
-    if v in {"wa", "whatsapp", "waba"}:
-        return "wa"
-    if v in {"msgr", "messenger"}:
-        return "msgr"
-    if v in {"ig", "instagram"}:
-        return "ig"
-    return v
+    return _PROVIDER_ALIASES.get(v, v)
 
 
 def _requested_provider() -> str:
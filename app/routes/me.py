@@ -15,7 +15,7 @@ Auto-repair:
 
 from flask import Blueprint, jsonify
 
-from app.core.supabase_client import supabase
+from app.core.supabase_client import has_column, supabase
 from app.services.auth_service import get_current_user
 
 bp = Blueprint("me", __name__)
@@ -30,14 +30,6 @@ def _clip(s: str, n: int = 240) -> str:
     return s if len(s) <= n else s[:n] + "…"
 
 
-def _has_column(table: str, col: str) -> bool:
-    try:
-        _sb().table(table).select(col).limit(1).execute()
-        return True
-    except Exception:
-        return False
-
-
 def _repair_account_id(row: dict) -> dict:
     row_id = str(row.get("id") or "").strip()
     account_id = str(row.get("account_id") or "").strip()
@@ -79,7 +71,7 @@ def me():
             "fix": "Ensure auth_service returns a valid user object with id.",
         }), 401
 
-    key_col = "auth_user_id" if _has_column("accounts", "auth_user_id") else ("supabase_user_id" if _has_column("accounts", "supabase_user_id") else "")
+    key_col = "auth_user_id" if has_column("accounts", "auth_user_id") else ("supabase_user_id" if has_column("accounts", "supabase_user_id") else "")
     if not key_col:
         return jsonify({
             "ok": False,
@@ -90,7 +82,8 @@ def me():
 
     try:
         res = sb.table("accounts").select("id,account_id").eq(key_col, uid).limit(1).execute()
-        row = (getattr(res, "data", None) or [None])[0] or None
+        data = getattr(res, "data", None)
+        row = (data[0] or None) if data else None
     except Exception as e:
         return jsonify({
             "ok": False,
@@ -108,7 +101,8 @@ def me():
     payload = {key_col: uid, "provider": "web"}
     try:
         created = sb.table("accounts").insert(payload).select("id,account_id").execute()
-        row = (getattr(created, "data", None) or [None])[0] or None
+        data = getattr(created, "data", None)
+        row = (data[0] or None) if data else None
     except Exception as e:
         return jsonify({
             "ok": False,
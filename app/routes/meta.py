@@ -6,6 +6,7 @@ import logging
 import requests
 from flask import Blueprint, request, jsonify
 
+from app.core.security import keys_match
 from app.services.channel_linking_service import extract_code, consume_and_link
 
 bp = Blueprint("meta", __name__)
@@ -43,7 +44,7 @@ def meta_verify():
     token = (request.args.get("hub.verify_token") or "").strip()
     challenge = request.args.get("hub.challenge")
 
-    if mode == "subscribe" and token == META_VERIFY_TOKEN and challenge is not None:
+    if mode == "subscribe" and keys_match(token, META_VERIFY_TOKEN) and challenge is not None:
         return str(challenge), 200
 
     return jsonify({"ok": False, "error": "Verification failed"}), 403
@@ -9,6 +9,7 @@ from typing import Any, Dict, Optional
 
 from flask import Blueprint, jsonify, redirect, request
 
+from app.core.security import keys_match
 from app.core.supabase_client import supabase
 from app.services.web_auth_service import get_account_id_from_request
 from app.services.promo_service import (
@@ -131,7 +132,7 @@ def _require_admin():
             "route_version": PROMO_ROUTE_VERSION,
         }), 500
 
-    if not supplied or supplied != expected:
+    if not keys_match(supplied, expected):
         return jsonify({
             "ok": False,
             "error": "invalid_or_missing_admin_key",
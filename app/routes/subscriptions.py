@@ -6,6 +6,8 @@ from typing import Any, Dict
 
 from flask import Blueprint, jsonify, request
 
+from app.core.security import keys_match
+
 from app.services.subscriptions_service import (
     activate_subscription_now,
     get_subscription_status,
@@ -17,7 +19,7 @@ bp = Blueprint("subscriptions", __name__)
 def _admin_ok(req) -> bool:
     expected = (os.getenv("ADMIN_KEY") or "").strip()
     got = (req.headers.get("X-Admin-Key") or "").strip()
-    return bool(expected) and got == expected
+    return keys_match(got, expected)
 
 
 @bp.post("/subscription/activate")
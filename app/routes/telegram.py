@@ -585,7 +585,7 @@ def _try_consume_link_code(provider_user_id: str, raw_text: str, display_name: O
     except Exception as exc:
         return {"ok": False, "reason": "rpc_error", "error": str(exc)}
 
-    row = (res.data or [None])[0]
+    row = res.data[0] if res.data else None
     if not row:
         return {"ok": False, "reason": "no_rpc_row"}
 
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 import os
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Any, Dict, Optional
 
 from flask import Blueprint, jsonify, request, make_response, session
@@ -33,6 +34,12 @@ bp = Blueprint("web_auth", __name__)
 
 WEB_AUTH_ROUTE_VERSION = "2026-05-30-batch35B2-logout-request-fix"
 
+# When on, request-otp returns as soon as the code is stored and the SMTP send runs
+# in the background. Off by default: the synchronous path reports delivery
+# failures to the client as a 502, which the queued path cannot do.
+OTP_EMAIL_ASYNC = (os.getenv("WEB_OTP_EMAIL_ASYNC", "0").strip() == "1")
+_MAIL_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="web-auth-mail")
+
 
 def _truthy(v: str | None) -> bool:
     return str(v or "").strip().lower() in {"1", "true", "yes", "y", "on"}
@@ -167,6 +174,20 @@ def _classify_signup_source(body: Dict[str, Any]) -> Dict[str, Any]:
     return {"ok": True, "source_type": None, "code": "", "explicit": False}
 
 
+def _log_queued_otp_email(fut: Future) -> None:
+    try:
+        mail_res = fut.result()
+    except Exception as e:
+        logger.warning("queued OTP email raised: %r", e)
+        return
+    if not mail_res.get("ok"):
+        logger.warning(
+            "queued OTP email failed: %s (%s)",
+            mail_res.get("error") or "email_send_failed",
+            mail_res.get("root_cause"),
+        )
+
+
 @bp.post("/web/auth/request-otp")
 def request_otp():
     body = request.get_json(silent=True) or {}
@@ -192,7 +213,11 @@ def request_otp():
     otp_plain = r.get("_otp_plain")
     delivery: Dict[str, Any] = {"mode": "email", "sent": False}
 
-    if otp_plain:
+    if otp_plain and OTP_EMAIL_ASYNC:
+        _MAIL_POOL.submit(send_otp_email, contact, otp_plain).add_done_callback(_log_queued_otp_email)
+        delivery["queued"] = True
+        delivery["provider"] = "smtp"
+    elif otp_plain:
         print("[web_auth.request_otp] about_to_send_email", flush=True)
         mail_res = send_otp_email(contact, otp_plain)
         print(f"[web_auth.request_otp] mail_result={mail_res}", flush=True)
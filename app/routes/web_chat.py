@@ -8,6 +8,7 @@ from flask import Blueprint, request, jsonify
 from app.core.auth import require_web_auth
 from app.core.supabase_client import supabase
 from app.services.ask_service import ask_guarded
+from app.services.web_chat_service import append_message, append_message_async
 
 
 bp = Blueprint("web_chat", __name__)
@@ -109,21 +110,40 @@ def create_session(ctx):
 def get_session(ctx, session_id: str):
     account_id = ctx["account_id"]
 
-    s = (
-        supabase.table("web_chat_sessions")
-        .select("id,title,created_at,updated_at")
-        .eq("id", session_id)
-        .eq("account_id", account_id)
-        .limit(1)
-        .execute()
-        .data
-        or []
-    )
-    if not s:
+    # Session and its first 50 messages in one round trip via FK embedding; falls back
+    # to two queries if the web_chat_messages -> web_chat_sessions relationship is missing.
+    try:
+        res = (
+            supabase.table("web_chat_sessions")
+            .select("id,title,created_at,updated_at,web_chat_messages(role,content,created_at)")
+            .eq("id", session_id)
+            .eq("account_id", account_id)
+            .order("created_at", desc=False, foreign_table="web_chat_messages")
+            .limit(50, foreign_table="web_chat_messages")
+            .maybe_single()
+            .execute()
+        )
+        embedded = True
+    except Exception:
+        res = (
+            supabase.table("web_chat_sessions")
+            .select("id,title,created_at,updated_at")
+            .eq("id", session_id)
+            .eq("account_id", account_id)
+            .maybe_single()
+            .execute()
+        )
+        embedded = False
+    # maybe_single(): id is the primary key, so PostgREST returns one object or nothing.
+    session = getattr(res, "data", None)
+    if not session:
         return jsonify({"ok": False, "error": "not_found"}), 404
 
-    msgs = _get_messages_for_context(session_id, account_id, limit=50)
-    return jsonify({"ok": True, "session": s[0], "messages": msgs})
+    if embedded:
+        msgs = session.pop("web_chat_messages", None) or []
+    else:
+        msgs = _get_messages_for_context(session_id, account_id, limit=50)
+    return jsonify({"ok": True, "session": session, "messages": msgs})
 
 
 @bp.get("/web/chat/sessions/<session_id>/messages")
@@ -168,17 +188,11 @@ def send_message(ctx, session_id: str):
     if not s:
         return jsonify({"ok": False, "error": "session_not_found"}), 404
 
-    user_row = {
-        "session_id": session_id,
-        "account_id": account_id,
-        "role": "user",
-        "content": text,
-        "created_at": _now_iso(),
-    }
-    supabase.table("web_chat_messages").insert(user_row).execute()
-
+    # Context is read before the user message is stored (the prompt adds it as the
+    # new message), so the write can run while ask_guarded waits on the model.
     prior = _get_messages_for_context(session_id, account_id, limit=MAX_CONTEXT_MESSAGES)
     prompt = _build_context_text(prior, text)
+    user_write = append_message_async(account_id, session_id, "user", text)
 
     result = ask_guarded(
         account_id=str(account_id or "").strip(),
@@ -186,20 +200,13 @@ def send_message(ctx, session_id: str):
         lang=lang,
         channel="web_chat",
     )
+    user_write.result()
 
     if not result.get("ok"):
         return jsonify(result), 400
 
     answer = str(result.get("answer") or "").strip() or "..."
 
-    asst_row = {
-        "session_id": session_id,
-        "account_id": account_id,
-        "role": "assistant",
-        "content": answer,
-        "created_at": _now_iso(),
-    }
-    supabase.table("web_chat_messages").insert(asst_row).execute()
-    supabase.table("web_chat_sessions").update({"updated_at": _now_iso()}).eq("id", session_id).execute()
+    append_message(account_id, session_id, "assistant", answer)
 
     return jsonify({"ok": True, "assistant": answer})
@@ -7,6 +7,7 @@ from typing import Any, Dict
 
 from flask import Blueprint, request, jsonify
 
+from app.core.security import keys_match
 from app.services.subscriptions_service import handle_payment_success
 
 bp = Blueprint("webhooks", __name__)
@@ -120,7 +121,7 @@ def meta_verify():
     token = request.args.get("hub.verify_token", "")
     challenge = request.args.get("hub.challenge", "")
 
-    if mode == "subscribe" and META_VERIFY_TOKEN and token == META_VERIFY_TOKEN:
+    if mode == "subscribe" and keys_match(token, META_VERIFY_TOKEN):
         return challenge, 200
     return "forbidden", 403
 
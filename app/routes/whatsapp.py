@@ -13,6 +13,7 @@ from urllib.parse import quote
 import requests
 from flask import Blueprint, jsonify, request
 
+from app.core.security import keys_match
 from app.core.supabase_client import supabase
 
 try:
@@ -6993,7 +6994,7 @@ def whatsapp_webhook():
         token = _clean(request.args.get("hub.verify_token"))
         challenge = _clean(request.args.get("hub.challenge"))
 
-        if mode == "subscribe" and verify_token and token == verify_token:
+        if mode == "subscribe" and keys_match(token, verify_token):
             return challenge, 200
 
         if not mode and not token and not challenge:
@@ -3,15 +3,11 @@ from __future__ import annotations
 from datetime import datetime, timezone
 from typing import Any, Dict, Optional
 
-from app.core.supabase_client import supabase
+from app.core.supabase_client import execute_with_retry, supabase
 from app.services.plans_service import get_plan
 from app.services.subscription_guard import require_active_subscription
 
 
-def _sb():
-    return supabase() if callable(supabase) else supabase
-
-
 def _reason_payload(
     reason: str,
     *,
@@ -120,12 +116,12 @@ def _latest_paid_subscription(account_id: str) -> Optional[Dict[str, Any]]:
         return None
 
     try:
-        query = _sb().table("user_subscriptions").select("*").eq("account_id", account_id)
+        query = supabase.table("user_subscriptions").select("*").eq("account_id", account_id)
         try:
             query = query.order("updated_at", desc=True)
         except Exception:
             pass
-        res = query.limit(50).execute()
+        res = execute_with_retry(query.limit(50).execute)
         rows = [r for r in (getattr(res, "data", None) or []) if isinstance(r, dict)]
     except Exception:
         return None
@@ -280,7 +276,7 @@ def count_workspace_members(owner_account_id: str) -> Dict[str, int]:
     }
     try:
         res = (
-            _sb()
+            supabase
             .table("workspace_members")
             .select("member_account_id,status")
             .eq("owner_account_id", owner_account_id)
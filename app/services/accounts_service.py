@@ -13,16 +13,12 @@ from datetime import datetime, timezone
 import uuid
 import os
 
-from app.core.supabase_client import supabase
+from app.core.supabase_client import has_column, supabase
 
 
 # ---------------------------------------------------------
 # Common helpers
 # ---------------------------------------------------------
-def _sb():
-    return supabase() if callable(supabase) else supabase
-
-
 def _now_utc() -> datetime:
     return datetime.now(timezone.utc)
 
@@ -57,14 +53,6 @@ def _is_uuid(value: str) -> bool:
         return False
 
 
-def _has_column(table: str, col: str) -> bool:
-    try:
-        _sb().table(table).select(col).limit(1).execute()
-        return True
-    except Exception:
-        return False
-
-
 def _safe_debug_meta() -> Dict[str, Any]:
     if not _debug_enabled():
         return {}
@@ -77,10 +65,10 @@ def _safe_debug_meta() -> Dict[str, Any]:
 def _select_cols_existing(table: str, cols: List[str]) -> str:
     existing: List[str] = []
     for c in cols:
-        if _has_column(table, c):
+        if has_column(table, c):
             existing.append(c)
     for must in ("id", "account_id", "provider", "provider_user_id"):
-        if must not in existing and _has_column(table, must):
+        if must not in existing and has_column(table, must):
             existing.append(must)
     return ",".join(existing) if existing else "*"
 
@@ -157,7 +145,7 @@ def _fetch_one_by_filters(filters: Dict[str, str]) -> Optional[Dict[str, Any]]:
             "created_at",
         ],
     )
-    q = _sb().table("accounts").select(cols)
+    q = supabase.table("accounts").select(cols)
     for key, value in filters.items():
         q = q.eq(key, value)
     res = q.limit(1).execute()
@@ -204,7 +192,7 @@ def _ensure_account_id_on_row(row: Dict[str, Any]) -> Dict[str, Any]:
         return row
 
     try:
-        _sb().table("accounts").update({"account_id": row_id, "updated_at": _now_iso()}).eq("id", row_id).execute()
+        supabase.table("accounts").update({"account_id": row_id, "updated_at": _now_iso()}).eq("id", row_id).execute()
         row["account_id"] = row_id
     except Exception as e:
         _dbg(f"[accounts_service] failed to bridge account_id <- id for row {row_id}: {_clip(e)}")
@@ -223,7 +211,7 @@ def _delete_row_by_id(row_id: str) -> None:
     row_id = (row_id or "").strip()
     if not row_id:
         return
-    _sb().table("accounts").delete().eq("id", row_id).execute()
+    supabase.table("accounts").delete().eq("id", row_id).execute()
 
 
 # ---------------------------------------------------------
@@ -282,17 +270,17 @@ def upsert_account(*, provider: str, provider_user_id: str, display_name: Option
         "provider_user_id": provider_user_id,
         "updated_at": _now_iso(),
     }
-    if _has_column("accounts", "display_name"):
+    if has_column("accounts", "display_name"):
         payload["display_name"] = display_name
-    if _has_column("accounts", "phone"):
+    if has_column("accounts", "phone"):
         payload["phone"] = phone
-    if _has_column("accounts", "phone_e164"):
+    if has_column("accounts", "phone_e164"):
         payload["phone_e164"] = _normalize_phone_e164(phone or provider_user_id)
-    if _has_column("accounts", "email") and email is not None:
+    if has_column("accounts", "email") and email is not None:
         payload["email"] = email
 
     try:
-        _sb().table("accounts").upsert(payload, on_conflict="provider,provider_user_id").execute()
+        supabase.table("accounts").upsert(payload, on_conflict="provider,provider_user_id").execute()
         row = find_account_by_provider_user_id(provider=provider, provider_user_id=provider_user_id)
         row = _public_row(row)
         return {"ok": True, "row": row, "account_id": (row or {}).get("account_id")}
@@ -338,14 +326,14 @@ def mark_channel_claimed_for_auth_user(
             "auth_user_id": auth_user_id,
             "updated_at": _now_iso(),
         }
-        if _has_column("accounts", "display_name"):
+        if has_column("accounts", "display_name"):
             patch["display_name"] = display_name if display_name is not None else existing.get("display_name")
-        if _has_column("accounts", "phone"):
+        if has_column("accounts", "phone"):
             patch["phone"] = phone if phone is not None else existing.get("phone")
-        if _has_column("accounts", "phone_e164"):
+        if has_column("accounts", "phone_e164"):
             patch["phone_e164"] = _normalize_phone_e164(phone or existing.get("phone") or provider_user_id)
 
-        _sb().table("accounts").update(patch).eq("id", existing["id"]).execute()
+        supabase.table("accounts").update(patch).eq("id", existing["id"]).execute()
         row = find_account_by_provider_user_id(provider=provider, provider_user_id=provider_user_id)
         row = _public_row(row)
         return {"ok": True, "account_id": (row or {}).get("account_id"), "row": row}
@@ -385,14 +373,14 @@ def upsert_account_link(
             "auth_user_id": auth_user_id,
             "updated_at": _now_iso(),
         }
-        if _has_column("accounts", "display_name"):
+        if has_column("accounts", "display_name"):
             payload["display_name"] = display_name
-        if _has_column("accounts", "phone"):
+        if has_column("accounts", "phone"):
             payload["phone"] = phone
-        if _has_column("accounts", "phone_e164"):
+        if has_column("accounts", "phone_e164"):
             payload["phone_e164"] = _normalize_phone_e164(phone or provider_user_id)
 
-        _sb().table("accounts").upsert(payload, on_conflict="provider,provider_user_id").execute()
+        supabase.table("accounts").upsert(payload, on_conflict="provider,provider_user_id").execute()
         row = find_account_by_provider_user_id(provider=provider, provider_user_id=provider_user_id)
         row = _public_row(row)
         if not row:
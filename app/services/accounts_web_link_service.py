@@ -21,7 +21,7 @@ Failure exposers:
 
 from typing import Any, Dict
 
-from app.core.supabase_client import supabase
+from app.core.supabase_client import has_column, supabase
 
 
 def _sb():
@@ -33,14 +33,6 @@ def _clip(s: str, n: int = 220) -> str:
     return s if len(s) <= n else s[:n] + "…"
 
 
-def _has_column(table: str, col: str) -> bool:
-    try:
-        _sb().table(table).select(col).limit(1).execute()
-        return True
-    except Exception:
-        return False
-
-
 def link_web_user_to_account(supabase_user_id: str, account_id: str) -> Dict[str, Any]:
     """Link a Supabase auth user to an existing app account.
 
@@ -63,7 +55,7 @@ def link_web_user_to_account(supabase_user_id: str, account_id: str) -> Dict[str
         }
 
     # Ensure accounts table supports auth_user_id
-    if not _has_column("accounts", "auth_user_id"):
+    if not has_column("accounts", "auth_user_id"):
         return {
             "ok": False,
             "error": "schema_invalid",
@@ -13,7 +13,7 @@ def require_subscription_or_error(
     """
     Returns (allowed, error_payload_if_blocked)
     """
-    sub = get_subscription_status(account_id)
+    sub = get_subscription_status(account_id=account_id or "")
 
     if sub.get("active"):
         return True, {"ok": True, "subscription": sub}
@@ -26,8 +26,8 @@ def require_subscription_or_error(
             "channel": channel,
             "debug": {
                 "stage": "subscription_checked",
-                "sub_reason": sub.get("reason"),
-                "subscription_state": sub.get("state"),
+                "sub_reason": sub.get("error") or ("inactive" if sub.get("ok") else None),
+                "subscription_state": sub.get("status"),
             },
         },
         "subscription": sub,
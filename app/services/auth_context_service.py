@@ -1,39 +1,52 @@
 # app/services/auth_context_service.py
 from __future__ import annotations
 
+from concurrent.futures import ThreadPoolExecutor
 from typing import Any, Dict, Optional
 
 from app.core.supabase_client import supabase
 from app.services.subscriptions_service import get_subscription_status
 
+_PROFILE_COLUMNS = "account_id, provider, provider_user_id, display_name, phone, created_at"
 
-def get_auth_context(account_id: Optional[str]) -> Dict[str, Any]:
-    """
-    Returns a lightweight context object used by the frontend/web flows.
+# The profile read and the subscription status read are independent
+# round trips; overlap them instead of paying for both back to back.
+_IO_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="auth-context-io")
 
-    Important: subscription status is sourced from subscriptions_service
-    (single source of truth).
-    """
-    if not account_id:
-        return {"ok": False, "error": "missing_account_id"}
 
+def _read_profile(account_id: str) -> Optional[Dict[str, Any]]:
     # Basic account profile (best effort)
-    profile: Optional[Dict[str, Any]] = None
     try:
         res = (
             supabase.table("accounts")
-            .select("account_id, provider, provider_user_id, display_name, phone, created_at")
+            .select(_PROFILE_COLUMNS)
             .eq("account_id", account_id)
             .limit(1)
             .execute()
         )
         rows = (res.data or []) if hasattr(res, "data") else []
-        profile = rows[0] if rows else None
+        return rows[0] if rows else None
     except Exception:
-        profile = None
+        return None
+
+
+def get_auth_context(account_id: Optional[str]) -> Dict[str, Any]:
+    """
+    Returns a lightweight context object used by the frontend/web flows.
+
+    Important: subscription status is sourced from subscriptions_service
+    (single source of truth).
+    """
+    if not account_id:
+        return {"ok": False, "error": "missing_account_id"}
+
+    profile_read = _IO_POOL.submit(_read_profile, account_id)
+
+    # Subscription status (source of truth). Stays on the request thread so
+    # the per-request status memo in subscriptions_service still applies.
+    sub = get_subscription_status(account_id=account_id)
 
-    # Subscription status (source of truth)
-    sub = get_subscription_status(account_id)
+    profile = profile_read.result()
 
     return {
         "ok": True,
@@ -206,6 +206,7 @@ def apply_billing_payment_patch() -> None:
 
 def _patch_subscription_guard_latest_row() -> None:
     try:
+        from app.core.supabase_client import execute_with_retry
         from app.services import subscription_guard as sg
     except Exception:
         return
@@ -243,12 +244,13 @@ def _patch_subscription_guard_latest_row() -> None:
             }
 
         try:
-            query = sg._sb().table("user_subscriptions").select("*").eq("account_id", account_id)
+            query = sg.supabase.table("user_subscriptions").select("*").eq("account_id", account_id)
             try:
                 query = query.order("updated_at", desc=True)
             except Exception:
                 pass
-            res = query.limit(25).execute()
+            # Retry pooler/network blips so they don't surface as subscription_lookup_failed.
+            res = execute_with_retry(query.limit(25).execute)
             rows = getattr(res, "data", None) or []
             if not rows:
                 return None, None
@@ -22,14 +22,10 @@ CREDIT_PACKAGES = {
 }
 
 
-def _sb():
-    return supabase() if callable(supabase) else supabase
-
-
 def get_credit_balance(account_id: str) -> int:
     """Get current credit balance for an account"""
     try:
-        result = _sb().table("ai_credit_balances") \
+        result = supabase.table("ai_credit_balances") \
             .select("balance") \
             .eq("account_id", account_id) \
             .limit(1) \
@@ -68,7 +64,7 @@ def get_or_create_account_id(channel_type: str, provider_user_id: str) -> str:
     """
     try:
         # Look up existing account
-        result = _sb().table("accounts") \
+        result = supabase.table("accounts") \
             .select("account_id") \
             .eq("provider", channel_type) \
             .eq("provider_user_id", provider_user_id) \
@@ -82,7 +78,7 @@ def get_or_create_account_id(channel_type: str, provider_user_id: str) -> str:
         
         # Create new account if none exists
         new_account_id = str(uuid.uuid4())
-        _sb().table("accounts").insert({
+        supabase.table("accounts").insert({
             "id": new_account_id,
             "account_id": new_account_id,
             "provider": channel_type,
@@ -91,7 +87,7 @@ def get_or_create_account_id(channel_type: str, provider_user_id: str) -> str:
         }).execute()
         
         # Also create credit balance record
-        _sb().table("ai_credit_balances").insert({
+        supabase.table("ai_credit_balances").insert({
             "account_id": new_account_id,
             "balance": 0,
             "updated_at": datetime.now(timezone.utc).isoformat()
@@ -138,7 +134,7 @@ def create_credit_payment(
     
     # Store transaction record with channel user info
     try:
-        _sb().table("paystack_transactions").insert({
+        supabase.table("paystack_transactions").insert({
             "reference": reference,
             "account_id": account_id,
             "amount": amount_kobo,
@@ -219,7 +215,7 @@ def add_credits_to_account(account_id: str, credits: int, reference: str) -> boo
             pass  # If subscription check fails, still add credits
         
         # Check existing balance
-        existing = _sb().table("ai_credit_balances") \
+        existing = supabase.table("ai_credit_balances") \
             .select("balance") \
             .eq("account_id", account_id) \
             .execute()
@@ -228,7 +224,7 @@ def add_credits_to_account(account_id: str, credits: int, reference: str) -> boo
         
         if existing.data:
             new_balance = existing.data[0].get("balance", 0) + credits
-            _sb().table("ai_credit_balances") \
+            supabase.table("ai_credit_balances") \
                 .update({
                     "balance": new_balance,
                     "updated_at": now
@@ -237,7 +233,7 @@ def add_credits_to_account(account_id: str, credits: int, reference: str) -> boo
                 .execute()
             logger.info(f"Updated balance for {account_id}: +{credits} = {new_balance}")
         else:
-            _sb().table("ai_credit_balances").insert({
+            supabase.table("ai_credit_balances").insert({
                 "account_id": account_id,
                 "balance": credits,
                 "updated_at": now
@@ -246,7 +242,7 @@ def add_credits_to_account(account_id: str, credits: int, reference: str) -> boo
         
         # Log the credit addition (optional)
         try:
-            _sb().table("ai_credit_events").insert({
+            supabase.table("ai_credit_events").insert({
                 "account_id": account_id,
                 "event_type": "credit_purchase",
                 "credits": credits,
@@ -282,7 +278,7 @@ def get_user_email_status(account_id: str) -> Dict[str, Any]:
     Check if user has an email associated with their account
     """
     try:
-        result = _sb().table("accounts") \
+        result = supabase.table("accounts") \
             .select("email") \
             .eq("account_id", account_id) \
             .limit(1) \
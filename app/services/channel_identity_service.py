@@ -8,6 +8,7 @@ from typing import Any, Dict, Optional
 from app.core.supabase_client import supabase
 from app.services.guest_access_service import get_referrer_account_id_from_code
 from app.services.paystack_service import initialize_transaction
+from app.services.plans_cache_service import get_plan_row
 
 
 EMAIL_RE = re.compile(r"^[^@\s]+@[^@\s]+\.[^@\s]+$")
@@ -190,17 +191,8 @@ def get_plan_by_code(plan_code: str) -> Optional[Dict[str, Any]]:
     if not code:
         return None
 
-    sb = _sb()
-    res = (
-        sb.table("plans")
-        .select("*")
-        .eq("plan_code", code)
-        .eq("active", True)
-        .limit(1)
-        .execute()
-    )
-    rows = getattr(res, "data", None) or []
-    return rows[0] if rows else None
+    # Plan rows are config-like; checkout used to re-read the row on every payment link.
+    return get_plan_row(code, active_only=True)
 
 
 def update_account_email(
@@ -32,17 +32,25 @@ def _clip(value: Any, n: int = 240) -> str:
     return s if len(s) <= n else s[:n] + "…"
 
 
+PROVIDER_ALIASES = {
+    "wa": "wa",
+    "whatsapp": "wa",
+    "waba": "wa",
+    "tg": "tg",
+    "telegram": "tg",
+    "msgr": "msgr",
+    "messenger": "msgr",
+    "facebook_messenger": "msgr",
+    "fb_messenger": "msgr",
+    "ig": "ig",
+    "instagram": "ig",
+    "instagram_dm": "ig",
+}
+
+
 def _normalize_provider(provider: str) -> str:
     p = str(provider or "").strip().lower()
-    if p in {"wa", "whatsapp", "waba"}:
-        return "wa"
-    if p in {"tg", "telegram"}:
-        return "tg"
-    if p in {"msgr", "messenger", "facebook_messenger", "fb_messenger"}:
-        return "msgr"
-    if p in {"ig", "instagram", "instagram_dm"}:
-        return "ig"
-    return p
+    return PROVIDER_ALIASES.get(p, p)
 
 
 def extract_code(text: Optional[str]) -> Optional[str]:
@@ -21,14 +21,10 @@ CREDIT_PACKAGES = {
 }
 
 
-def _sb():
-    return supabase() if callable(supabase) else supabase
-
-
 def get_credit_balance(account_id: str) -> int:
     """Get current credit balance for an account"""
     try:
-        result = _sb().table("ai_credit_balances") \
+        result = supabase.table("ai_credit_balances") \
             .select("balance") \
             .eq("account_id", account_id) \
             .limit(1) \
@@ -69,7 +65,7 @@ def create_credit_purchase_link(account_id: str, package_number: int) -> Dict[st
     
     # Store transaction record
     try:
-        _sb().table("paystack_transactions").insert({
+        supabase.table("paystack_transactions").insert({
             "reference": reference,
             "account_id": account_id,
             "amount": amount_kobo,
@@ -132,7 +128,7 @@ def add_credits_after_payment(reference: str, credits: int) -> bool:
     """Add credits to user's balance after successful payment"""
     try:
         # Get transaction to find account_id
-        result = _sb().table("paystack_transactions") \
+        result = supabase.table("paystack_transactions") \
             .select("account_id, metadata") \
             .eq("reference", reference) \
             .limit(1) \
@@ -148,14 +144,14 @@ def add_credits_after_payment(reference: str, credits: int) -> bool:
             return False
         
         # Update or insert credit balance
-        existing = _sb().table("ai_credit_balances") \
+        existing = supabase.table("ai_credit_balances") \
             .select("balance") \
             .eq("account_id", account_id) \
             .execute()
         
         if existing.data:
             new_balance = existing.data[0].get("balance", 0) + credits
-            _sb().table("ai_credit_balances") \
+            supabase.table("ai_credit_balances") \
                 .update({
                     "balance": new_balance,
                     "updated_at": datetime.now(timezone.utc).isoformat()
@@ -163,7 +159,7 @@ def add_credits_after_payment(reference: str, credits: int) -> bool:
                 .eq("account_id", account_id) \
                 .execute()
         else:
-            _sb().table("ai_credit_balances").insert({
+            supabase.table("ai_credit_balances").insert({
                 "account_id": account_id,
                 "balance": credits,
                 "updated_at": datetime.now(timezone.utc).isoformat()
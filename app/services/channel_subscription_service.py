@@ -7,29 +7,33 @@ import logging
 from datetime import datetime, timezone, timedelta
 from typing import Dict, Any, Optional, List, Tuple
 
-from app.core.supabase_client import supabase
+from app.core.supabase_client import execute_with_retry, supabase
 from app.services.paystack_service import initialize_transaction
 from app.services.credits_service import add_plan_credits_for_payment
+from app.services.plans_cache_service import get_active_plan_rows
 
 logger = logging.getLogger(__name__)
 
+RPC_ACTIVATE_CHANNEL_SUBSCRIPTION = (
+    os.getenv("CHANNEL_SUBSCRIPTION_RPC_ACTIVATE") or "bms_activate_channel_subscription"
+).strip() or "bms_activate_channel_subscription"
+_activation_rpc_missing = False
+# Flips to False once PostgREST reports no unique constraint on user_subscriptions.account_id.
+_account_upsert_supported = True
 
-def _sb():
-    return supabase() if callable(supabase) else supabase
+
+_PLAN_MENU_COLUMNS = "plan_code, name, price, ai_credits_total, daily_answers_limit, duration_days"
 
 
 def get_plans_from_db() -> Dict[int, Dict[str, Any]]:
-    """Fetch actual plans from database - includes all billing cycles"""
+    """Fetch actual plans from database - includes all billing cycles (rows cached by plans_cache_service)"""
     try:
-        result = _sb().table("plans") \
-            .select("plan_code, name, price, ai_credits_total, daily_answers_limit, duration_days") \
-            .eq("active", True) \
-            .execute()
+        rows = get_active_plan_rows(_PLAN_MENU_COLUMNS)
 
         plans: Dict[int, Dict[str, Any]] = {}
         index = 1
 
-        for row in (result.data or []):
+        for row in rows:
             plan_code = row.get("plan_code", "")
             duration_days = row.get("duration_days", 30)
 
@@ -160,14 +164,17 @@ def detect_plan_from_text(text: str) -> Tuple[Optional[int], Optional[Dict[str,
 def get_user_email(account_id: str) -> Optional[str]:
     """Get user's stored email if available"""
     try:
-        result = _sb().table("accounts") \
-            .select("email") \
-            .eq("account_id", account_id) \
-            .limit(1) \
+        result = execute_with_retry(
+            lambda: supabase.table("accounts")
+            .select("email")
+            .eq("account_id", account_id)
+            .limit(1)
             .execute()
+        )
 
-        if result.data and result.data[0].get("email"):
-            return result.data[0]["email"]
+        rows = getattr(result, "data", None) or []
+        if rows and rows[0].get("email"):
+            return rows[0]["email"]
 
         return None
 
@@ -178,7 +185,7 @@ def get_user_email(account_id: str) -> Optional[str]:
 def store_user_email(account_id: str, email: str) -> bool:
     """Store user's email for future subscription use - handles duplicate gracefully"""
     try:
-        existing = _sb().table("accounts") \
+        existing = supabase.table("accounts") \
             .select("account_id, email") \
             .eq("email", email.lower()) \
             .execute()
@@ -187,7 +194,7 @@ def store_user_email(account_id: str, email: str) -> bool:
             logger.info(f"Email {email} already exists in another account")
             return True
 
-        _sb().table("accounts") \
+        supabase.table("accounts") \
             .update({"email": email.lower()}) \
             .eq("account_id", account_id) \
             .execute()
@@ -240,7 +247,7 @@ def create_subscription_payment(
     store_user_email(account_id, email)
 
     try:
-        _sb().table("paystack_transactions").insert({
+        supabase.table("paystack_transactions").insert({
             "reference": reference,
             "account_id": account_id,
             "amount": amount_kobo,
@@ -330,6 +337,102 @@ def create_subscription_payment(
         }
 
 
+def _rpc_activate_subscription_row(account_id: str, plan_code: str, current_period_end: str) -> bool:
+    """
+    Deactivate-previous + update-latest-or-insert in one Postgres transaction
+    (supabase/subscription_rpcs.sql). One round trip instead of three.
+    Returns False when the RPC is unavailable so the caller can use the table path.
+    """
+    global _activation_rpc_missing
+    if _activation_rpc_missing:
+        return False
+    try:
+        supabase.rpc(
+            RPC_ACTIVATE_CHANNEL_SUBSCRIPTION,
+            {
+                "p_account_id": account_id,
+                "p_plan_code": plan_code,
+                "p_period_end": current_period_end,
+            },
+        ).execute()
+        return True
+    except Exception as e:
+        # Function not deployed: stop retrying it on every payment for this worker.
+        if str(getattr(e, "code", "") or "") in {"PGRST202", "42883"}:
+            _activation_rpc_missing = True
+        logger.warning(f"Subscription activation RPC unavailable, using table writes: {e}")
+        return False
+
+
+def _upsert_subscription_row(account_id: str, plan_code: str, current_period_end: str, now_iso: str) -> bool:
+    """
+    Single-request insert-or-update keyed on account_id (same conflict target as
+    billing's _safe_upsert). Returns False when the table has no unique constraint
+    on account_id so the caller can use the select-then-write path.
+    """
+    global _account_upsert_supported
+    if not _account_upsert_supported:
+        return False
+    try:
+        # created_at is left to the column default so renewals keep the original value.
+        supabase.table("user_subscriptions").upsert({
+            "account_id": account_id,
+            "plan_code": plan_code,
+            "status": "active",
+            "is_active": True,
+            "current_period_end": current_period_end,
+            "updated_at": now_iso,
+        }, on_conflict="account_id", returning="minimal").execute()
+        return True
+    except Exception as e:
+        if str(getattr(e, "code", "") or "") == "42P10":
+            _account_upsert_supported = False
+        logger.warning(f"Subscription upsert unavailable, using select-then-write: {e}")
+        return False
+
+
+def _write_subscription_rows(account_id: str, plan_code: str, current_period_end: str, now_iso: str) -> None:
+    """Table-write fallback for _rpc_activate_subscription_row."""
+    if _upsert_subscription_row(account_id, plan_code, current_period_end, now_iso):
+        return
+
+    supabase.table("user_subscriptions") \
+        .update({"is_active": False, "status": "inactive", "updated_at": now_iso}, returning="minimal") \
+        .eq("account_id", account_id) \
+        .eq("is_active", True) \
+        .execute()
+
+    # Only the primary key is needed to target the update.
+    existing = supabase.table("user_subscriptions") \
+        .select("id") \
+        .eq("account_id", account_id) \
+        .order("created_at", desc=True) \
+        .limit(1) \
+        .execute()
+
+    if existing.data:
+        supabase.table("user_subscriptions") \
+            .update({
+                "plan_code": plan_code,
+                "status": "active",
+                "is_active": True,
+                "current_period_end": current_period_end,
+                "updated_at": now_iso,
+            }, returning="minimal") \
+            .eq("id", existing.data[0]["id"]) \
+            .execute()
+    else:
+        supabase.table("user_subscriptions").insert({
+            "account_id": account_id,
+            "plan_code": plan_code,
+            "status": "active",
+            "is_active": True,
+            "current_period_end": current_period_end,
+            "created_at": now_iso,
+            "updated_at": now_iso,
+        }, returning="minimal").execute()
+
+
 def activate_subscription(account_id: str, plan_code: str, reference: str) -> Dict[str, Any]:
     """
     Activate a subscription for a channel user.
@@ -355,40 +458,8 @@ def activate_subscription(account_id: str, plan_code: str, reference: str) -> Di
         current_period_end = (now + timedelta(days=duration_days)).isoformat()
         now_iso = now.isoformat()
 
-        _sb().table("user_subscriptions") \
-            .update({"is_active": False, "status": "inactive", "updated_at": now_iso}) \
-            .eq("account_id", account_id) \
-            .eq("is_active", True) \
-            .execute()
-
-        existing = _sb().table("user_subscriptions") \
-            .select("*") \
-            .eq("account_id", account_id) \
-            .order("created_at", desc=True) \
-            .limit(1) \
-            .execute()
-
-        if existing.data:
-            _sb().table("user_subscriptions") \
-                .update({
-                    "plan_code": plan_code,
-                    "status": "active",
-                    "is_active": True,
-                    "current_period_end": current_period_end,
-                    "updated_at": now_iso,
-                }) \
-                .eq("id", existing.data[0]["id"]) \
-                .execute()
-        else:
-            _sb().table("user_subscriptions").insert({
-                "account_id": account_id,
-                "plan_code": plan_code,
-                "status": "active",
-                "is_active": True,
-                "current_period_end": current_period_end,
-                "created_at": now_iso,
-                "updated_at": now_iso,
-            }).execute()
+        if not _rpc_activate_subscription_row(account_id, plan_code, current_period_end):
+            _write_subscription_rows(account_id, plan_code, current_period_end, now_iso)
 
         credit_initialization: Dict[str, Any] = {}
         try:
@@ -446,14 +517,17 @@ def activate_subscription(account_id: str, plan_code: str, reference: str) -> Di
 def get_user_subscription(account_id: str) -> Optional[Dict[str, Any]]:
     """Get user's current active subscription"""
     try:
-        result = _sb().table("user_subscriptions") \
-            .select("*") \
-            .eq("account_id", account_id) \
-            .eq("is_active", True) \
-            .eq("status", "active") \
-            .order("created_at", desc=True) \
-            .limit(1) \
+        # A pooler hiccup here used to read as "no subscription"; retry transient failures first.
+        result = execute_with_retry(
+            lambda: supabase.table("user_subscriptions")
+            .select("plan_code, status, is_active, current_period_end")
+            .eq("account_id", account_id)
+            .eq("is_active", True)
+            .eq("status", "active")
+            .order("created_at", desc=True)
+            .limit(1)
             .execute()
+        )
 
         if result.data:
             return result.data[0]
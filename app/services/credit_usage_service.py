@@ -10,10 +10,6 @@ from app.core.supabase_client import supabase
 CREDIT_USAGE_SERVICE_VERSION = "2026-05-23-v4-paid-ai-no-double-debit-safe"
 
 
-def _sb():
-    return supabase() if callable(supabase) else supabase
-
-
 def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
@@ -63,7 +59,7 @@ def _query_rows(
     **eq_filters: Any,
 ) -> Tuple[list[dict[str, Any]], Optional[str]]:
     try:
-        q = _sb().table(table).select(select_cols)
+        q = supabase.table(table).select(select_cols)
         for col, val in eq_filters.items():
             if val is not None and _clean(val):
                 q = q.eq(col, val)
@@ -76,7 +72,7 @@ def _query_rows(
 
 def _safe_insert(table: str, payload: Dict[str, Any]) -> Optional[str]:
     try:
-        _sb().table(table).insert(payload).execute()
+        supabase.table(table).insert(payload).execute()
         return None
     except Exception as exc:
         return f"{table}: {type(exc).__name__}: {_clip(exc)}"
@@ -84,7 +80,7 @@ def _safe_insert(table: str, payload: Dict[str, Any]) -> Optional[str]:
 
 def _safe_upsert(table: str, payload: Dict[str, Any], on_conflict: str = "account_id") -> Optional[str]:
     try:
-        _sb().table(table).upsert(payload, on_conflict=on_conflict).execute()
+        supabase.table(table).upsert(payload, on_conflict=on_conflict).execute()
         return None
     except Exception as exc:
         return f"{table}: {type(exc).__name__}: {_clip(exc)}"
@@ -92,7 +88,7 @@ def _safe_upsert(table: str, payload: Dict[str, Any], on_conflict: str = "accoun
 
 def _safe_update(table: str, payload: Dict[str, Any], *, account_id: str) -> Optional[str]:
     try:
-        _sb().table(table).update(payload).eq("account_id", account_id).execute()
+        supabase.table(table).update(payload).eq("account_id", account_id).execute()
         return None
     except Exception as exc:
         return f"{table}: {type(exc).__name__}: {_clip(exc)}"
@@ -37,10 +37,7 @@ from datetime import datetime, timezone, date
 from typing import Any, Dict, Optional
 
 from app.core.supabase_client import supabase
-
-
-def _sb():
-    return supabase() if callable(supabase) else supabase
+from app.services.plans_cache_service import get_plan_row
 
 
 def _now_utc() -> datetime:
@@ -92,17 +89,18 @@ def get_credit_balance(account_id: str) -> int:
 
     try:
         res = (
-            _sb()
+            supabase
             .table(BAL_TABLE)
             .select(BAL_COL_BALANCE)
             .eq(BAL_COL_ACCOUNT, account_id)
-            .limit(1)
+            .maybe_single()
             .execute()
         )
-        rows = getattr(res, "data", None) or []
-        if not rows:
+        # One balance row per account (the upsert conflict target): read it as an object.
+        row = getattr(res, "data", None)
+        if not row:
             return 0
-        return _as_int(rows[0].get(BAL_COL_BALANCE), 0)
+        return _as_int(row.get(BAL_COL_BALANCE), 0)
     except Exception:
         return 0
 
@@ -119,15 +117,15 @@ def get_credit_balance_details(account_id: str) -> Dict[str, Any]:
 
     try:
         res = (
-            _sb()
+            supabase
             .table(BAL_TABLE)
             .select(f"{BAL_COL_BALANCE},{BAL_COL_UPDATED}")
             .eq(BAL_COL_ACCOUNT, account_id)
-            .limit(1)
+            .maybe_single()
             .execute()
         )
-        rows = getattr(res, "data", None) or []
-        if not rows:
+        row = getattr(res, "data", None)
+        if not row:
             return {
                 "ok": True,
                 "exists": False,
@@ -136,7 +134,6 @@ def get_credit_balance_details(account_id: str) -> Dict[str, Any]:
                 "account_id": account_id,
             }
 
-        row = rows[0] or {}
         return {
             "ok": True,
             "exists": True,
@@ -198,7 +195,7 @@ def check_credit_balance(account_id: str, cost: int = 1) -> Dict[str, Any]:
 
 
 def _set_credit_balance(account_id: str, new_balance: int) -> None:
-    _sb().table(BAL_TABLE).upsert(
+    supabase.table(BAL_TABLE).upsert(
         {
             BAL_COL_ACCOUNT: account_id,
             BAL_COL_BALANCE: int(new_balance),
@@ -229,23 +226,15 @@ def init_credits_for_plan(account_id: str, plan_code: str) -> Dict[str, Any]:
         }
 
     try:
-        pres = (
-            _sb()
-            .table(PLANS_TABLE)
-            .select("plan_code, ai_credits_total")
-            .eq("plan_code", plan_code)
-            .limit(1)
-            .execute()
-        )
-        prows = getattr(pres, "data", None) or []
-        if not prows:
+        plan = get_plan_row(plan_code, columns="plan_code, ai_credits_total")
+        if not plan:
             return {
                 "ok": False,
                 "error": "unknown_plan_code",
                 "root_cause": f"plans.plan_code not found for '{plan_code}'",
                 "fix": "Insert the plan into plans table or pass a valid plan_code.",
             }
-        total = _as_int(prows[0].get("ai_credits_total"), 0)
+        total = _as_int(plan.get("ai_credits_total"), 0)
     except Exception as e:
         return {
             "ok": False,
@@ -322,7 +311,7 @@ def add_plan_credits_for_payment(
         }
 
     try:
-        resp = _sb().rpc(
+        resp = supabase.rpc(
             "apply_plan_credit_purchase",
             {
                 "p_account_id": account_id,
@@ -412,16 +401,16 @@ def get_daily_usage(account_id: str, day: Optional[date] = None) -> Dict[str, An
 
     try:
         res = (
-            _sb()
+            supabase
             .table(USAGE_TABLE)
             .select(f"{USAGE_COL_COUNT},{USAGE_COL_DAY}")
             .eq(USAGE_COL_ACCOUNT, account_id)
             .eq(USAGE_COL_DAY, str(day))
-            .limit(1)
+            .maybe_single()
             .execute()
         )
-        rows = getattr(res, "data", None) or []
-        count = _as_int((rows[0].get(USAGE_COL_COUNT) if rows else 0), 0)
+        row = getattr(res, "data", None)
+        count = _as_int((row.get(USAGE_COL_COUNT) if row else 0), 0)
         return {"ok": True, "account_id": account_id, "day": str(day), "count": count}
     except Exception as e:
         return {
@@ -453,7 +442,7 @@ def increment_daily_usage(account_id: str, inc: int = 1, day: Optional[date] = N
     new_count = _as_int(current.get("count"), 0) + inc
 
     try:
-        _sb().table(USAGE_TABLE).upsert(
+        supabase.table(USAGE_TABLE).upsert(
             {
                 USAGE_COL_ACCOUNT: account_id,
                 USAGE_COL_DAY: str(day),
@@ -484,16 +473,8 @@ def get_plan_limits(plan_code: str) -> Dict[str, Any]:
         }
 
     try:
-        res = (
-            _sb()
-            .table(PLANS_TABLE)
-            .select("plan_code, ai_credits_total, daily_answers_limit, price, duration_days, active")
-            .eq("plan_code", plan_code)
-            .limit(1)
-            .execute()
-        )
-        rows = getattr(res, "data", None) or []
-        if not rows:
+        p = get_plan_row(plan_code, columns="plan_code, ai_credits_total, daily_answers_limit, price, duration_days, active")
+        if not p:
             return {
                 "ok": False,
                 "error": "plan_not_found",
@@ -501,7 +482,6 @@ def get_plan_limits(plan_code: str) -> Dict[str, Any]:
                 "fix": "Ensure plan exists in plans table.",
             }
 
-        p = rows[0] or {}
         return {
             "ok": True,
             "plan_code": plan_code,
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import os
+import queue
 import smtplib
 import ssl
 import socket
-from typing import Optional, Dict, Any
+import time
+from typing import Optional, Dict, Any, Tuple
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 
@@ -33,6 +35,13 @@ MAIL_USE_TLS = _truthy(os.getenv("MAIL_USE_TLS", "1"))
 DEFAULT_OTP_SUBJECT = (os.getenv("WEB_OTP_EMAIL_SUBJECT") or "Your NaijaTax Guide OTP").strip()
 SMTP_TIMEOUT_SECONDS = int((os.getenv("MAIL_TIMEOUT_SECONDS") or "10").strip() or "10")
 
+# Logged-in SMTP connections are kept for reuse so only the first send pays for
+# connect + STARTTLS + LOGIN. Idle ones past MAIL_POOL_IDLE_SECONDS are dropped
+# rather than probed (most relays close idle sessions after a minute or two).
+MAIL_POOL_SIZE = int((os.getenv("MAIL_POOL_SIZE") or "2").strip() or "2")
+MAIL_POOL_IDLE_SECONDS = float((os.getenv("MAIL_POOL_IDLE_SECONDS") or "45").strip() or "45")
+_smtp_pool: "queue.LifoQueue[Tuple[smtplib.SMTP, float]]" = queue.LifoQueue(maxsize=max(0, MAIL_POOL_SIZE) or 1)
+
 
 def _smtp_config_snapshot(to_email: str) -> Dict[str, Any]:
     return {
@@ -56,6 +65,78 @@ def _log(stage: str, **kwargs: Any) -> None:
         pass
 
 
+# ---------------------------------------------------------
+# SMTP CONNECTIONS
+# ---------------------------------------------------------
+def _smtp_connect() -> smtplib.SMTP:
+    if MAIL_USE_SSL:
+        _log("connect_ssl_start", host=MAIL_HOST, port=MAIL_PORT, timeout=SMTP_TIMEOUT_SECONDS)
+        context = ssl.create_default_context()
+        server: smtplib.SMTP = smtplib.SMTP_SSL(
+            MAIL_HOST,
+            MAIL_PORT,
+            timeout=SMTP_TIMEOUT_SECONDS,
+            context=context,
+        )
+        _log("connect_ssl_ok")
+    else:
+        _log("connect_start", host=MAIL_HOST, port=MAIL_PORT, timeout=SMTP_TIMEOUT_SECONDS)
+        server = smtplib.SMTP(MAIL_HOST, MAIL_PORT, timeout=SMTP_TIMEOUT_SECONDS)
+        _log("connect_ok")
+        server.ehlo()
+        _log("ehlo_ok")
+
+        if MAIL_USE_TLS:
+            _log("starttls_start")
+            context = ssl.create_default_context()
+            server.starttls(context=context)
+            _log("starttls_ok")
+            server.ehlo()
+            _log("ehlo_after_starttls_ok")
+
+    try:
+        _log("login_start", user=MAIL_USER)
+        server.login(MAIL_USER, MAIL_PASS)
+        _log("login_ok")
+    except Exception:
+        _smtp_close(server)
+        raise
+    return server
+
+
+def _smtp_close(server: smtplib.SMTP) -> None:
+    try:
+        server.quit()
+    except Exception:
+        try:
+            server.close()
+        except Exception:
+            pass
+
+
+def _smtp_acquire() -> Tuple[smtplib.SMTP, bool]:
+    """A pooled connection if one is fresh enough, else a new one. Returns (server, reused)."""
+    while MAIL_POOL_SIZE > 0:
+        try:
+            server, last_used = _smtp_pool.get_nowait()
+        except queue.Empty:
+            break
+        if time.monotonic() - last_used < MAIL_POOL_IDLE_SECONDS:
+            return server, True
+        _smtp_close(server)
+    return _smtp_connect(), False
+
+
+def _smtp_release(server: smtplib.SMTP) -> None:
+    if MAIL_POOL_SIZE > 0:
+        try:
+            _smtp_pool.put_nowait((server, time.monotonic()))
+            return
+        except queue.Full:
+            pass
+    _smtp_close(server)
+
+
 # ---------------------------------------------------------
 # SEND EMAIL CORE
 # ---------------------------------------------------------
@@ -64,6 +145,7 @@ def send_email(
     subject: str,
     html_body: str,
     text_body: Optional[str] = None,
+    from_email: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
     Sends transactional email via SMTP.
@@ -73,6 +155,7 @@ def send_email(
     to_email = (to_email or "").strip().lower()
     if not to_email:
         return {"ok": False, "error": "to_email_required"}
+    from_email = (from_email or MAIL_FROM_EMAIL).strip()
 
     if not MAIL_ENABLED:
         return {
@@ -91,7 +174,7 @@ def send_email(
         missing.append("MAIL_USER")
     if not MAIL_PASS:
         missing.append("MAIL_PASS")
-    if not MAIL_FROM_EMAIL:
+    if not from_email:
         missing.append("MAIL_FROM_EMAIL")
     
     if missing:
@@ -105,7 +188,7 @@ def send_email(
 
     msg = MIMEMultipart("alternative")
     msg["Subject"] = subject
-    msg["From"] = f"{MAIL_FROM_NAME} <{MAIL_FROM_EMAIL}>"
+    msg["From"] = f"{MAIL_FROM_NAME} <{from_email}>"
     msg["To"] = to_email
 
     if text_body:
@@ -115,42 +198,28 @@ def send_email(
     _log("prepare_send", to=to_email, subject=subject, config=_smtp_config_snapshot(to_email))
 
     try:
-        if MAIL_USE_SSL:
-            _log("connect_ssl_start", host=MAIL_HOST, port=MAIL_PORT, timeout=SMTP_TIMEOUT_SECONDS)
-            context = ssl.create_default_context()
-            with smtplib.SMTP_SSL(
-                MAIL_HOST,
-                MAIL_PORT,
-                timeout=SMTP_TIMEOUT_SECONDS,
-                context=context,
-            ) as server:
-                _log("connect_ssl_ok")
-                server.login(MAIL_USER, MAIL_PASS)
-                _log("login_ok")
-                server.sendmail(MAIL_FROM_EMAIL, [to_email], msg.as_string())
-                _log("sendmail_ok")
-        else:
-            _log("connect_start", host=MAIL_HOST, port=MAIL_PORT, timeout=SMTP_TIMEOUT_SECONDS)
-            with smtplib.SMTP(MAIL_HOST, MAIL_PORT, timeout=SMTP_TIMEOUT_SECONDS) as server:
-                _log("connect_ok")
-                server.ehlo()
-                _log("ehlo_ok")
-
-                if MAIL_USE_TLS:
-                    _log("starttls_start")
-                    context = ssl.create_default_context()
-                    server.starttls(context=context)
-                    _log("starttls_ok")
-                    server.ehlo()
-                    _log("ehlo_after_starttls_ok")
-
-                _log("login_start", user=MAIL_USER)
-                server.login(MAIL_USER, MAIL_PASS)
-                _log("login_ok")
-
-                _log("sendmail_start", from_email=MAIL_FROM_EMAIL, to=to_email)
-                server.sendmail(MAIL_FROM_EMAIL, [to_email], msg.as_string())
-                _log("sendmail_ok")
+        raw = msg.as_string()
+        server, reused = _smtp_acquire()
+        _log("sendmail_start", from_email=from_email, to=to_email, reused=reused)
+        try:
+            server.sendmail(from_email, [to_email], raw)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            _smtp_close(server)
+            if not reused:
+                raise
+            # The relay dropped a pooled session; retry once on a fresh connection.
+            _log("pooled_connection_stale")
+            server = _smtp_connect()
+            try:
+                server.sendmail(from_email, [to_email], raw)
+            except Exception:
+                _smtp_close(server)
+                raise
+        except Exception:
+            _smtp_close(server)
+            raise
+        _log("sendmail_ok")
+        _smtp_release(server)
 
         return {"ok": True, "debug": _smtp_config_snapshot(to_email)}
 
@@ -213,8 +282,15 @@ def send_email(
 # ---------------------------------------------------------
 # OTP TEMPLATE - Enhanced for better deliverability
 # ---------------------------------------------------------
-def send_otp_email(to_email: str, otp_code: str) -> Dict[str, Any]:
-    subject = DEFAULT_OTP_SUBJECT
+def send_otp_email(
+    to_email: str,
+    otp_code: str,
+    ttl_minutes: int = 10,
+    subject: Optional[str] = None,
+    from_email: Optional[str] = None,
+) -> Dict[str, Any]:
+    subject = subject or DEFAULT_OTP_SUBJECT
+    expiry = f"{ttl_minutes} minute" if ttl_minutes == 1 else f"{ttl_minutes} minutes"
 
     html_body = f"""
     <!DOCTYPE html>
@@ -238,7 +314,7 @@ def send_otp_email(to_email: str, otp_code: str) -> Dict[str, Any]:
                 <span style="font-size: 42px; font-weight: bold; letter-spacing: 8px; background: #f5f5f5; padding: 15px 25px; border-radius: 12px; border: 2px solid #1a73e8; color: #1a73e8; font-family: monospace;">{otp_code}</span>
             </div>
             
-            <p style="font-size: 14px; color: #666; margin: 20px 0 10px 0;">This code will expire in <strong>10 minutes</strong>.</p>
+            <p style="font-size: 14px; color: #666; margin: 20px 0 10px 0;">This code will expire in <strong>{expiry}</strong>.</p>
             <p style="font-size: 14px; color: #666; margin: 0 0 20px 0;">If you didn't request this, please ignore this email.</p>
             
             <hr style="margin: 30px 0; border: none; border-top: 1px solid #eee;">
@@ -258,7 +334,7 @@ Hello,
 
 Your One-Time Password (OTP) for login is: {otp_code}
 
-This code will expire in 10 minutes.
+This code will expire in {expiry}.
 
 If you didn't request this, please ignore this email.
 
@@ -272,6 +348,7 @@ https://www.naijataxguides.com
         subject=subject,
         html_body=html_body,
         text_body=text_body,
+        from_email=from_email,
     )
 
 
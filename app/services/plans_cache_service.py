@@ -0,0 +1,71 @@
+# app/services/plans_cache_service.py
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+from app.core.supabase_client import execute_with_retry, supabase
+
+# Plans change only through admin edits, but plan menus, checkout links and credit
+# initialisation all read them. Every plans read goes through this per-worker TTL
+# cache; an edit is picked up within PLANS_CACHE_TTL_SECONDS.
+PLANS_TABLE = "plans"
+PLANS_CACHE_TTL_SECONDS = int((os.getenv("PLANS_CACHE_TTL_SECONDS") or "300").strip() or "300")
+
+# Keyed by the exact select, so a caller asking for fewer columns never depends on
+# columns another caller needs.
+_row_cache: Dict[Tuple[str, str, bool], Tuple[float, Dict[str, Any]]] = {}
+_active_cache: Dict[str, Tuple[float, List[Dict[str, Any]]]] = {}
+_active_lock = threading.Lock()
+
+
+def get_plan_row(plan_code: str, *, columns: str = "*", active_only: bool = False) -> Optional[Dict[str, Any]]:
+    """
+    plans row for plan_code with the given columns, or None.
+    Misses are not cached, so a newly seeded plan is picked up immediately. Raises on query failure.
+    """
+    key = (plan_code, columns, active_only)
+    hit = _row_cache.get(key)
+    if hit is not None and hit[0] > time.monotonic():
+        return dict(hit[1])
+
+    def _read():
+        query = supabase.table(PLANS_TABLE).select(columns).eq("plan_code", plan_code)
+        if active_only:
+            query = query.eq("active", True)
+        return query.limit(1).execute()
+
+    rows = getattr(execute_with_retry(_read), "data", None) or []
+    if not rows:
+        return None
+    _row_cache[key] = (time.monotonic() + PLANS_CACHE_TTL_SECONDS, rows[0])
+    return dict(rows[0])
+
+
+def get_active_plan_rows(columns: str = "*") -> List[Dict[str, Any]]:
+    """
+    Every active plans row with the given columns.
+    An empty result is not cached. Raises on query failure.
+    """
+    hit = _active_cache.get(columns)
+    if hit is not None and hit[0] > time.monotonic():
+        return [dict(r) for r in hit[1]]
+
+    # Concurrent misses (a burst of plan menus after expiry) share one read.
+    with _active_lock:
+        hit = _active_cache.get(columns)
+        if hit is not None and hit[0] > time.monotonic():
+            return [dict(r) for r in hit[1]]
+
+        res = execute_with_retry(
+            lambda: supabase.table(PLANS_TABLE)
+            .select(columns)
+            .eq("active", True)
+            .execute()
+        )
+        rows = list(getattr(res, "data", None) or [])
+        if rows:
+            _active_cache[columns] = (time.monotonic() + PLANS_CACHE_TTL_SECONDS, rows)
+        return [dict(r) for r in rows]
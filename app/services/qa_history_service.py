@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime, timezone
 from typing import Any, Dict, List, Optional
 
-from app.core.supabase_client import supabase
+from app.core.supabase_client import has_column, supabase
 
 HISTORY_TABLE = "qa_history"
 
@@ -29,14 +29,6 @@ def _has_table(table: str) -> bool:
         return False
 
 
-def _has_column(table: str, col: str) -> bool:
-    try:
-        _sb().table(table).select(col).limit(1).execute()
-        return True
-    except Exception:
-        return False
-
-
 def _safe_select_cols() -> str:
     preferred = [
         "id",
@@ -55,7 +47,7 @@ def _safe_select_cols() -> str:
         "created_at",
         "updated_at",
     ]
-    cols = [c for c in preferred if _has_column(HISTORY_TABLE, c)]
+    cols = [c for c in preferred if has_column(HISTORY_TABLE, c)]
     return ",".join(cols) if cols else "*"
 
 
@@ -120,7 +112,7 @@ def log_history_item_best_effort(
         "updated_at": _now_iso(),
     }
 
-    safe_payload = {k: v for k, v in payload.items() if _has_column(HISTORY_TABLE, k)}
+    safe_payload = {k: v for k, v in payload.items() if has_column(HISTORY_TABLE, k)}
 
     if not safe_payload:
         return
@@ -174,7 +166,7 @@ def list_history_items(
             .limit(safe_limit)
         )
 
-        if source and _has_column(HISTORY_TABLE, "source"):
+        if source and has_column(HISTORY_TABLE, "source"):
             q = q.eq("source", source)
 
         res = q.execute()
@@ -10,6 +10,9 @@ from typing import Any, Dict, List, Optional
 
 from app.core.supabase_client import supabase
 
+REFERRAL_CHAIN_RPC = (os.getenv("REFERRAL_CHAIN_RPC") or "bms_referral_chain").strip() or "bms_referral_chain"
+_referral_chain_rpc_missing = False
+
 
 def _sb():
     return supabase() if callable(supabase) else supabase
@@ -550,20 +553,20 @@ def _existing_reward_for_referral_account_level(
     return _first(resp)
 
 
-def _create_reward_row(
+def _reward_payload(
     *,
     referral_id: str,
     beneficiary_account_id: str,
     level: int,
     payment_reference: str,
     plan_code: str | None,
+    now_iso: str,
 ) -> Dict[str, Any]:
-    now_iso = _now_iso()
     amount = _reward_amount_for_level(level)
     if amount <= 0:
         raise ValueError(f"Invalid reward amount for level {level}")
 
-    payload = {
+    return {
         "referral_id": referral_id,
         "account_id": beneficiary_account_id,
         "reward_type": _reward_type_for_level(level),
@@ -577,6 +580,24 @@ def _create_reward_row(
         "updated_at": now_iso,
     }
 
+
+def _create_reward_row(
+    *,
+    referral_id: str,
+    beneficiary_account_id: str,
+    level: int,
+    payment_reference: str,
+    plan_code: str | None,
+) -> Dict[str, Any]:
+    payload = _reward_payload(
+        referral_id=referral_id,
+        beneficiary_account_id=beneficiary_account_id,
+        level=level,
+        payment_reference=payment_reference,
+        plan_code=plan_code,
+        now_iso=_now_iso(),
+    )
+
     try:
         resp = _sb().table("referral_rewards").insert(payload).execute()
         row = _first(resp)
@@ -604,7 +625,103 @@ def _create_reward_row(
     raise RuntimeError("Failed to create referral reward row.")
 
 
-def _find_level_chain_for_paid_user(paid_account_id: str) -> List[Dict[str, Any]]:
+def _create_reward_rows(
+    *,
+    referral_id: str,
+    beneficiaries: List[Dict[str, Any]],
+    payment_reference: str,
+    plan_code: str | None,
+    now_iso: str,
+) -> Dict[tuple, Dict[str, Any]]:
+    """
+    Insert every level's reward row in one request. Rows that didn't come back (e.g. the
+    batch hit a unique conflict) go through _create_reward_row, which resolves conflicts
+    to the existing row. Returns rows keyed by (account_id, reward_type).
+    """
+    payloads = [
+        _reward_payload(
+            referral_id=referral_id,
+            beneficiary_account_id=item["beneficiary_account_id"],
+            level=item["level"],
+            payment_reference=payment_reference,
+            plan_code=plan_code,
+            now_iso=now_iso,
+        )
+        for item in beneficiaries
+    ]
+    if not payloads:
+        return {}
+
+    created: Dict[tuple, Dict[str, Any]] = {}
+    try:
+        resp = _sb().table("referral_rewards").insert(payloads).execute()
+        for row in _response_data(resp):
+            created[(str(row.get("account_id") or ""), str(row.get("reward_type") or ""))] = row
+    except Exception:
+        created = {}
+
+    for item in beneficiaries:
+        key = (item["beneficiary_account_id"], _reward_type_for_level(item["level"]))
+        if key not in created:
+            created[key] = _create_reward_row(
+                referral_id=referral_id,
+                beneficiary_account_id=item["beneficiary_account_id"],
+                level=item["level"],
+                payment_reference=payment_reference,
+                plan_code=plan_code,
+            )
+    return created
+
+
+def _load_referral_chain(paid_account_id: str) -> Dict[int, Dict[str, Any]]:
+    """
+    Referral rows up the chain from the paying account: {1: direct referral, 2: parent referral}.
+
+    One recursive-CTE RPC (supabase/referral_rpcs.sql) instead of a lookup per level;
+    falls back to the per-level reads when the function isn't deployed.
+    """
+    global _referral_chain_rpc_missing
+
+    paid_account_id = str(paid_account_id or "").strip()
+    if not paid_account_id:
+        return {}
+
+    max_levels = _max_levels()
+
+    if not _referral_chain_rpc_missing:
+        try:
+            resp = _sb().rpc(
+                REFERRAL_CHAIN_RPC,
+                {"p_referred_account_id": paid_account_id, "p_depth": max_levels},
+            ).execute()
+            by_level: Dict[int, Dict[str, Any]] = {}
+            for item in _response_data(resp):
+                level = _safe_int(item.get("level"), 0)
+                row = item.get("referral")
+                if 1 <= level <= max_levels and isinstance(row, dict):
+                    by_level.setdefault(level, row)
+            return by_level
+        except Exception as e:
+            if str(getattr(e, "code", "") or "") in {"PGRST202", "42883"}:
+                _referral_chain_rpc_missing = True
+
+    direct_referral = get_referral_row_by_referred_account_id(paid_account_id)
+    if not direct_referral:
+        return {}
+
+    by_level = {1: direct_referral}
+    level1_account_id = str(direct_referral.get("referrer_account_id") or "").strip()
+    if max_levels >= 2 and level1_account_id:
+        parent_referral = get_referral_row_by_referred_account_id(level1_account_id)
+        if parent_referral:
+            by_level[2] = parent_referral
+    return by_level
+
+
+def _find_level_chain_for_paid_user(
+    paid_account_id: str,
+    referrals_by_level: Optional[Dict[int, Dict[str, Any]]] = None,
+) -> List[Dict[str, Any]]:
     paid_account_id = str(paid_account_id or "").strip()
     if not paid_account_id:
         return []
@@ -612,7 +729,10 @@ def _find_level_chain_for_paid_user(paid_account_id: str) -> List[Dict[str, Any]
     chain: List[Dict[str, Any]] = []
     max_levels = _max_levels()
 
-    direct_referral = get_referral_row_by_referred_account_id(paid_account_id)
+    if referrals_by_level is None:
+        referrals_by_level = _load_referral_chain(paid_account_id)
+
+    direct_referral = referrals_by_level.get(1)
     if not direct_referral:
         return chain
 
@@ -629,7 +749,7 @@ def _find_level_chain_for_paid_user(paid_account_id: str) -> List[Dict[str, Any]
     if max_levels < 2 or not level1_account_id:
         return chain
 
-    parent_referral = get_referral_row_by_referred_account_id(level1_account_id)
+    parent_referral = referrals_by_level.get(2)
     if not parent_referral:
         return chain
 
@@ -673,7 +793,9 @@ def qualify_referral_after_successful_payment(
     if not payment_reference:
         raise ValueError("payment_reference is required")
 
-    direct_referral = get_referral_row_by_referred_account_id(paying_account_id)
+    # Direct + parent referral rows in one round trip; reused for the beneficiary chain below.
+    referrals_by_level = _load_referral_chain(paying_account_id)
+    direct_referral = referrals_by_level.get(1)
     if not direct_referral:
         return {
             "ok": True,
@@ -714,7 +836,7 @@ def qualify_referral_after_successful_payment(
             "referral_id": direct_referral_id,
         }
 
-    beneficiaries = _find_level_chain_for_paid_user(paying_account_id)
+    beneficiaries = _find_level_chain_for_paid_user(paying_account_id, referrals_by_level)
     if not beneficiaries:
         return {
             "ok": True,
@@ -733,7 +855,13 @@ def qualify_referral_after_successful_payment(
         }
     ).eq("id", direct_referral_id).execute()
 
-    created_rewards: List[Dict[str, Any]] = []
+    # One read for every existing reward on this referral and one insert for the missing
+    # levels, instead of a lookup + insert per level.
+    existing_by_key: Dict[tuple, Dict[str, Any]] = {}
+    for row in get_reward_rows_for_referral(direct_referral_id):
+        existing_by_key.setdefault((str(row.get("account_id") or ""), str(row.get("reward_type") or "")), row)
+
+    eligible: List[Dict[str, Any]] = []
     for item in beneficiaries:
         level = _safe_int(item.get("level"), 0)
         beneficiary_account_id = str(item.get("beneficiary_account_id") or "").strip()
@@ -741,23 +869,24 @@ def qualify_referral_after_successful_payment(
         if not beneficiary_account_id or level not in {1, 2}:
             continue
 
-        existing = _existing_reward_for_referral_account_level(
-            referral_id=direct_referral_id,
-            account_id=beneficiary_account_id,
-            level=level,
-        )
-        if existing:
-            created_rewards.append(existing)
-            continue
+        eligible.append({"level": level, "beneficiary_account_id": beneficiary_account_id})
+
+    new_rows = _create_reward_rows(
+        referral_id=direct_referral_id,
+        beneficiaries=[
+            item
+            for item in eligible
+            if (item["beneficiary_account_id"], _reward_type_for_level(item["level"])) not in existing_by_key
+        ],
+        payment_reference=payment_reference,
+        plan_code=plan_code,
+        now_iso=now_iso,
+    )
 
-        created = _create_reward_row(
-            referral_id=direct_referral_id,
-            beneficiary_account_id=beneficiary_account_id,
-            level=level,
-            payment_reference=payment_reference,
-            plan_code=plan_code,
-        )
-        created_rewards.append(created)
+    created_rewards: List[Dict[str, Any]] = []
+    for item in eligible:
+        key = (item["beneficiary_account_id"], _reward_type_for_level(item["level"]))
+        created_rewards.append(existing_by_key.get(key) or new_rows[key])
 
     target_status = _completed_referral_status()
     if target_status in {"qualified", "rewarded"}:
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import time
+from functools import lru_cache
 from datetime import datetime, timezone
 from typing import Any, Dict, Optional, Tuple
 
@@ -7,27 +9,39 @@ from app.core.supabase_client import supabase
 from app.services.plans_service import get_plan
 
 
-def _sb():
-    return supabase() if callable(supabase) else supabase
-
-
-def _now_utc() -> datetime:
-    return datetime.now(timezone.utc)
-
-
 def _clip(v: Any, n: int = 300) -> str:
     s = str(v or "")
     return s if len(s) <= n else s[:n] + "...<truncated>"
 
 
-def _safe_dt(v: Any) -> Optional[datetime]:
+@lru_cache(maxsize=4096)
+def _epoch_from_iso(s: str) -> Optional[float]:
+    # A user's expiry string is the same on every check until it rolls over, so the
+    # parse result is memoized; floats are immutable and safe to share across threads.
     try:
-        if not v:
-            return None
-        dt = datetime.fromisoformat(str(v).replace("Z", "+00:00"))
+        try:
+            # Python 3.11+ parses the trailing "Z" natively; skip the replace() copy.
+            dt = datetime.fromisoformat(s)
+        except ValueError:
+            dt = datetime.fromisoformat(s.replace("Z", "+00:00"))
         if dt.tzinfo is None:
             dt = dt.replace(tzinfo=timezone.utc)
-        return dt.astimezone(timezone.utc)
+        return dt.timestamp()
+    except Exception:
+        return None
+
+
+def _safe_epoch(v: Any) -> Optional[float]:
+    """
+    Parse a Supabase timestamp into epoch seconds.
+
+    The gate only ever compares timestamps against "now", so plain floats are
+    enough and avoid building aware datetimes on every access check.
+    """
+    if not v:
+        return None
+    try:
+        return _epoch_from_iso(v if type(v) is str else str(v))
     except Exception:
         return None
 
@@ -81,7 +95,7 @@ def _get_subscription_row(account_id: str) -> Tuple[Optional[Dict[str, Any]], Op
 
     try:
         res = (
-            _sb()
+            supabase
             .table("user_subscriptions")
             .select("*")
             .eq("account_id", account_id)
@@ -102,13 +116,17 @@ def _get_subscription_row(account_id: str) -> Tuple[Optional[Dict[str, Any]], Op
         }
 
 
-def _expiry_dt(sub: Optional[Dict[str, Any]]) -> Optional[datetime]:
+_GRACE_STATES = frozenset({"grace", "past_due"})
+_CANCELLED_STATES = frozenset({"cancelled", "canceled"})
+
+
+def _expiry_epoch(sub: Optional[Dict[str, Any]]) -> Optional[float]:
     if not sub:
         return None
-    return _safe_dt(sub.get("expires_at") or sub.get("current_period_end"))
+    return _safe_epoch(sub.get("expires_at") or sub.get("current_period_end"))
 
 
-def _subscription_is_active_now(sub: Optional[Dict[str, Any]]) -> bool:
+def _subscription_is_active_now(sub: Optional[Dict[str, Any]], now: Optional[float] = None) -> bool:
     if not sub:
         return False
 
@@ -116,18 +134,19 @@ def _subscription_is_active_now(sub: Optional[Dict[str, Any]]) -> bool:
     raw_is_active = sub.get("is_active")
     is_active = True if raw_is_active is None else bool(raw_is_active)
 
-    expires_at = _expiry_dt(sub)
-    grace_until = _safe_dt(sub.get("grace_until"))
-    now = _now_utc()
+    expires_at = _expiry_epoch(sub)
+    grace_until = _safe_epoch(sub.get("grace_until"))
+    if now is None:
+        now = time.time()
 
     if status == "trial":
-        trial_until = _safe_dt(sub.get("trial_until"))
+        trial_until = _safe_epoch(sub.get("trial_until"))
         return bool(trial_until and now < trial_until)
 
-    if status in {"grace", "past_due"}:
+    if status in _GRACE_STATES:
         return bool(grace_until and now < grace_until)
 
-    if status in {"cancelled", "canceled"}:
+    if status in _CANCELLED_STATES:
         return bool(expires_at and now < expires_at)
 
     if status and status != "active":
@@ -146,7 +165,55 @@ def _subscription_is_active_now(sub: Optional[Dict[str, Any]]) -> bool:
     return expires_at is None
 
 
-def _build_access(sub: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+def _rule_period(now: float, expires_at: Optional[float], trial_until: Optional[float], grace_until: Optional[float]) -> Tuple[bool, str]:
+    if expires_at is None or now < expires_at:
+        return True, "active"
+    return False, "expired"
+
+
+def _rule_trial(now: float, expires_at: Optional[float], trial_until: Optional[float], grace_until: Optional[float]) -> Tuple[bool, str]:
+    if trial_until and now < trial_until:
+        return True, "trial"
+    return False, "trial_expired"
+
+
+def _rule_grace(now: float, expires_at: Optional[float], trial_until: Optional[float], grace_until: Optional[float]) -> Tuple[bool, str]:
+    if grace_until and now < grace_until:
+        return True, "grace"
+    return False, "grace_expired"
+
+
+def _rule_cancelled(now: float, expires_at: Optional[float], trial_until: Optional[float], grace_until: Optional[float]) -> Tuple[bool, str]:
+    if expires_at and now < expires_at:
+        return True, "active_until_period_end"
+    return False, "cancelled"
+
+
+def _rule_expired(now: float, expires_at: Optional[float], trial_until: Optional[float], grace_until: Optional[float]) -> Tuple[bool, str]:
+    return False, "expired"
+
+
+def _rule_inactive(now: float, expires_at: Optional[float], trial_until: Optional[float], grace_until: Optional[float]) -> Tuple[bool, str]:
+    return False, "inactive"
+
+
+# Statuses that fall back to the plain billing period when the row is flagged active.
+_PERIOD_STATES = frozenset({"active", ""})
+
+# Status -> access rule. Anything not listed (or "active" on a row with is_active=false)
+# is denied as inactive_subscription.
+_ACCESS_RULES = {
+    "trial": _rule_trial,
+    "grace": _rule_grace,
+    "past_due": _rule_grace,
+    "expired": _rule_expired,
+    "inactive": _rule_inactive,
+    "cancelled": _rule_cancelled,
+    "canceled": _rule_cancelled,
+}
+
+
+def _build_access(sub: Optional[Dict[str, Any]], now: Optional[float] = None) -> Dict[str, Any]:
     if not sub:
         return {
             "allowed": False,
@@ -155,52 +222,25 @@ def _build_access(sub: Optional[Dict[str, Any]]) -> Dict[str, Any]:
             "upgrade_required": True,
         }
 
-    now = _now_utc()
-    expires_at = _expiry_dt(sub)
-    trial_until = _safe_dt(sub.get("trial_until"))
-    grace_until = _safe_dt(sub.get("grace_until"))
+    if now is None:
+        now = time.time()
+    expires_at = _expiry_epoch(sub)
+    trial_until = _safe_epoch(sub.get("trial_until"))
+    grace_until = _safe_epoch(sub.get("grace_until"))
 
     status = (sub.get("status") or "").strip().lower()
     raw_is_active = sub.get("is_active")
     is_active = True if raw_is_active is None else bool(raw_is_active)
 
-    allowed = False
-    reason = "inactive_subscription"
-
-    if is_active and (status == "active" or not status):
-        if expires_at is None or now < expires_at:
-            allowed = True
-            reason = "active"
-        else:
-            allowed = False
-            reason = "expired"
-    elif status == "trial":
-        if trial_until and now < trial_until:
-            allowed = True
-            reason = "trial"
-        else:
-            allowed = False
-            reason = "trial_expired"
-    elif status in {"grace", "past_due"}:
-        if grace_until and now < grace_until:
-            allowed = True
-            reason = "grace"
-        else:
-            allowed = False
-            reason = "grace_expired"
-    elif status == "expired":
-        allowed = False
-        reason = "expired"
-    elif status == "inactive":
-        allowed = False
-        reason = "inactive"
-    elif status in {"cancelled", "canceled"}:
-        if expires_at and now < expires_at:
-            allowed = True
-            reason = "active_until_period_end"
-        else:
-            allowed = False
-            reason = "cancelled"
+    if is_active and status in _PERIOD_STATES:
+        rule = _rule_period
+    else:
+        rule = _ACCESS_RULES.get(status)
+
+    if rule is None:
+        allowed, reason = False, "inactive_subscription"
+    else:
+        allowed, reason = rule(now, expires_at, trial_until, grace_until)
 
     return {
         "allowed": allowed,
@@ -252,8 +292,10 @@ def get_subscription_snapshot(account_id: str) -> Dict[str, Any]:
             },
         }
 
-    access = _build_access(sub)
-    active_now = _subscription_is_active_now(sub)
+    # One clock read so access and active_now are judged against the same instant.
+    now = time.time()
+    access = _build_access(sub, now)
+    active_now = _subscription_is_active_now(sub, now)
 
     plan_code = (sub.get("plan_code") or "").strip().lower()
     plan = get_plan(plan_code) if plan_code else None
@@ -1,12 +1,17 @@
 # app/services/subscriptions_service.py
 from __future__ import annotations
 
+import logging
 import os
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-from typing import Any, Dict, Optional
+from typing import Any, Dict, Optional, Tuple
 
-from app.core.supabase_client import supabase
+from flask import g, has_request_context
 
+from app.core.supabase_client import execute_with_retry, supabase
+
+logger = logging.getLogger(__name__)
 
 # ------------------------------------------------------------
 # Config
@@ -16,12 +21,90 @@ DEFAULT_DAYS = int((os.getenv("DEFAULT_SUBSCRIPTION_DAYS") or "30").strip() or "
 
 RPC_READ = (os.getenv("SUBSCRIPTION_RPC_READ") or "bms_read_subscription").strip() or "bms_read_subscription"
 RPC_ACTIVATE = (os.getenv("SUBSCRIPTION_RPC_ACTIVATE") or "bms_activate_subscription").strip() or "bms_activate_subscription"
+RPC_STATUS = (os.getenv("SUBSCRIPTION_RPC_STATUS") or "bms_subscription_status").strip() or "bms_subscription_status"
+RPC_APPLY_DUE = (os.getenv("SUBSCRIPTION_RPC_APPLY_DUE") or "bms_apply_due_plan_changes").strip() or "bms_apply_due_plan_changes"
+RPC_EXPIRE = (os.getenv("SUBSCRIPTION_RPC_EXPIRE") or "bms_expire_overdue_subscriptions").strip() or "bms_expire_overdue_subscriptions"
+RPC_RECORD_ACTIVATE = (os.getenv("SUBSCRIPTION_RPC_RECORD_ACTIVATE") or "bms_record_payment_and_activate").strip() or "bms_record_payment_and_activate"
+EXPIRE_BATCH_LIMIT = int((os.getenv("SUBSCRIPTION_EXPIRE_BATCH_LIMIT") or "1000").strip() or "1000")
+
+# Small shared pool used to overlap independent Supabase calls.
+# The app is sync Flask (no event loop), so threads are the cheap way to run two round trips at once.
+_IO_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="subscriptions-io")
+
+# Opt-in: acknowledge the Paystack webhook as soon as the event is claimed and run the
+# activation RPC on _IO_POOL, keeping that round trip off the webhook response path.
+# Off by default: a failed background activation is only logged (and its event claim
+# released for replay), since Paystack has already been told the delivery succeeded.
+ASYNC_WEBHOOK_ACTIVATION = (os.getenv("SUBSCRIPTION_ASYNC_ACTIVATION", "0").strip() == "1")
+
+# Optional schema pieces (payment_events table, its event_id unique index, the
+# user_subscriptions.next_plan_code column, the due-plan-change, record-and-activate and status RPCs). Once PostgREST reports one missing we
+# stop paying a guaranteed-to-fail round trip for it; existence never changes at runtime.
+# Call reset_schema_probe() after running a migration on a live worker.
+_MISSING_SCHEMA_CODES: Dict[str, frozenset] = {
+    "payment_events": frozenset({"42P01", "PGRST205"}),
+    "payment_events_claim": frozenset({"42P01", "PGRST205", "42P10"}),
+    "next_plan_code": frozenset({"42703", "PGRST204"}),
+    "apply_due_rpc": frozenset({"PGRST202", "42883"}),
+    "expire_rpc": frozenset({"PGRST202", "42883"}),
+    "record_activate_rpc": frozenset({"PGRST202", "42883", "42P10", "42P01", "PGRST205", "42804"}),
+    "status_rpc": frozenset({"PGRST202", "42883"}),
+}
+_schema_missing: Dict[str, bool] = {}
 
 
 def _now_utc() -> datetime:
     return datetime.now(timezone.utc)
 
 
+def _iso(dt: datetime) -> str:
+    """
+    UTC ISO-8601 with a Z suffix.
+    Datetimes from _now_utc() are formatted directly; anything else is normalized first.
+    """
+    if dt.tzinfo is timezone.utc:
+        return f"{dt:%Y-%m-%dT%H:%M:%S}.{dt.microsecond:06d}Z"
+    return dt.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def _parse_iso(value: Any) -> Optional[datetime]:
+    """
+    Parse a Supabase timestamp. On Python 3.11+ fromisoformat() accepts the trailing
+    "Z" directly, so the replace() copy only happens on older interpreters.
+    """
+    if not value:
+        return None
+    s = str(value)
+    try:
+        return datetime.fromisoformat(s)
+    except ValueError:
+        try:
+            return datetime.fromisoformat(s.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+
+
+_UTC_SUFFIXES = ("+00:00", "Z", "+00")
+
+
+def _utc_seconds_key(value: Any) -> Optional[str]:
+    """
+    "YYYY-MM-DDTHH:MM:SS" prefix of a UTC ISO timestamp string, or None when the value
+    isn't in that shape. Same-offset ISO strings order lexicographically like the
+    instants they encode, so expiry checks can compare these without parsing.
+    """
+    if type(value) is not str or len(value) < 20 or value[10] != "T" or not value.endswith(_UTC_SUFFIXES):
+        return None
+    return value[:19]
+
+
+def _clean(value: Any) -> str:
+    # Entry-point normalizer: str inputs are stripped once; None/"" skip the "" alloc + strip.
+    if not value:
+        return ""
+    return value.strip() if type(value) is str else str(value).strip()
+
+
 def _as_int(v: Any, default: int) -> int:
     try:
         if v is None:
@@ -33,12 +116,59 @@ def _as_int(v: Any, default: int) -> int:
         return default
 
 
+def _schema_available(feature: str) -> bool:
+    return not _schema_missing.get(feature, False)
+
+
+def _note_schema_error(feature: str, exc: Exception) -> None:
+    code = str(getattr(exc, "code", "") or "")
+    if code in _MISSING_SCHEMA_CODES.get(feature, frozenset()):
+        _schema_missing[feature] = True
+
+
+def reset_schema_probe() -> None:
+    _schema_missing.clear()
+
+
+def _request_status_cache() -> Optional[Dict[str, Dict[str, Any]]]:
+    """
+    Per-request memo for get_subscription_status, stored on flask.g so it dies with the request.
+    Returns None outside a request (cron scripts, workers), where nothing is cached.
+    """
+    if not has_request_context():
+        return None
+    cache = getattr(g, "_subscription_status_cache", None)
+    if cache is None:
+        cache = {}
+        g._subscription_status_cache = cache
+    return cache
+
+
+def _forget_request_status(account_id: str) -> None:
+    cache = _request_status_cache()
+    if cache is not None:
+        cache.pop(account_id, None)
+
+
 def _ok(**k: Any) -> Dict[str, Any]:
     out = {"ok": True}
     out.update(k)
     return out
 
 
+def _status(account_id: str, plan_code: Any, status: Any, active: bool, current_period_end: Any) -> Dict[str, Any]:
+    # Same shape as _ok(account_id=..., ...) built as one literal: status reads are the
+    # hottest path here, so skip the kwargs dict + update() copy.
+    return {
+        "ok": True,
+        "account_id": account_id,
+        "plan_code": plan_code or DEFAULT_PLAN_CODE,
+        "status": status or "inactive",
+        "active": active,
+        "current_period_end": current_period_end,
+    }
+
+
 def _fail(code: str, message: str, **k: Any) -> Dict[str, Any]:
     out = {"ok": False, "error": code, "message": message}
     out.update(k)
@@ -54,7 +184,7 @@ def _rpc_read(account_id: str) -> Optional[Dict[str, Any]]:
     This calls the stable RPC to avoid PostgREST schema cache issues.
     """
     try:
-        res = supabase.rpc(RPC_READ, {"p_account_id": account_id}).execute()
+        res = execute_with_retry(lambda: supabase.rpc(RPC_READ, {"p_account_id": account_id}).execute())
         data = getattr(res, "data", None)
         if not data:
             return None
@@ -70,6 +200,29 @@ def _rpc_read(account_id: str) -> Optional[Dict[str, Any]]:
         return None
 
 
+def _rpc_status(account_id: str) -> Tuple[bool, Optional[Dict[str, Any]]]:
+    """
+    Calls bms_subscription_status(account_id) (supabase/subscription_rpcs.sql), which
+    derives `active` in Postgres and returns only the fields the status response needs.
+
+    Returns (True, row) on success (row is None when the account has no subscription),
+    or (False, None) when the RPC is unavailable so the caller can fall back to _rpc_read.
+    """
+    if not _schema_available("status_rpc"):
+        return False, None
+    try:
+        res = execute_with_retry(lambda: supabase.rpc(RPC_STATUS, {"p_account_id": account_id}).execute())
+        data = getattr(res, "data", None)
+        if isinstance(data, list):
+            data = data[0] if data else None
+        if data is None or isinstance(data, dict):
+            return True, data or None
+        return False, None
+    except Exception as e:
+        _note_schema_error("status_rpc", e)
+        return False, None
+
+
 def _rpc_activate(account_id: str, plan_code: str, days: int) -> Dict[str, Any]:
     """
     Calls bms_activate_subscription(account_id, plan_code, days) and returns response dict.
@@ -85,6 +238,134 @@ def _rpc_activate(account_id: str, plan_code: str, days: int) -> Dict[str, Any]:
         return _fail("rpc_failed", f"RPC activation failed: {e!s}")
 
 
+def _rpc_record_and_activate(payload: Dict[str, Any], account_id: str, plan_code: str) -> Optional[Dict[str, Any]]:
+    """
+    Claims the webhook event and activates the subscription in one transaction via
+    bms_record_payment_and_activate (supabase/subscription_rpcs.sql).
+
+    Returns None when the RPC is unavailable or failed (nothing was committed), so the
+    caller falls back to claim-then-activate. Otherwise {"duplicate": True} or
+    {"duplicate": False, "activation": <normalized activation dict>}.
+    """
+    event_id = payload.get("event_id")
+    if not event_id or not _schema_available("record_activate_rpc"):
+        return None
+    try:
+        res = supabase.rpc(
+            RPC_RECORD_ACTIVATE,
+            {
+                "p_event_id": str(event_id),
+                "p_provider": payload.get("provider"),
+                "p_reference": payload.get("reference"),
+                "p_raw": payload.get("raw"),
+                "p_account_id": account_id,
+                "p_plan_code": plan_code,
+                "p_days": DEFAULT_DAYS,
+            },
+        ).execute()
+    except Exception as e:
+        _note_schema_error("record_activate_rpc", e)
+        return None
+    finally:
+        _forget_request_status(account_id)
+
+    data = getattr(res, "data", None)
+    if isinstance(data, list):
+        data = data[0] if data else None
+    if not isinstance(data, dict):
+        return None
+    if data.get("duplicate"):
+        return {"duplicate": True}
+    out = _ok(method="rpc", activated=True, result=data.get("activation"))
+    return {"duplicate": False, "activation": _activation_result(account_id, plan_code, out)}
+
+
+def _claim_payment_event(payload: Dict[str, Any], event_id: Any, reference: Any) -> Optional[bool]:
+    """
+    Single-statement idempotency: INSERT ... ON CONFLICT (event_id) DO NOTHING.
+
+    Returns True when this call recorded the event, False when it was already
+    recorded, and None when no claim could be made (no event_id, or the optional
+    table / its unique index is missing) so the caller falls back to check-then-record.
+    """
+    if not event_id or not _schema_available("payment_events_claim"):
+        return None
+    try:
+        res = execute_with_retry(
+            lambda: supabase.table("payment_events")
+            .upsert(
+                {"event_id": event_id, "provider": payload.get("provider"), "reference": reference, "raw": payload.get("raw")},
+                on_conflict="event_id",
+                ignore_duplicates=True,
+                count="exact",
+                returning="minimal",
+            )
+            .execute()
+        )
+        # return=minimal keeps PostgREST from echoing the stored row (including the raw
+        # webhook body) back; the inserted-row count in Content-Range says whether we won.
+        # A missing count (proxy stripped the header) can't be told apart from a win; treat
+        # it as claimed rather than let the check-then-record fallback see our own row.
+        count = getattr(res, "count", None)
+        return True if count is None else count > 0
+    except Exception as e:
+        _note_schema_error("payment_events_claim", e)
+        _note_schema_error("payment_events", e)
+        return None
+
+
+def _record_payment_event(payload: Dict[str, Any], event_id: Any, reference: Any) -> None:
+    """
+    Record the webhook event for idempotency (best-effort, optional table).
+    """
+    if not event_id or not _schema_available("payment_events"):
+        return
+    try:
+        supabase.table("payment_events").insert(
+            {"event_id": event_id, "provider": payload.get("provider"), "reference": reference, "raw": payload.get("raw")},
+            returning="minimal",
+        ).execute()
+    except Exception as e:
+        _note_schema_error("payment_events", e)
+
+
+def _release_payment_event(event_id: Any) -> None:
+    """
+    Undo a claim whose activation failed so a replay of the same event is not skipped
+    as a duplicate (best-effort).
+    """
+    if not event_id:
+        return
+    try:
+        supabase.table("payment_events").delete(returning="minimal").eq("event_id", event_id).execute()
+    except Exception as e:
+        _note_schema_error("payment_events", e)
+
+
+def _activate_in_background(payload: Dict[str, Any], account_id: str, plan_code: str, claimed: Optional[bool]) -> None:
+    event_id = payload.get("event_id")
+    reference = payload.get("reference")
+    try:
+        activation = activate_subscription_now(account_id=account_id, plan_code=plan_code, days=DEFAULT_DAYS)
+    except Exception as e:
+        activation = _fail("activation_exception", f"{type(e).__name__}: {e}")
+
+    if activation.get("ok"):
+        if claimed is None:
+            _record_payment_event(payload, event_id, reference)
+        return
+
+    logger.error(
+        "Background subscription activation failed account_id=%s plan_code=%s reference=%s: %s",
+        account_id,
+        plan_code,
+        reference,
+        activation.get("message") or activation.get("error"),
+    )
+    if claimed:
+        _release_payment_event(event_id)
+
+
 # ------------------------------------------------------------
 # Public API (imported by routes)
 # ------------------------------------------------------------
@@ -93,8 +374,8 @@ def activate_subscription_now(*, account_id: str, plan_code: str = "monthly", da
     Admin/manual activation endpoint uses this.
     MUST exist because app.routes.subscriptions imports it.
     """
-    account_id = (account_id or "").strip()
-    plan_code = (plan_code or "").strip() or "monthly"
+    account_id = _clean(account_id)
+    plan_code = _clean(plan_code) or "monthly"
     d = _as_int(days, DEFAULT_DAYS)
 
     if not account_id:
@@ -103,9 +384,13 @@ def activate_subscription_now(*, account_id: str, plan_code: str = "monthly", da
         return _fail("bad_request", "days must be > 0")
 
     out = _rpc_activate(account_id, plan_code, d)
+    _forget_request_status(account_id)
     if not out.get("ok"):
         return out
+    return _activation_result(account_id, plan_code, out)
 
+
+def _activation_result(account_id: str, plan_code: str, out: Dict[str, Any]) -> Dict[str, Any]:
     # Normalize a friendly subset for callers
     # (your route prints: account_id / plan_code / status / current_period_end)
     row = None
@@ -136,45 +421,73 @@ def activate_subscription_now(*, account_id: str, plan_code: str = "monthly", da
     )
 
 
+def _status_from_row(
+    account_id: str,
+    row: Optional[Dict[str, Any]],
+    now: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """
+    Builds the status response from a raw subscription row (RPC or table read).
+    """
+    # If no row, treat as free/inactive
+    if not row:
+        return _status(account_id, DEFAULT_PLAN_CODE, "inactive", False, None)
+
+    end = row.get("current_period_end")
+    active = (row.get("status") or "").lower() == "active"
+    # If end exists and is in the past, consider inactive (even if status says active).
+    # Only an active row can be flipped, so inactive rows skip the check entirely.
+    if active and end:
+        now = now or _now_utc()
+        end_key = _utc_seconds_key(end)
+        now_key = now.astimezone(timezone.utc).isoformat(timespec="seconds")[:19] if end_key else None
+        if end_key and end_key != now_key:
+            active = end_key > now_key
+        else:
+            # Non-UTC / non-ISO value, or same second: fall back to a real comparison.
+            try:
+                dt = _parse_iso(end)
+                if dt is not None and dt < now:
+                    active = False
+            except Exception:
+                pass
+
+    return _status(account_id, row.get("plan_code"), row.get("status"), active, end)
+
+
 def get_subscription_status(*, account_id: str) -> Dict[str, Any]:
     """
     MUST exist because ask_service imports it and routes call it.
     """
-    account_id = (account_id or "").strip()
+    account_id = _clean(account_id)
     if not account_id:
         return _fail("bad_request", "account_id is required")
 
-    row = _rpc_read(account_id)
+    # Gate middleware and the route handler often both ask within one request.
+    cache = _request_status_cache()
+    if cache is not None and account_id in cache:
+        return dict(cache[account_id])
 
-    # If no row, treat as free/inactive
-    if not row:
-        return _ok(
-            account_id=account_id,
-            plan_code=DEFAULT_PLAN_CODE,
-            status="inactive",
-            active=False,
-            current_period_end=None,
-        )
+    out = _read_subscription_status(account_id)
+    if cache is not None:
+        cache[account_id] = dict(out)
+    return out
 
-    end = row.get("current_period_end")
-    active = (row.get("status") or "").lower() == "active"
-    # If end exists and is in the past, consider inactive (even if status says active)
-    try:
-        if end:
-            # Supabase returns ISO string; parse lightly
-            dt = datetime.fromisoformat(str(end).replace("Z", "+00:00"))
-            if dt < _now_utc():
-                active = False
-    except Exception:
-        pass
 
-    return _ok(
-        account_id=account_id,
-        plan_code=row.get("plan_code") or DEFAULT_PLAN_CODE,
-        status=row.get("status") or "inactive",
-        active=active,
-        current_period_end=end,
-    )
+def _read_subscription_status(account_id: str) -> Dict[str, Any]:
+    # Fast path: one RPC that returns the derived status, with a stable plan-cached query shape.
+    rpc_ok, status_row = _rpc_status(account_id)
+    if rpc_ok and status_row:
+        return _status(
+            account_id,
+            status_row.get("plan_code"),
+            status_row.get("status"),
+            bool(status_row.get("active")),
+            status_row.get("current_period_end"),
+        )
+
+    row = status_row if rpc_ok else _rpc_read(account_id)
+    return _status_from_row(account_id, row)
 
 
 def handle_payment_success(payload: Dict[str, Any]) -> Dict[str, Any]:
@@ -183,8 +496,8 @@ def handle_payment_success(payload: Dict[str, Any]) -> Dict[str, Any]:
     Expects payload keys:
       event_id, provider, reference, account_id, plan_code, amount_kobo, currency, upgrade_mode, raw
     """
-    account_id = (payload.get("account_id") or "").strip()
-    plan_code = (payload.get("plan_code") or "").strip()
+    account_id = _clean(payload.get("account_id"))
+    plan_code = _clean(payload.get("plan_code"))
     upgrade_mode = (payload.get("upgrade_mode") or "now").strip().lower()
     reference = payload.get("reference")
     event_id = payload.get("event_id")
@@ -195,13 +508,31 @@ def handle_payment_success(payload: Dict[str, Any]) -> Dict[str, Any]:
     if upgrade_mode not in ("now", "at_expiry"):
         upgrade_mode = "now"
 
+    # Immediate activation: claim + activate in one RPC / one transaction.
+    if not ASYNC_WEBHOOK_ACTIVATION and (upgrade_mode == "now" or not _schema_available("next_plan_code")):
+        combined = _rpc_record_and_activate(payload, account_id, plan_code)
+        if combined is not None:
+            if combined["duplicate"]:
+                return _ok(ok=True, processed=True, duplicate=True, account_id=account_id, plan_code=plan_code, reference=reference, upgrade_mode=upgrade_mode)
+            return _ok(
+                ok=True,
+                processed=True,
+                account_id=account_id,
+                plan_code=plan_code,
+                upgrade_mode="now",
+                reference=reference,
+                activation=combined["activation"],
+            )
+
     # Best-effort idempotency (optional table). If table doesn't exist, we still proceed.
-    # If you already have a table, this will prevent double-processing.
-    processed_before = False
+    # With the unique index on payment_events(event_id) the claim is one atomic insert,
+    # so two concurrent deliveries of the same event cannot both activate.
+    claimed = _claim_payment_event(payload, event_id, reference)
+    processed_before = claimed is False
     try:
-        if event_id:
-            chk = (
-                supabase.table("payment_events")
+        if event_id and claimed is None and _schema_available("payment_events"):
+            chk = execute_with_retry(
+                lambda: supabase.table("payment_events")
                 .select("event_id")
                 .eq("event_id", event_id)
                 .limit(1)
@@ -210,36 +541,38 @@ def handle_payment_success(payload: Dict[str, Any]) -> Dict[str, Any]:
             rows = (chk.data or []) if hasattr(chk, "data") else []
             if rows:
                 processed_before = True
-    except Exception:
+    except Exception as e:
+        _note_schema_error("payment_events", e)
         processed_before = False
 
     if processed_before:
         return _ok(ok=True, processed=True, duplicate=True, account_id=account_id, plan_code=plan_code, reference=reference, upgrade_mode=upgrade_mode)
 
     # If at_expiry requested, try to store next plan if schema supports it; otherwise activate now.
+    if upgrade_mode == "at_expiry" and not _schema_available("next_plan_code"):
+        upgrade_mode = "now"
+
     if upgrade_mode == "at_expiry":
         stored = False
         try:
             # Try update next_plan_code if column exists
-            upd = (
-                supabase.table("user_subscriptions")
-                .update({"next_plan_code": plan_code, "updated_at": _now_utc().isoformat()})
+            # (timestamp taken once, outside the lambda, so retries write the same value)
+            now_iso = _iso(_now_utc())
+            upd = execute_with_retry(
+                lambda: supabase.table("user_subscriptions")
+                .update({"next_plan_code": plan_code, "updated_at": now_iso}, returning="minimal")
                 .eq("account_id", account_id)
                 .execute()
             )
             stored = True
-        except Exception:
+            _forget_request_status(account_id)
+        except Exception as e:
+            _note_schema_error("next_plan_code", e)
             stored = False
 
         if stored:
-            # Record event idempotently (best-effort)
-            try:
-                if event_id:
-                    supabase.table("payment_events").insert(
-                        {"event_id": event_id, "provider": payload.get("provider"), "reference": reference, "raw": payload.get("raw")}
-                    ).execute()
-            except Exception:
-                pass
+            if claimed is None:
+                _record_payment_event(payload, event_id, reference)
 
             return _ok(
                 ok=True,
@@ -254,17 +587,27 @@ def handle_payment_success(payload: Dict[str, Any]) -> Dict[str, Any]:
         # Fallback: activate immediately if we can't store next plan
         upgrade_mode = "now"
 
+    if ASYNC_WEBHOOK_ACTIVATION:
+        _IO_POOL.submit(_activate_in_background, payload, account_id, plan_code, claimed)
+        return _ok(
+            ok=True,
+            processed=True,
+            account_id=account_id,
+            plan_code=plan_code,
+            upgrade_mode="now",
+            queued=True,
+            reference=reference,
+        )
+
+    # The event record does not depend on the activation result (it was always written
+    # afterwards regardless of outcome), so run both round trips concurrently.
+    event_write = _IO_POOL.submit(_record_payment_event, payload, event_id, reference) if claimed is None else None
+
     # Activate immediately (RPC-first)
     activation = activate_subscription_now(account_id=account_id, plan_code=plan_code, days=DEFAULT_DAYS)
 
-    # Record event idempotently (best-effort)
-    try:
-        if event_id:
-            supabase.table("payment_events").insert(
-                {"event_id": event_id, "provider": payload.get("provider"), "reference": reference, "raw": payload.get("raw")}
-            ).execute()
-    except Exception:
-        pass
+    if event_write is not None:
+        event_write.result()
 
     return _ok(
         ok=True,
@@ -277,25 +620,67 @@ def handle_payment_success(payload: Dict[str, Any]) -> Dict[str, Any]:
     )
 
 
+def apply_due_plan_changes() -> Optional[int]:
+    """
+    Start plans queued with upgrade_mode="at_expiry" (next_plan_code) whose period has ended.
+
+    One RPC (supabase/subscription_rpcs.sql) locks the due rows with FOR UPDATE SKIP LOCKED
+    and swaps the plan in the same statement, so overlapping cron runs can't apply a change
+    twice. Returns the number of rows switched, or None when the RPC is unavailable.
+    """
+    if not _schema_available("apply_due_rpc") or not _schema_available("next_plan_code"):
+        return None
+    try:
+        res = supabase.rpc(RPC_APPLY_DUE, {"p_days": DEFAULT_DAYS}).execute()
+        return _as_int(getattr(res, "data", None), 0)
+    except Exception as e:
+        _note_schema_error("apply_due_rpc", e)
+        return None
+
+
 def expire_overdue_subscriptions() -> Dict[str, Any]:
     """
     Used by optional cron route.
     Expires rows where current_period_end < now() and status='active'.
     MUST exist because app.routes.cron imports it in your boot output.
     """
+    # Queued plan changes first: a row whose period just ended with a paid next plan
+    # moves onto that plan instead of being expired below.
+    plan_changes = apply_due_plan_changes()
+
+    # Fast path: bounded batch that skips rows locked by an in-flight activation instead
+    # of waiting on them; the next cron run picks up whatever is left.
+    if _schema_available("expire_rpc"):
+        try:
+            res = supabase.rpc(RPC_EXPIRE, {"p_limit": EXPIRE_BATCH_LIMIT}).execute()
+            count = _as_int(getattr(res, "data", None), 0)
+            cache = _request_status_cache()
+            if cache:
+                cache.clear()
+            return _ok(expired=True, count=count, plan_changes=plan_changes, method="rpc")
+        except Exception as e:
+            _note_schema_error("expire_rpc", e)
+
     try:
         # We do this via table update; if RLS blocks, this should run under service role key.
-        now_iso = _now_utc().isoformat()
+        now_iso = _iso(_now_utc())
 
         # Supabase python uses filters like .lt("col", value)
-        res = (
-            supabase.table("user_subscriptions")
-            .update({"status": "inactive", "updated_at": now_iso})
+        # Both filters run server-side; idx_user_subscriptions_active_period_end
+        # (supabase/subscription_indexes.sql) makes this a bounded index scan.
+        # return=minimal + count=exact: PostgREST reports the affected row count
+        # in Content-Range without serializing every expired row back to us.
+        res = execute_with_retry(
+            lambda: supabase.table("user_subscriptions")
+            .update({"status": "inactive", "updated_at": now_iso}, count="exact", returning="minimal")
             .eq("status", "active")
             .lt("current_period_end", now_iso)
             .execute()
         )
-        count = len(res.data or []) if hasattr(res, "data") and isinstance(res.data, list) else None
-        return _ok(expired=True, count=count)
+        count = getattr(res, "count", None)
+        cache = _request_status_cache()
+        if cache:
+            cache.clear()
+        return _ok(expired=True, count=count, plan_changes=plan_changes)
     except Exception as e:
         return _fail("expire_failed", f"expire_overdue_subscriptions failed: {e!s}")
@@ -33,28 +33,24 @@ def save_filing_draft(
 ) -> Dict[str, Any]:
     """Save or update an in-progress filing draft"""
     try:
-        # Check if draft exists
-        existing = _sb().table("tax_filing_drafts") \
-            .select("*") \
+        now = datetime.now(timezone.utc).isoformat()
+        
+        # Update the in-progress draft directly (one round trip); the affected rows come
+        # back, so an empty result means there is no draft yet.
+        result = _sb().table("tax_filing_drafts") \
+            .update({
+                "inputs": inputs,
+                "documents": documents,
+                "current_step": current_step,
+                "updated_at": now
+            }) \
             .eq("user_id", user_id) \
             .eq("tax_type", tax_type) \
             .eq("status", "in_progress") \
             .execute()
         
-        now = datetime.now(timezone.utc).isoformat()
-        
-        if existing.data:
-            # Update existing draft
-            result = _sb().table("tax_filing_drafts") \
-                .update({
-                    "inputs": inputs,
-                    "documents": documents,
-                    "current_step": current_step,
-                    "updated_at": now
-                }) \
-                .eq("id", existing.data[0]["id"]) \
-                .execute()
-            return {"ok": True, "draft": result.data[0] if result.data else existing.data[0]}
+        if result.data:
+            return {"ok": True, "draft": result.data[0]}
         else:
             # Create new draft
             draft_id = str(uuid.uuid4())
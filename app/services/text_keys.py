@@ -2,11 +2,15 @@ from __future__ import annotations
 import re
 from typing import Optional
 
+# Compiled once; these run on every inbound question.
+# Any run of non-[a-z0-9] characters (whitespace included) becomes one space.
+_RE_NONALNUM = re.compile(r"[^a-z0-9]+")
+_RE_ACRONYM = re.compile(r"[a-z]{2,6}")
+# After _clean the only whitespace left is single spaces, so the lead-in is a prefix check.
+_LEAD_PREFIXES = ("what is ", "whats ", "what s ", "define ", "meaning of ")
+
 def _clean(s: str) -> str:
-    s = (s or "").lower().strip()
-    s = re.sub(r"[^a-z0-9\s]+", " ", s)
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+    return _RE_NONALNUM.sub(" ", (s or "").lower()).strip()
 
 def canonicalize_question(question: str, lang: Optional[str] = "en") -> str:
     """
@@ -23,12 +27,16 @@ def canonicalize_question(question: str, lang: Optional[str] = "en") -> str:
         return ""
 
     # English intent normalization
-    if (lang or "en") == "en":
+    if not lang or lang == "en":
         # acronym-only (2..6 chars) -> treat as definition query
-        if re.fullmatch(r"[a-z]{2,6}", s):
+        if _RE_ACRONYM.fullmatch(s):
             s = f"what is {s}"
 
-        s = re.sub(r"^(what is|whats|what s|define|meaning of)\s+", "what is ", s)
+        if s.startswith(_LEAD_PREFIXES):
+            for prefix in _LEAD_PREFIXES:
+                if s.startswith(prefix):
+                    s = "what is " + s[len(prefix):]
+                    break
 
-    # underscores
-    return re.sub(r"\s+", "_", s)
+    # underscores (_clean already collapsed whitespace to single spaces)
+    return s.replace(" ", "_")
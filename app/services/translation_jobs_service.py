@@ -1,25 +1,53 @@
 # app/services/translation_jobs_service.py
 from __future__ import annotations
-from typing import Optional
+from typing import Any, Dict, List, Optional
 from ..core.supabase_client import supabase
 from .lang_service import normalize_lang
 
 
-def enqueue_missing_translations(*, canonical_key: str, target_lang: str, source_lang: str = "en", source_table: str = "qa_cache") -> None:
+def _job_payload(canonical_key: str, target_lang: str, source_lang: str = "en", source_table: str = "qa_cache") -> Optional[Dict[str, Any]]:
     canonical_key = (canonical_key or "").strip()
     target_lang = normalize_lang(target_lang)
     source_lang = normalize_lang(source_lang)
     source_table = (source_table or "qa_cache").strip()
 
     if not canonical_key or not target_lang or target_lang == source_lang:
-        return
+        return None
 
-    # idempotent due to unique index uq_translation_jobs_unique
-    payload = {
+    return {
         "canonical_key": canonical_key,
         "source_lang": source_lang,
         "target_lang": target_lang,
         "source_table": source_table,
         "status": "pending",
     }
-    supabase.table("translation_jobs").upsert(payload).execute()
+
+
+def enqueue_missing_translations(*, canonical_key: str, target_lang: str, source_lang: str = "en", source_table: str = "qa_cache") -> None:
+    enqueue_missing_translations_batch(
+        [{"canonical_key": canonical_key, "target_lang": target_lang, "source_lang": source_lang, "source_table": source_table}]
+    )
+
+
+def enqueue_missing_translations_batch(jobs: List[Dict[str, Any]]) -> None:
+    """
+    Enqueue many translation jobs with one upsert instead of one round trip per job.
+    Each job takes the same keys as enqueue_missing_translations(); invalid or
+    same-language jobs are dropped, duplicates within the batch are collapsed.
+    """
+    rows: Dict[tuple, Dict[str, Any]] = {}
+    for job in jobs or []:
+        payload = _job_payload(
+            job.get("canonical_key") or "",
+            job.get("target_lang") or "",
+            job.get("source_lang") or "en",
+            job.get("source_table") or "qa_cache",
+        )
+        if payload:
+            rows.setdefault((payload["canonical_key"], payload["source_lang"], payload["target_lang"], payload["source_table"]), payload)
+
+    if not rows:
+        return
+
+    # idempotent due to unique index uq_translation_jobs_unique
+    supabase.table("translation_jobs").upsert(list(rows.values())).execute()
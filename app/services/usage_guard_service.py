@@ -8,10 +8,6 @@ from typing import Any, Dict, Optional
 from app.core.supabase_client import supabase
 
 
-def _sb():
-    return supabase() if callable(supabase) else supabase
-
-
 def _truthy(v: str | None) -> bool:
     return str(v or "").strip().lower() in {"1", "true", "yes", "y", "on"}
 
@@ -128,7 +124,7 @@ class UsageState:
 
 def _safe_select_one(table: str, account_id: str) -> Dict[str, Any]:
     try:
-        client = _sb()
+        client = supabase
         res = (
             client.table(table)
             .select("*")
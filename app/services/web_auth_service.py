@@ -2,14 +2,18 @@
 from __future__ import annotations
 
 import hashlib
+import hmac
+import re
 import secrets
 import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone, timedelta
 from typing import Any, Dict, Optional, Tuple, List
 
 import requests
 from flask import Request
+from requests.adapters import HTTPAdapter
 
 from app.core.config import (
     SUPABASE_URL,
@@ -38,6 +42,35 @@ SESSION_ROTATE_AFTER_MINUTES = int((__import__("os").getenv("WEB_SESSION_ROTATE_
 SESSION_FINGERPRINT_MODE = ((__import__("os").getenv("WEB_SESSION_FINGERPRINT_MODE", "soft") or "soft").strip().lower())
 # off | soft | strict
 
+# last_seen_at is only rewritten once it is at least this old. Rotation measures idle time
+# from last_seen_at, so keep this well under WEB_SESSION_ROTATE_AFTER_MINUTES.
+SESSION_TOUCH_MIN_INTERVAL_SECONDS = int((__import__("os").getenv("WEB_SESSION_TOUCH_MIN_INTERVAL_SECONDS", "60") or "60"))
+
+# Validated sessions are cached per token hash so back-to-back requests skip the
+# web_tokens round trip. The TTL bounds how long a revocation made elsewhere can
+# go unnoticed; logout and rotation in this process evict immediately. 0 disables.
+TOKEN_CACHE_TTL_SECONDS = float((__import__("os").getenv("WEB_TOKEN_CACHE_TTL_SECONDS", "30") or "30"))
+TOKEN_CACHE_MAX_ENTRIES = int((__import__("os").getenv("WEB_TOKEN_CACHE_MAX_ENTRIES", "10000") or "10000"))
+_TOKEN_CACHE: Dict[str, Tuple[float, str, datetime, str, str]] = {}
+
+# Optional RPC (supabase/web_auth_rpcs.sql) that checks and consumes an OTP atomically.
+CLAIM_OTP_RPC = ((__import__("os").getenv("WEB_CLAIM_OTP_RPC", "bms_claim_web_otp") or "bms_claim_web_otp").strip())
+_claim_otp_rpc_missing = False
+# Optional RPC (same file) that revokes an account's sessions and inserts the new one in one call.
+ISSUE_SESSION_RPC = ((__import__("os").getenv("WEB_ISSUE_SESSION_RPC", "bms_issue_web_session") or "bms_issue_web_session").strip())
+_issue_session_rpc_missing = False
+
+# auth_events rows and last_seen_at touches are best-effort writes nobody waits on;
+# run them off the request thread.
+_AUDIT_POOL = ThreadPoolExecutor(max_workers=2, thread_name_prefix="web-auth-audit")
+
+# Every PostgREST call here goes through one keep-alive session; requests.request()
+# opened (and TLS-handshook) a fresh connection per call, several times per login.
+HTTP_POOL_SIZE = int((__import__("os").getenv("WEB_AUTH_HTTP_POOL_SIZE", "10") or "10"))
+_HTTP = requests.Session()
+_HTTP.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=max(1, HTTP_POOL_SIZE)))
+_HTTP.mount("http://", HTTPAdapter(pool_connections=1, pool_maxsize=max(1, HTTP_POOL_SIZE)))
+
 
 def _now_utc() -> datetime:
     return datetime.now(timezone.utc)
@@ -70,11 +103,19 @@ def _truncate(s: Any, n: int = 1800) -> str:
     return s if len(s) <= n else (s[:n] + "...<truncated>")
 
 
+def _fromisoformat(s: str) -> datetime:
+    # Python 3.11+ accepts the trailing "Z" directly; only older interpreters pay for the replace() copy.
+    try:
+        return datetime.fromisoformat(s)
+    except ValueError:
+        return datetime.fromisoformat(s.replace("Z", "+00:00"))
+
+
 def _safe_iso_to_dt(v: Any) -> Optional[datetime]:
     try:
         if not v:
             return None
-        return datetime.fromisoformat(str(v).replace("Z", "+00:00")).astimezone(timezone.utc)
+        return _fromisoformat(str(v)).astimezone(timezone.utc)
     except Exception:
         return None
 
@@ -137,7 +178,7 @@ def _sb_request(
     url = f"{_postgrest_base()}{path}"
     t0 = time.time()
     try:
-        res = requests.request(method, url, headers=_sb_headers(), params=params, json=json, timeout=25)
+        res = _HTTP.request(method, url, headers=_sb_headers(), params=params, json=json, timeout=25)
         dt = round((time.time() - t0) * 1000)
 
         dbg: Dict[str, Any] = {"url": url, "method": method, "status": res.status_code, "ms": dt}
@@ -174,14 +215,21 @@ def _looks_like_unique_violation(dbg: Dict[str, Any]) -> bool:
 
 
 def _log_auth_event(contact: Optional[str], ip: Optional[str], event: str, success: bool, reason: Optional[str] = None) -> None:
+    payload = {
+        "contact": contact,
+        "ip": ip,
+        "event_type": event,
+        "success": bool(success),
+        "reason": reason,
+    }
+    try:
+        _AUDIT_POOL.submit(_write_auth_event, payload)
+    except Exception:
+        pass
+
+
+def _write_auth_event(payload: Dict[str, Any]) -> None:
     try:
-        payload = {
-            "contact": contact,
-            "ip": ip,
-            "event_type": event,
-            "success": bool(success),
-            "reason": reason,
-        }
         _sb_request("POST", "/auth_events", json=payload)
     except Exception:
         pass
@@ -244,11 +292,11 @@ def request_web_otp(
 
 def _find_latest_otp(contact: str, purpose: str) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
     params = {
-        "select": "id,code_hash,expires_at,used,used_at,attempts,locked_until,created_at",
+        "select": "id,code_hash,expires_at,used",
         "contact": f"eq.{contact}",
         "purpose": f"eq.{purpose}",
         "order": "created_at.desc",
-        "limit": "10",
+        "limit": "1",
     }
     ok, data, dbg = _sb_request("GET", f"/{WEB_OTP_TABLE}", params=params)
     if not ok:
@@ -310,16 +358,21 @@ def _lookup_accounts_by_provider_user_id(contact: str) -> Tuple[List[Dict[str, A
     return rows, None
 
 
-def _lookup_accounts_by_email(contact: str) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+def _lookup_accounts_by_contact(contact: str) -> Tuple[List[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    provider_user_id=contact OR email=contact in one request (the two lookups above, merged).
+    Values are double-quoted so commas/parentheses in an address can't break the or=() list.
+    """
+    quoted = '"' + contact.replace("\\", "\\\\").replace('"', '\\"') + '"'
     params = {
         "select": "id,account_id,provider,provider_user_id,email,display_name,created_at,updated_at",
-        "email": f"eq.{contact}",
+        "or": f"(provider_user_id.eq.{quoted},email.eq.{quoted})",
         "order": "updated_at.desc,created_at.desc",
-        "limit": "20",
+        "limit": "40",
     }
     ok, data, dbg = _sb_request("GET", "/accounts", params=params)
     if not ok:
-        return [], _fail(stage="account_lookup_email", error="account_lookup_failed", root_cause=dbg.get("error_body") or data, debug=dbg)
+        return [], _fail(stage="account_lookup_contact", error="account_lookup_failed", root_cause=dbg.get("error_body") or data, debug=dbg)
 
     rows = data if isinstance(data, list) else []
     return rows, None
@@ -371,24 +424,22 @@ def _get_or_create_web_account(contact: str) -> Tuple[Optional[Dict[str, Any]],
     Reliable resolver for authenticated web users.
 
     Strategy:
-    1. Search by provider_user_id=email
-    2. Search by email
-    3. Choose best row
-    4. Repair row if needed
-    5. If none exists, create fresh canonical row
+    1. Search by provider_user_id=email or email=email (one request)
+    2. Choose best row
+    3. Repair row if needed
+    4. If none exists, create fresh canonical row
     """
     contact = _normalize_email(contact)
 
-    rows_by_puid, err1 = _lookup_accounts_by_provider_user_id(contact)
-    if err1:
-        return None, err1
-
-    rows_by_email, err2 = _lookup_accounts_by_email(contact)
-    if err2:
-        return None, err2
+    rows, err = _lookup_accounts_by_contact(contact)
+    if err:
+        return None, err
+    # provider_user_id matches first (stable sort keeps updated_at order within each group),
+    # so ties in _account_sort_key resolve the same way as with the separate lookups.
+    rows.sort(key=lambda row: row.get("provider_user_id") != contact)
 
     merged: Dict[str, Dict[str, Any]] = {}
-    for row in (rows_by_puid or []) + (rows_by_email or []):
+    for row in rows or []:
         row_id = str(row.get("id") or "").strip()
         if row_id:
             merged[row_id] = row
@@ -401,14 +452,15 @@ def _get_or_create_web_account(contact: str) -> Tuple[Optional[Dict[str, Any]],
         return chosen, None
 
     new_id = str(uuid.uuid4())
+    now_iso = _now_utc().isoformat()
     row = {
         "id": new_id,
         "account_id": new_id,
         "provider": "web",
         "provider_user_id": contact,
         "email": contact,
-        "created_at": _now_utc().isoformat(),
-        "updated_at": _now_utc().isoformat(),
+        "created_at": now_iso,
+        "updated_at": now_iso,
     }
 
     ok3, data3, dbg3 = _sb_request("POST", "/accounts", json=row)
@@ -434,6 +486,7 @@ def _get_or_create_web_account(contact: str) -> Tuple[Optional[Dict[str, Any]],
 
 
 def _revoke_all_sessions_for_account(account_row_id: str) -> None:
+    _token_cache_evict_account(account_row_id)
     _sb_request(
         "PATCH",
         f"/{WEB_TOKEN_TABLE}?account_id=eq.{account_row_id}",
@@ -441,11 +494,42 @@ def _revoke_all_sessions_for_account(account_row_id: str) -> None:
     )
 
 
-def _insert_web_session(*, account_row_id: str, ip: Optional[str], user_agent: Optional[str]) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+def _looks_like_missing_function(dbg: Dict[str, Any]) -> bool:
+    body = str(dbg.get("error_body") or "")
+    return ("PGRST202" in body) or ("42883" in body)
+
+
+def _revoke_all_sessions_best_effort(account_row_id: str) -> None:
+    try:
+        _revoke_all_sessions_for_account(account_row_id)
+    except Exception:
+        pass
+
+
+def _insert_web_session(
+    *,
+    account_row_id: str,
+    ip: Optional[str],
+    user_agent: Optional[str],
+    revoke_others: bool = False,
+) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """
+    Insert a new web session row. With revoke_others, the account's existing sessions
+    are revoked first, in the same RPC call when bms_issue_web_session is deployed.
+    """
+    global _issue_session_rpc_missing
+
     expires_at = (_now_utc() + timedelta(days=int(WEB_SESSION_TTL_DAYS or 30))).isoformat()
     attempts: List[Dict[str, Any]] = []
     fingerprint = _build_fingerprint(ip, user_agent)
 
+    use_rpc = revoke_others and not _issue_session_rpc_missing and WEB_TOKEN_TABLE == "web_sessions"
+    if revoke_others:
+        if use_rpc:
+            _token_cache_evict_account(account_row_id)
+        else:
+            _revoke_all_sessions_best_effort(account_row_id)
+
     for n in range(1, TOKEN_INSERT_MAX_RETRIES + 1):
         token_plain = secrets.token_urlsafe(48)
         token_hash = _hash_token(token_plain)
@@ -461,7 +545,15 @@ def _insert_web_session(*, account_row_id: str, ip: Optional[str], user_agent: O
             "last_seen_at": _now_utc().isoformat(),
         }
 
-        ok, data, dbg = _sb_request("POST", f"/{WEB_TOKEN_TABLE}", json=payload)
+        if use_rpc:
+            ok, data, dbg = _sb_request("POST", f"/rpc/{ISSUE_SESSION_RPC}", json={"p_session": payload})
+            if not ok and _looks_like_missing_function(dbg):
+                _issue_session_rpc_missing = True
+                use_rpc = False
+                _revoke_all_sessions_best_effort(account_row_id)
+                ok, data, dbg = _sb_request("POST", f"/{WEB_TOKEN_TABLE}", json=payload)
+        else:
+            ok, data, dbg = _sb_request("POST", f"/{WEB_TOKEN_TABLE}", json=payload)
         if ok:
             created = data[0] if isinstance(data, list) and data else data
             return {
@@ -485,46 +577,100 @@ def _insert_web_session(*, account_row_id: str, ip: Optional[str], user_agent: O
     return None, _fail(stage="session_insert", error="web_session_insert_failed", root_cause="insert_failed", extra={"attempts": attempts})
 
 
-def verify_web_otp_and_issue_token(*, contact: str, otp: str, purpose: str, ip: Optional[str] = None, user_agent: Optional[str] = None) -> Dict[str, Any]:
-    contact = _normalize_email(contact)
-    purpose = (purpose or "web_login").strip().lower()
-    otp = (otp or "").strip()
+_CLAIM_OTP_FAILURES = {
+    "not_found": ("otp_lookup", "otp_not_found", "otp_not_found"),
+    "already_used": ("otp_state", "otp_already_used", "otp_already_used"),
+    "expired": ("otp_expiry", "otp_expired", "otp_expired"),
+    "invalid": ("otp_compare", "otp_invalid", "invalid_otp"),
+}
 
-    if not contact or not otp:
-        _log_auth_event(contact, ip, "verify_failed", False, "contact_and_otp_required")
-        return _fail(stage="validate_input", error="contact_and_otp_required")
 
-    if not _looks_like_email(contact):
-        _log_auth_event(contact, ip, "verify_failed", False, "invalid_contact_email")
-        return _fail(stage="validate_contact", error="invalid_contact_email", extra={"contact": contact})
+def _claim_otp_rpc(contact: str, purpose: str, code_hash: str) -> Optional[Dict[str, Any]]:
+    """
+    Check and consume the latest OTP for contact/purpose in one locked round trip.
+    Returns the RPC's {"status", "otp_id", "expires_at"} or None when the caller
+    should use the select-then-patch path instead.
+    """
+    global _claim_otp_rpc_missing
+    if _claim_otp_rpc_missing or WEB_OTP_TABLE != "web_otps":
+        return None
+
+    ok, data, dbg = _sb_request(
+        "POST",
+        f"/rpc/{CLAIM_OTP_RPC}",
+        json={"p_contact": contact, "p_purpose": purpose, "p_code_hash": code_hash},
+    )
+    if not ok:
+        if _looks_like_missing_function(dbg):
+            _claim_otp_rpc_missing = True
+        return None
+
+    row = data[0] if isinstance(data, list) and data else data
+    if not isinstance(row, dict) or not row.get("status"):
+        return None
+    return row
+
+
+def _consume_otp(contact: str, purpose: str, otp: str, ip: Optional[str]) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    code_hash = _hash_otp(otp)
+    claim = _claim_otp_rpc(contact, purpose, code_hash)
+    if claim is not None:
+        status = str(claim.get("status"))
+        if status == "ok":
+            return {"id": claim.get("otp_id")}, None
+        stage, error, reason = _CLAIM_OTP_FAILURES.get(status, ("otp_claim", "otp_claim_failed", "otp_claim_failed"))
+        _log_auth_event(contact, ip, "verify_failed", False, reason)
+        extra = {k: claim[k] for k in ("otp_id", "expires_at") if claim.get(k)}
+        return None, _fail(stage=stage, error=error, extra=extra or None)
 
     otp_row, otp_dbg = _find_latest_otp(contact, purpose)
     if not otp_row:
         _log_auth_event(contact, ip, "verify_failed", False, "otp_not_found")
-        return _fail(stage="otp_lookup", error="otp_not_found", debug=otp_dbg)
+        return None, _fail(stage="otp_lookup", error="otp_not_found", debug=otp_dbg)
 
     if otp_row.get("used") is True:
         _log_auth_event(contact, ip, "verify_failed", False, "otp_already_used")
-        return _fail(stage="otp_state", error="otp_already_used", extra={"otp_id": otp_row.get("id")})
+        return None, _fail(stage="otp_state", error="otp_already_used", extra={"otp_id": otp_row.get("id")})
 
     try:
         exp = str(otp_row["expires_at"])
-        exp_dt = datetime.fromisoformat(exp.replace("Z", "+00:00"))
+        exp_dt = _fromisoformat(exp)
         if _now_utc() >= exp_dt:
             _log_auth_event(contact, ip, "verify_failed", False, "otp_expired")
-            return _fail(stage="otp_expiry", error="otp_expired", extra={"expires_at": exp, "otp_id": otp_row.get("id")})
+            return None, _fail(stage="otp_expiry", error="otp_expired", extra={"expires_at": exp, "otp_id": otp_row.get("id")})
     except Exception as e:
         _log_auth_event(contact, ip, "verify_failed", False, "otp_expiry_parse_failed")
-        return _fail(stage="otp_expiry_parse", error="otp_expiry_parse_failed", root_cause=repr(e), extra={"otp_row": otp_row})
+        return None, _fail(stage="otp_expiry_parse", error="otp_expiry_parse_failed", root_cause=repr(e), extra={"otp_row": otp_row})
 
-    if _hash_otp(otp) != (otp_row.get("code_hash") or ""):
+    # Constant-time compare so response timing doesn't reveal how much of the hash matched.
+    if not hmac.compare_digest(code_hash.encode("utf-8"), str(otp_row.get("code_hash") or "").encode("utf-8")):
         _log_auth_event(contact, ip, "verify_failed", False, "invalid_otp")
-        return _fail(stage="otp_compare", error="otp_invalid", extra={"otp_id": otp_row.get("id")})
+        return None, _fail(stage="otp_compare", error="otp_invalid", extra={"otp_id": otp_row.get("id")})
 
     used_res = _mark_otp_used(str(otp_row["id"]))
     if not used_res.get("ok"):
         _log_auth_event(contact, ip, "verify_failed", False, "otp_mark_used_failed")
-        return _fail(stage="otp_mark_used", error="otp_mark_used_failed", root_cause=used_res.get("root_cause"), debug=used_res.get("debug"))
+        return None, _fail(stage="otp_mark_used", error="otp_mark_used_failed", root_cause=used_res.get("root_cause"), debug=used_res.get("debug"))
+
+    return otp_row, None
+
+
+def verify_web_otp_and_issue_token(*, contact: str, otp: str, purpose: str, ip: Optional[str] = None, user_agent: Optional[str] = None) -> Dict[str, Any]:
+    contact = _normalize_email(contact)
+    purpose = (purpose or "web_login").strip().lower()
+    otp = (otp or "").strip()
+
+    if not contact or not otp:
+        _log_auth_event(contact, ip, "verify_failed", False, "contact_and_otp_required")
+        return _fail(stage="validate_input", error="contact_and_otp_required")
+
+    if not _looks_like_email(contact):
+        _log_auth_event(contact, ip, "verify_failed", False, "invalid_contact_email")
+        return _fail(stage="validate_contact", error="invalid_contact_email", extra={"contact": contact})
+
+    otp_row, otp_err = _consume_otp(contact, purpose, otp, ip)
+    if otp_err:
+        return otp_err
 
     acct, acct_err = _get_or_create_web_account(contact)
     if acct_err:
@@ -538,13 +684,12 @@ def verify_web_otp_and_issue_token(*, contact: str, otp: str, purpose: str, ip:
         _log_auth_event(contact, ip, "verify_failed", False, "account_row_id_missing")
         return _fail(stage="account_state", error="account_row_id_missing", extra={"account_row": acct})
 
-    if REVOKE_OLD_TOKENS_ON_LOGIN:
-        try:
-            _revoke_all_sessions_for_account(account_row_id)
-        except Exception:
-            pass
-
-    sess_res, sess_err = _insert_web_session(account_row_id=account_row_id, ip=ip, user_agent=user_agent)
+    sess_res, sess_err = _insert_web_session(
+        account_row_id=account_row_id,
+        ip=ip,
+        user_agent=user_agent,
+        revoke_others=REVOKE_OLD_TOKENS_ON_LOGIN,
+    )
     if sess_err:
         _log_auth_event(contact, ip, "verify_failed", False, "session_insert_failed")
         return {"ok": False, **sess_err}
@@ -599,6 +744,36 @@ def _extract_token_candidates(req: Request) -> Tuple[str, str, Dict[str, Any]]:
     return bearer, cookie, debug
 
 
+def _token_cache_get(token_hash: str, req_fp: str) -> Optional[str]:
+    hit = _TOKEN_CACHE.get(token_hash)
+    if not hit:
+        return None
+    cached_until, account_id, exp_dt, fingerprint, _ = hit
+    if time.monotonic() >= cached_until or _now_utc() >= exp_dt:
+        _TOKEN_CACHE.pop(token_hash, None)
+        return None
+    if SESSION_FINGERPRINT_MODE != "off" and fingerprint != req_fp:
+        return None
+    return account_id
+
+
+def _token_cache_put(token_hash: str, account_id: str, exp_dt: datetime, fingerprint: str, account_row_id: str) -> None:
+    if TOKEN_CACHE_TTL_SECONDS <= 0:
+        return
+    if len(_TOKEN_CACHE) >= TOKEN_CACHE_MAX_ENTRIES:
+        try:
+            _TOKEN_CACHE.pop(next(iter(_TOKEN_CACHE)), None)
+        except (RuntimeError, StopIteration):
+            pass
+    _TOKEN_CACHE[token_hash] = (time.monotonic() + TOKEN_CACHE_TTL_SECONDS, account_id, exp_dt, fingerprint, account_row_id)
+
+
+def _token_cache_evict_account(account_row_id: str) -> None:
+    for key, hit in list(_TOKEN_CACHE.items()):
+        if hit[4] == account_row_id:
+            _TOKEN_CACHE.pop(key, None)
+
+
 def _rotate_existing_session(row: Dict[str, Any], ip: Optional[str], user_agent: Optional[str]) -> Tuple[Optional[str], Dict[str, Any]]:
     account_row_id = str(row.get("account_id") or "").strip()
     if not account_row_id:
@@ -622,8 +797,28 @@ def _rotate_existing_session(row: Dict[str, Any], ip: Optional[str], user_agent:
     }
 
 
+# Session tokens are secrets.token_urlsafe(48) (older ones token_hex); anything outside the
+# URL-safe alphabet or a sane length cannot match a row, so it is rejected before hashing.
+_TOKEN_SHAPE_RE = re.compile(r"[A-Za-z0-9_\-]{16,256}")
+
+
+def _touch_last_seen(row_id: str) -> None:
+    try:
+        _sb_request("PATCH", f"/{WEB_TOKEN_TABLE}?id=eq.{row_id}", json={"last_seen_at": _now_utc().isoformat()})
+    except Exception:
+        pass
+
+
 def _lookup_token_plain(token_plain: str, *, ip: Optional[str] = None, user_agent: Optional[str] = None) -> Tuple[Optional[str], Dict[str, Any]]:
+    if not _TOKEN_SHAPE_RE.fullmatch(token_plain):
+        return None, _fail(stage="token_format", error="invalid_token")
+
     token_hash = _hash_token(token_plain)
+    req_fp = _build_fingerprint(ip, user_agent)
+
+    cached_account_id = _token_cache_get(token_hash, req_fp)
+    if cached_account_id:
+        return cached_account_id, {"ok": True, "debug": {"cached": True}}
 
     params = {
         "select": "id,account_id,expires_at,revoked,revoked_at,last_seen_at,created_at,fingerprint,accounts(id,account_id,email,provider_user_id,provider)",
@@ -643,7 +838,7 @@ def _lookup_token_plain(token_plain: str, *, ip: Optional[str] = None, user_agen
         return None, _fail(stage="token_state", error="token_revoked", debug={"supabase": sb_dbg})
 
     try:
-        exp_dt = datetime.fromisoformat(str(row["expires_at"]).replace("Z", "+00:00"))
+        exp_dt = _fromisoformat(str(row["expires_at"]))
         if _now_utc() >= exp_dt:
             return None, _fail(stage="token_expiry", error="token_expired", extra={"expires_at": row.get("expires_at")}, debug={"supabase": sb_dbg})
     except Exception as e:
@@ -663,7 +858,6 @@ def _lookup_token_plain(token_plain: str, *, ip: Optional[str] = None, user_agen
     if not canonical_account_id:
         canonical_account_id = str(row.get("account_id") or "").strip() or None
 
-    req_fp = _build_fingerprint(ip, user_agent)
     stored_fp = str((row.get("fingerprint") or "")).strip() or None
 
     fp_dbg = {
@@ -703,14 +897,22 @@ def _lookup_token_plain(token_plain: str, *, ip: Optional[str] = None, user_agen
         if age_minutes >= SESSION_ROTATE_AFTER_MINUTES:
             new_token, rot = _rotate_existing_session(row, ip, user_agent)
             rotate_dbg.update(rot if isinstance(rot, dict) else {})
+            _TOKEN_CACHE.pop(token_hash, None)
             if new_token:
                 row["__rotated_new_token"] = new_token
                 row["__rotated"] = True
 
-    try:
-        _sb_request("PATCH", f"/{WEB_TOKEN_TABLE}?id=eq.{row.get('id')}", json={"last_seen_at": _now_utc().isoformat()})
-    except Exception:
-        pass
+    # A rotated row is already revoked; otherwise skip the write while last_seen_at is fresh.
+    if not rotate_dbg.get("rotated") and (
+        last_seen_dt is None or (_now_utc() - last_seen_dt).total_seconds() >= SESSION_TOUCH_MIN_INTERVAL_SECONDS
+    ):
+        try:
+            _AUDIT_POOL.submit(_touch_last_seen, str(row.get("id")))
+        except Exception:
+            pass
+
+    if canonical_account_id and not rotate_dbg.get("rotated") and fp_dbg["matched"] is not False:
+        _token_cache_put(token_hash, canonical_account_id, exp_dt, req_fp, str(row.get("account_id") or ""))
 
     return canonical_account_id, {
         "ok": True,
@@ -736,7 +938,8 @@ def get_account_id_from_request(req: Request) -> Tuple[Optional[str], Dict[str,
         if acc:
             return acc, {"ok": True, "token_source": "bearer", **src_dbg, "debug": dbg.get("debug")}
 
-        if BEARER_FALLBACK_TO_COOKIE and cookie:
+        # Browsers often send the same token both ways; don't hash and look it up twice.
+        if BEARER_FALLBACK_TO_COOKIE and cookie and cookie != bearer:
             acc2, dbg2 = _lookup_token_plain(cookie, ip=ip, user_agent=user_agent)
             if acc2:
                 return acc2, {"ok": True, "token_source": "cookie_fallback", **src_dbg, "debug": dbg2.get("debug")}
@@ -760,6 +963,7 @@ def logout_web_session(req: Request) -> Dict[str, Any]:
         return {"ok": True, "logged_out": False, "reason": "no_token", **src_dbg}
 
     token_hash = _hash_token(token)
+    _TOKEN_CACHE.pop(token_hash, None)
 
     ok, data, sb_dbg = _sb_request(
         "PATCH",
@@ -1,11 +1,19 @@
 from __future__ import annotations
 
+import os
+from concurrent.futures import Future, ThreadPoolExecutor
 from datetime import datetime, timezone
 from typing import Any, Dict, List
 
 from app.core.supabase_client import supabase
 from app.services.ask_service import ask_guarded
 
+APPEND_MESSAGE_RPC = (os.getenv("WEB_CHAT_APPEND_RPC") or "bms_append_chat_message").strip() or "bms_append_chat_message"
+_append_rpc_missing = False
+
+# The user-message write overlaps the model call instead of running before it.
+_MESSAGE_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="web-chat-append")
+
 
 def _iso_now() -> str:
     return datetime.now(timezone.utc).isoformat().replace("+00:00", "Z")
@@ -37,21 +45,12 @@ def create_session(account_id: str, title: str) -> Dict[str, Any]:
         .select("id, title, created_at, updated_at")
         .execute()
     )
-    return (res.data or [{}])[0]
+    return res.data[0] if res.data else {}
 
 
 def get_messages(account_id: str, session_id: str) -> List[Dict[str, Any]]:
-    s = (
-        supabase.table("web_chat_sessions")
-        .select("id")
-        .eq("id", session_id)
-        .eq("account_id", account_id)
-        .limit(1)
-        .execute()
-    )
-    if not (s.data or []):
-        return []
-
+    # Messages carry account_id, so filtering on it already scopes the read to the
+    # caller's session; no separate session-ownership query is needed.
     res = (
         supabase.table("web_chat_messages")
         .select("id, role, content, created_at")
@@ -63,7 +62,26 @@ def get_messages(account_id: str, session_id: str) -> List[Dict[str, Any]]:
     return res.data or []
 
 
-def _append_message(account_id: str, session_id: str, role: str, content: str) -> None:
+def append_message(account_id: str, session_id: str, role: str, content: str) -> None:
+    """
+    Insert a chat message and touch the session's updated_at.
+    One RPC round trip (supabase/web_chat_rpcs.sql); falls back to insert + update
+    when the function isn't deployed.
+    """
+    global _append_rpc_missing
+
+    if not _append_rpc_missing:
+        try:
+            supabase.rpc(
+                APPEND_MESSAGE_RPC,
+                {"p_session_id": session_id, "p_account_id": account_id, "p_role": role, "p_content": content},
+            ).execute()
+            return
+        except Exception as e:
+            if str(getattr(e, "code", "") or "") not in {"PGRST202", "42883"}:
+                raise
+            _append_rpc_missing = True
+
     supabase.table("web_chat_messages").insert(
         {
             "account_id": account_id,
@@ -78,6 +96,11 @@ def _append_message(account_id: str, session_id: str, role: str, content: str) -
     ).eq("id", session_id).eq("account_id", account_id).execute()
 
 
+def append_message_async(account_id: str, session_id: str, role: str, content: str) -> Future:
+    """append_message() on a worker thread; call .result() before relying on the row."""
+    return _MESSAGE_POOL.submit(append_message, account_id, session_id, role, content)
+
+
 def send_message(account_id: str, session_id: str, text: str) -> Dict[str, Any]:
     s = (
         supabase.table("web_chat_sessions")
@@ -91,19 +114,21 @@ def send_message(account_id: str, session_id: str, text: str) -> Dict[str, Any]:
         new_s = create_session(account_id, title="New chat")
         session_id = new_s["id"]
 
-    _append_message(account_id, session_id, "user", text)
-
+    # History is read before the user message is written, so the new message is
+    # appended locally; the write then runs alongside ask_guarded.
     history = (
         supabase.table("web_chat_messages")
         .select("role, content")
         .eq("session_id", session_id)
         .eq("account_id", account_id)
         .order("created_at", desc=True)
-        .limit(12)
+        .limit(11)
         .execute()
     ).data or []
 
     history = list(reversed(history))
+    history.append({"role": "user", "content": text})
+    user_write = append_message_async(account_id, session_id, "user", text)
     context_lines = []
     for m in history:
         role = m.get("role")
@@ -121,6 +146,7 @@ def send_message(account_id: str, session_id: str, text: str) -> Dict[str, Any]:
         lang="en",
         channel="web_chat",
     )
+    user_write.result()
 
     if not result.get("ok"):
         return {
@@ -131,7 +157,7 @@ def send_message(account_id: str, session_id: str, text: str) -> Dict[str, Any]:
         }
 
     answer = str(result.get("answer") or "").strip()
-    _append_message(account_id, session_id, "assistant", answer)
+    append_message(account_id, session_id, "assistant", answer)
 
     return {
         "ok": True,
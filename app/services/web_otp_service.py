@@ -2,14 +2,14 @@
 from __future__ import annotations
 
 import hashlib
+import hmac
 import os
-import random
-import smtplib
+import secrets
 from datetime import datetime, timedelta, timezone
-from email.message import EmailMessage
 from typing import Any, Dict, Optional, Tuple
 
-from ..core.supabase_client import supabase
+from ..core.supabase_client import execute_with_retry, has_column, supabase
+from . import mail_service
 
 # ------------------------------------------------------------
 # ENV / Config
@@ -44,54 +44,33 @@ WEB_OTP_LOCK_MINUTES = int((os.getenv("WEB_OTP_LOCK_MINUTES", "30") or "30").str
 # Optional dev return
 WEB_DEV_RETURN_OTP = (os.getenv("WEB_DEV_RETURN_OTP", "0").strip() == "1")
 
-# ------------------------------------------------------------
-# Mail (SMTP)
-# Supports both MAIL_* and SMTP_* env names.
-# ------------------------------------------------------------
-
-def _env_first(*names: str, default: str = "") -> str:
-    for n in names:
-        v = os.getenv(n)
-        if v is not None and str(v).strip() != "":
-            return str(v).strip()
-    return default
-
-MAIL_ENABLED = _env_first("MAIL_ENABLED", "SMTP_ENABLED", default="0") == "1"
-MAIL_HOST = _env_first("MAIL_HOST", "SMTP_HOST")
-MAIL_PORT = int((_env_first("MAIL_PORT", "SMTP_PORT", default="0") or "0").strip() or "0")
-MAIL_USER = _env_first("MAIL_USER", "SMTP_USER")
-MAIL_PASS = _env_first("MAIL_PASS", "SMTP_PASS")
-MAIL_FROM_EMAIL = _env_first("MAIL_FROM_EMAIL", default="no-reply@thecre8hub.com")
-MAIL_FROM_NAME = _env_first("MAIL_FROM_NAME", default="NaijaTax Guide")
-MAIL_USE_TLS = _env_first("MAIL_USE_TLS", default="1") == "1"
-
 # ------------------------------------------------------------
 # Helpers
 # ------------------------------------------------------------
 
-def _sb():
-    try:
-        return supabase()
-    except TypeError:
-        return supabase
-
 def _table(name: str):
-    return _sb().table(name)
+    return supabase.table(name)
 
 def _now_utc() -> datetime:
     return datetime.now(timezone.utc)
 
 def _iso(dt: datetime) -> str:
+    if dt.tzinfo is timezone.utc:
+        return f"{dt:%Y-%m-%dT%H:%M:%S}.{dt.microsecond:06d}Z"
     return dt.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
 
 def _parse_iso(value: Optional[str]) -> Optional[datetime]:
     if not value:
         return None
+    v = str(value)
+    if v.endswith("Z"):
+        v = v[:-1] + "+00:00"
     try:
-        v = str(value).replace("Z", "+00:00")
-        return datetime.fromisoformat(v).astimezone(timezone.utc)
+        dt = datetime.fromisoformat(v)
     except Exception:
         return None
+    # PostgREST timestamps come back as +00:00, which parses straight to timezone.utc.
+    return dt if dt.tzinfo is timezone.utc else dt.astimezone(timezone.utc)
 
 def _clean(v: Any) -> str:
     return (v or "").strip()
@@ -112,26 +91,43 @@ def _is_email(v: str) -> bool:
     v = _clean(v)
     return ("@" in v) and ("." in v)
 
-def _sha256_hex(s: str) -> str:
-    return hashlib.sha256(s.encode("utf-8")).hexdigest()
+# Peppers are fixed at import, so the "{pepper}:" prefix is hashed once and copied per call.
+_OTP_HASH_PREFIX = hashlib.sha256(f"{WEB_OTP_PEPPER}:".encode("utf-8"))
+_TOKEN_HASH_PREFIX = hashlib.sha256(f"{WEB_TOKEN_PEPPER}:".encode("utf-8"))
 
 def _otp_hash(contact: str, purpose: str, otp: str) -> str:
-    # ties OTP to contact+purpose + pepper
-    return _sha256_hex(f"{WEB_OTP_PEPPER}:{contact}:{purpose}:{otp}")
+    # ties OTP to contact+purpose + pepper: sha256(f"{pepper}:{contact}:{purpose}:{otp}")
+    h = _OTP_HASH_PREFIX.copy()
+    h.update(f"{contact}:{purpose}:{otp}".encode("utf-8"))
+    return h.hexdigest()
 
 def _token_hash(raw_token: str) -> str:
     # MUST match app/core/auth.py: sha256(f"{pepper}:{raw_token}")
-    return _sha256_hex(f"{WEB_TOKEN_PEPPER}:{raw_token}")
+    h = _TOKEN_HASH_PREFIX.copy()
+    h.update(raw_token.encode("utf-8"))
+    return h.hexdigest()
+
+_OTP_MOD = 10 ** WEB_OTP_LEN
 
 def _gen_otp() -> str:
-    low = 10 ** (WEB_OTP_LEN - 1)
-    high = (10 ** WEB_OTP_LEN) - 1
-    return str(random.randint(low, high))
+    # CSPRNG, full 10**WEB_OTP_LEN code space (leading zeros allowed, hence zfill)
+    return str(secrets.randbelow(_OTP_MOD)).zfill(WEB_OTP_LEN)
+
+# SMTP config, connections and the OTP template live in mail_service (the path
+# web_auth uses); this module only decides whether and where to send.
+# Sending stays opt-in here (MAIL_ENABLED or SMTP_ENABLED = "1"), unlike mail_service's default,
+# and needs an explicitly set host and port: mail_service falls back to a default relay.
+OTP_MAIL_ENABLED = (os.getenv("MAIL_ENABLED") or os.getenv("SMTP_ENABLED") or "0").strip() == "1"
+OTP_MAIL_HOST = (os.getenv("MAIL_HOST") or os.getenv("SMTP_HOST") or "").strip()
+OTP_MAIL_PORT = (os.getenv("MAIL_PORT") or os.getenv("SMTP_PORT") or "").strip()
+OTP_MAIL_FROM_EMAIL = (os.getenv("MAIL_FROM_EMAIL") or "no-reply@thecre8hub.com").strip()
 
 def smtp_is_configured() -> bool:
-    if not MAIL_ENABLED:
+    if not OTP_MAIL_ENABLED:
+        return False
+    if not OTP_MAIL_HOST or OTP_MAIL_PORT in ("", "0"):
         return False
-    if not MAIL_HOST or not MAIL_PORT or not MAIL_USER or not MAIL_PASS:
+    if not mail_service.MAIL_USER or not mail_service.MAIL_PASS:
         return False
     return True
 
@@ -139,27 +135,16 @@ def _send_email_otp(to_email: str, otp: str, ttl_minutes: int) -> Tuple[bool, Op
     if not smtp_is_configured():
         return False, "smtp_not_configured"
 
-    msg = EmailMessage()
-    msg["From"] = f"{MAIL_FROM_NAME} <{MAIL_FROM_EMAIL}>"
-    msg["To"] = to_email
-    msg["Subject"] = f"Your NaijaTax Guide login code: {otp}"
-
-    msg.set_content(
-        "Your NaijaTax Guide one-time login code is:\n\n"
-        f"{otp}\n\n"
-        f"This code expires in {ttl_minutes} minutes.\n\n"
-        "If you did not request this code, ignore this email."
+    res = mail_service.send_otp_email(
+        to_email,
+        otp,
+        ttl_minutes=ttl_minutes,
+        subject=f"Your NaijaTax Guide login code: {otp}",
+        from_email=OTP_MAIL_FROM_EMAIL,
     )
-
-    try:
-        with smtplib.SMTP(MAIL_HOST, MAIL_PORT, timeout=15) as server:
-            if MAIL_USE_TLS:
-                server.starttls()
-            server.login(MAIL_USER, MAIL_PASS)
-            server.send_message(msg)
+    if res.get("ok"):
         return True, None
-    except Exception as e:
-        return False, f"smtp_send_failed:{type(e).__name__}"
+    return False, str(res.get("error") or "smtp_send_failed")
 
 # ------------------------------------------------------------
 # Rate limiting + lock checks
@@ -169,7 +154,7 @@ def _latest_otp_row(contact: str, purpose: str) -> Optional[Dict[str, Any]]:
     try:
         res = (
             _table(WEB_OTP_TABLE)
-            .select("id, created_at, expires_at, used, attempts, locked_until")
+            .select("id, locked_until")
             .eq("contact", contact)
             .eq("purpose", purpose)
             .order("created_at", desc=True)
@@ -191,20 +176,26 @@ def _is_locked(contact: str, purpose: str) -> Tuple[bool, Optional[str]]:
         return True, f"locked_until:{_iso(locked_until)}"
     return False, None
 
+def _row_count(res: Any) -> int:
+    # count="exact" reports the full match count in Content-Range; only one row travels.
+    count = getattr(res, "count", None)
+    if count is not None:
+        return int(count)
+    return len(getattr(res, "data", None) or [])
+
 def _count_recent_requests_by_contact(contact: str, purpose: str, window_min: int) -> int:
     since = _now_utc() - timedelta(minutes=max(1, int(window_min)))
     try:
         res = (
             _table(WEB_OTP_TABLE)
-            .select("id, created_at")
+            .select("id", count="exact")
             .eq("contact", contact)
             .eq("purpose", purpose)
             .gte("created_at", _iso(since))
-            .limit(500)
+            .limit(1)
             .execute()
         )
-        rows = getattr(res, "data", None) or []
-        return len(rows)
+        return _row_count(res)
     except Exception:
         return 0
 
@@ -215,14 +206,13 @@ def _count_recent_requests_by_ip(ip: str, window_min: int) -> int:
     try:
         res = (
             _table(WEB_OTP_TABLE)
-            .select("id, created_at")
+            .select("id", count="exact")
             .eq("request_ip", ip)
             .gte("created_at", _iso(since))
-            .limit(1000)
+            .limit(1)
             .execute()
         )
-        rows = getattr(res, "data", None) or []
-        return len(rows)
+        return _row_count(res)
     except Exception:
         return 0
 
@@ -247,7 +237,7 @@ def _upsert_account_for_contact(contact: str) -> Optional[str]:
     """
     try:
         res = (
-            _sb()
+            supabase
             .table("accounts")
             .select("account_id")
             .eq("provider", "web")
@@ -260,7 +250,7 @@ def _upsert_account_for_contact(contact: str) -> Optional[str]:
             return rows[0].get("account_id")
 
         ins = (
-            _sb()
+            supabase
             .table("accounts")
             .insert({
                 "provider": "web",
@@ -276,7 +266,7 @@ def _upsert_account_for_contact(contact: str) -> Optional[str]:
         return None
 
 def _issue_web_session_token(account_id: str, contact: str) -> Dict[str, Any]:
-    raw_token = os.urandom(24).hex()
+    raw_token = secrets.token_hex(24)
     now = _now_utc()
     expires = now + timedelta(days=max(1, int(WEB_SESSION_TTL_DAYS)))
 
@@ -290,19 +280,13 @@ def _issue_web_session_token(account_id: str, contact: str) -> Dict[str, Any]:
     }
 
     # optional contact column
-    if _has_column(WEB_TOKEN_TABLE, "contact"):
+    if has_column(WEB_TOKEN_TABLE, "contact"):
         payload["contact"] = contact
 
-    _table(WEB_TOKEN_TABLE).insert(payload).execute()
+    # Transient network/pool errors get one retry; anything else surfaces as token_issue_failed.
+    execute_with_retry(lambda: _table(WEB_TOKEN_TABLE).insert(payload).execute(), attempts=2)
     return {"token": raw_token, "account_id": account_id, "expires_at": _iso(expires)}
 
-def _has_column(table: str, col: str) -> bool:
-    try:
-        _table(table).select(col).limit(1).execute()
-        return True
-    except Exception:
-        return False
-
 # ------------------------------------------------------------
 # OTP Storage
 # ------------------------------------------------------------
@@ -332,28 +316,31 @@ def _create_otp_row(
     }
 
     # optional metadata columns
-    if _has_column(WEB_OTP_TABLE, "sent_to"):
+    if has_column(WEB_OTP_TABLE, "sent_to"):
         payload["sent_to"] = dest_email
-    if _has_column(WEB_OTP_TABLE, "channel"):
+    if has_column(WEB_OTP_TABLE, "channel"):
         payload["channel"] = "email" if dest_email else "none"
-    if _has_column(WEB_OTP_TABLE, "email_sent"):
+    if has_column(WEB_OTP_TABLE, "email_sent"):
         payload["email_sent"] = bool(email_sent)
-    if _has_column(WEB_OTP_TABLE, "email_error"):
+    if has_column(WEB_OTP_TABLE, "email_error"):
         payload["email_error"] = email_error
 
-    _table(WEB_OTP_TABLE).insert(payload).execute()
+    # A duplicate row from a retried insert is harmless: verification only reads the latest.
+    execute_with_retry(lambda: _table(WEB_OTP_TABLE).insert(payload).execute(), attempts=2)
 
 def _find_latest_active_otp(contact: str, purpose: str) -> Optional[Dict[str, Any]]:
     """
     Latest unused, unexpired OTP row for contact+purpose.
+    Expiry is filtered in Postgres, so an expired row never comes back to be parsed.
     """
     try:
         res = (
             _table(WEB_OTP_TABLE)
-            .select("id, code_hash, expires_at, used, attempts, locked_until, created_at")
+            .select("id, code_hash, attempts, locked_until")
             .eq("contact", contact)
             .eq("purpose", purpose)
             .eq("used", False)
+            .gt("expires_at", _iso(_now_utc()))
             .order("created_at", desc=True)
             .limit(1)
             .execute()
@@ -363,9 +350,6 @@ def _find_latest_active_otp(contact: str, purpose: str) -> Optional[Dict[str, An
             return None
 
         row = rows[0]
-        exp = _parse_iso(row.get("expires_at"))
-        if not exp or _now_utc() > exp:
-            return None
 
         locked_until = _parse_iso(row.get("locked_until"))
         if locked_until and _now_utc() < locked_until:
@@ -384,12 +368,12 @@ def _increment_attempts_and_maybe_lock(row_id: str, attempts: int) -> None:
     updates: Dict[str, Any] = {
         "attempts": next_attempts,
         "last_attempt_at": _iso(_now_utc()),
-    } if _has_column(WEB_OTP_TABLE, "last_attempt_at") else {"attempts": next_attempts}
+    } if has_column(WEB_OTP_TABLE, "last_attempt_at") else {"attempts": next_attempts}
 
     # If exceeded, invalidate and lock
     if next_attempts >= WEB_OTP_MAX_ATTEMPTS:
         updates["used"] = True
-        if _has_column(WEB_OTP_TABLE, "used_at"):
+        if has_column(WEB_OTP_TABLE, "used_at"):
             updates["used_at"] = _iso(_now_utc())
         locked_until = _now_utc() + timedelta(minutes=max(1, int(WEB_OTP_LOCK_MINUTES)))
         updates["locked_until"] = _iso(locked_until)
@@ -401,7 +385,7 @@ def _increment_attempts_and_maybe_lock(row_id: str, attempts: int) -> None:
 
 def _mark_used(row_id: str) -> None:
     updates: Dict[str, Any] = {"used": True}
-    if _has_column(WEB_OTP_TABLE, "used_at"):
+    if has_column(WEB_OTP_TABLE, "used_at"):
         updates["used_at"] = _iso(_now_utc())
     try:
         _table(WEB_OTP_TABLE).update(updates).eq("id", row_id).execute()
@@ -549,7 +533,7 @@ def verify_web_login_otp(
     expected = (row.get("code_hash") or "").strip()
     got = _otp_hash(contact, purpose, otp)
 
-    if not expected or got != expected:
+    if not expected or not hmac.compare_digest(got.encode("utf-8"), expected.encode("utf-8")):
         # wrong otp -> increment attempts on the active row
         _increment_attempts_and_maybe_lock(row_id, int(row.get("attempts") or 0))
         return {"ok": False, "error": "invalid_otp"}
@@ -1,7 +1,9 @@
 # app/services/web_sessions_service.py
 from __future__ import annotations
 
+import hashlib
 import os
+import time
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, Optional, Tuple
 
@@ -14,6 +16,12 @@ from ..core.supabase_client import supabase
 
 WEB_SESSION_TTL_DAYS = int((os.getenv("WEB_SESSION_TTL_DAYS", "30") or "30").strip())
 WEB_SESSION_TOUCH_ENABLED = (os.getenv("WEB_SESSION_TOUCH_ENABLED", "1").strip() == "1")
+# last_seen_at is informational; write it at most once per token per interval (0 = every call).
+WEB_SESSION_TOUCH_INTERVAL_SECONDS = float((os.getenv("WEB_SESSION_TOUCH_INTERVAL_SECONDS", "60") or "60").strip())
+WEB_SESSION_TOUCH_MAX_TRACKED = 10000
+
+# sha256(token) -> monotonic time of the last touch written from this process.
+_last_touch: Dict[str, float] = {}
 
 
 # ------------------------------------------------------------
@@ -24,25 +32,24 @@ def _now_utc() -> datetime:
     return datetime.now(timezone.utc)
 
 def _iso(dt: datetime) -> str:
+    if dt.tzinfo is timezone.utc:
+        return f"{dt:%Y-%m-%dT%H:%M:%S}.{dt.microsecond:06d}Z"
     return dt.astimezone(timezone.utc).isoformat().replace("+00:00", "Z")
 
 def _parse_iso(value: Optional[str]) -> Optional[datetime]:
     if not value:
         return None
     try:
-        v = value.replace("Z", "+00:00")
-        return datetime.fromisoformat(v)
+        return datetime.fromisoformat(value)
     except Exception:
-        return None
-
-def _sb():
+        pass
     try:
-        return supabase()
-    except TypeError:
-        return supabase
+        return datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except Exception:
+        return None
 
 def _table(name: str):
-    return _sb().table(name)
+    return supabase.table(name)
 
 def _clean(s: Any) -> str:
     return (s or "").strip()
@@ -118,7 +125,17 @@ def touch_session_best_effort(token: str) -> None:
     if not token:
         return
 
+    key = hashlib.sha256(token.encode("utf-8")).hexdigest()
+    now = time.monotonic()
+    last = _last_touch.get(key)
+    if last is not None and now - last < WEB_SESSION_TOUCH_INTERVAL_SECONDS:
+        return
+
     try:
         _table("web_sessions").update({"last_seen_at": _iso(_now_utc())}).eq("token", token).execute()
     except Exception:
         return
+
+    if len(_last_touch) >= WEB_SESSION_TOUCH_MAX_TRACKED:
+        _last_touch.clear()
+    _last_touch[key] = now
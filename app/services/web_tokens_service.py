@@ -4,7 +4,9 @@ from __future__ import annotations
 import hashlib
 import os
 import secrets
+import time
 from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime, timedelta, timezone
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -35,6 +37,12 @@ def _get_web_token_peppers() -> List[str]:
     First pepper is used to MINT new tokens.
     Others are accepted to VERIFY existing tokens (rotation support).
     """
+    return list(_web_token_peppers())
+
+
+@lru_cache(maxsize=1)
+def _web_token_peppers() -> Tuple[str, ...]:
+    # Env is fixed for the life of the process; resolve once instead of on every token check.
     # Prefer explicit WEB_TOKEN_PEPPERS for rotation
     peppers = _split_peppers(os.getenv("WEB_TOKEN_PEPPERS", ""))
 
@@ -50,13 +58,29 @@ def _get_web_token_peppers() -> List[str]:
         if legacy:
             peppers = [legacy]
 
-    return peppers
+    return tuple(peppers)
+
+
+@lru_cache(maxsize=8)
+def _pepper_prefix_hash(pepper: str) -> Any:
+    # sha256 state after absorbing f"{pepper}:"; copied per call instead of rehashing the pepper.
+    return hashlib.sha256(f"{pepper}:".encode("utf-8"))
 
 
 def _hash_token_plain(token_plain: str, pepper: str) -> str:
     # Deterministic, stable: sha256(f"{pepper}:{token_plain}")
-    s = f"{pepper}:{token_plain}".encode("utf-8")
-    return hashlib.sha256(s).hexdigest()
+    h = _pepper_prefix_hash(pepper).copy()
+    h.update(token_plain.encode("utf-8"))
+    return h.hexdigest()
+
+
+# Verified rows cached per token (keyed by its hash under the minting pepper) so repeat
+# requests skip the web_tokens lookup. Expiry is still checked against the row on every
+# hit; the TTL bounds how long a revocation from another process goes unnoticed.
+# 0 disables.
+WEB_TOKEN_CACHE_TTL_SECONDS = float((os.getenv("WEB_TOKEN_CACHE_TTL_SECONDS") or "30").strip() or "30")
+WEB_TOKEN_CACHE_MAX_ENTRIES = 10000
+_verified_cache: Dict[str, Tuple[float, "WebTokenRow", str]] = {}
 
 
 @dataclass(frozen=True)
@@ -99,7 +123,8 @@ class WebTokensStore:
     def find_by_hash(self, token_hash: str) -> Optional[WebTokenRow]:
         url = f"{self.supabase_url}/rest/v1/{self.table}"
         params = {
-            "select": "*",
+            # Only the fields WebTokenRow carries.
+            "select": f"id,{self.col_account_id},{self.col_token_hash},created_at,{self.col_expires_at},{self.col_revoked}",
             self.col_token_hash: f"eq.{token_hash}",
             "limit": "1",
         }
@@ -137,6 +162,7 @@ class WebTokensStore:
         payload = {self.col_revoked: True}
         r = httpx.patch(url, headers=self._headers(), params=params, json=payload, timeout=15)
         r.raise_for_status()
+        _evict_verified(token_hash)
 
 
 def mint_web_token(account_id: str) -> Tuple[str, str]:
@@ -177,16 +203,34 @@ def verify_web_token_plain(token_plain: str) -> Tuple[Optional[WebTokenRow], Opt
     if not peppers:
         return None, None
 
+    cache_key = _hash_token_plain(token_plain, peppers[0])
+    hit = _verified_cache.get(cache_key)
+    if hit:
+        cached_until, row, pepper = hit
+        if time.monotonic() < cached_until and not token_is_expired(row):
+            return row, pepper
+        _verified_cache.pop(cache_key, None)
+
     store = WebTokensStore()
     for pepper in peppers:
-        token_hash = _hash_token_plain(token_plain, pepper)
+        token_hash = cache_key if pepper == peppers[0] else _hash_token_plain(token_plain, pepper)
         row = store.find_by_hash(token_hash)
         if row:
+            if not row.revoked and WEB_TOKEN_CACHE_TTL_SECONDS > 0:
+                if len(_verified_cache) >= WEB_TOKEN_CACHE_MAX_ENTRIES:
+                    _verified_cache.clear()
+                _verified_cache[cache_key] = (time.monotonic() + WEB_TOKEN_CACHE_TTL_SECONDS, row, pepper)
             return row, pepper
 
     return None, None
 
 
+def _evict_verified(token_hash: str) -> None:
+    for key, (_, row, _) in list(_verified_cache.items()):
+        if row.token_hash == token_hash:
+            _verified_cache.pop(key, None)
+
+
 def parse_iso_dt(v: Any) -> Optional[datetime]:
     if not v:
         return None
@@ -66,6 +66,46 @@ def _safe_select_cols(db, table: str) -> List[str]:
     return cols
 
 
+# supabase/qa_library_rpcs.sql. Cleared once PostgREST reports the function missing, so the
+# rest of the run goes straight to per-row updates.
+BULK_PATCH_RPC = "bms_bulk_patch_rows"
+_MISSING_RPC_CODES = {"PGRST202", "42883"}
+_bulk_rpc_ok = True
+
+
+def _write_page(db, table: str, payloads: List[Dict[str, Any]]) -> int:
+    """
+    One bms_bulk_patch_rows call (a single UPDATE ... FROM jsonb_populate_recordset) per page
+    instead of one update per row. If the RPC fails, the page is written row by row.
+    """
+    global _bulk_rpc_ok
+    if not payloads:
+        return 0
+
+    if _bulk_rpc_ok:
+        try:
+            res = db.rpc(BULK_PATCH_RPC, {"p_table": table, "p_rows": payloads}).execute()
+            return int(getattr(res, "data", None) or 0)
+        except Exception as e:
+            if str(getattr(e, "code", "") or "") in _MISSING_RPC_CODES:
+                _bulk_rpc_ok = False
+                print(f"[warn] {BULK_PATCH_RPC} is not deployed; using per-row updates from here on")
+            else:
+                print(f"[warn] bulk update failed ({len(payloads)} rows), falling back to per-row: {e}")
+
+    written = 0
+    for p in payloads:
+        rid = p["id"]
+        try:
+            db.table(table).update({k: v for k, v in p.items() if k != "id"}).eq("id", rid).execute()
+            written += 1
+        except Exception as e:
+            # Keep going (best-effort), but print so you can inspect
+            print(f"[warn] update failed id={rid}: {e}")
+
+    return written
+
+
 def backfill(table: str, batch_size: int = 500) -> None:
     db = supabase()
 
@@ -78,13 +118,22 @@ def backfill(table: str, batch_size: int = 500) -> None:
     updated = 0
     scanned = 0
     page = 0
+    last_id: Any = None
 
+    # Keyset pagination on id (OFFSET re-scans every earlier row on each page), and only
+    # rows still missing canonical_key, so finished rows never leave the database.
     while True:
-        start = page * batch_size
-        end = start + batch_size - 1
-
         try:
-            res = db.table(table).select(sel).range(start, end).execute()
+            q = (
+                db.table(table)
+                .select(sel)
+                .or_("canonical_key.is.null,canonical_key.eq.")
+                .order("id")
+                .limit(batch_size)
+            )
+            if last_id is not None:
+                q = q.gt("id", last_id)
+            res = q.execute()
         except Exception as e:
             print(f"[error] select failed at page={page}: {e}")
             sys.exit(1)
@@ -94,6 +143,8 @@ def backfill(table: str, batch_size: int = 500) -> None:
             break
 
         scanned += len(rows)
+        last_id = rows[-1].get("id")
+        pending: List[Dict[str, Any]] = []
 
         for row in rows:
             rid = row.get("id")
@@ -114,7 +165,7 @@ def backfill(table: str, batch_size: int = 500) -> None:
             # keep normalized_question consistent (optional)
             nq = basic_normalize(text)
 
-            payload = {"canonical_key": ck}
+            payload = {"id": rid, "canonical_key": ck}
             # only update normalized_question if that column exists in table
             if "normalized_question" in cols:
                 # If normalized_question already exists, don't overwrite non-empty
@@ -122,13 +173,9 @@ def backfill(table: str, batch_size: int = 500) -> None:
                 if not cur_nq:
                     payload["normalized_question"] = nq
 
-            try:
-                db.table(table).update(payload).eq("id", rid).execute()
-                updated += 1
-            except Exception as e:
-                # Keep going (best-effort), but print so you can inspect
-                print(f"[warn] update failed id={rid}: {e}")
+            pending.append(payload)
 
+        updated += _write_page(db, table, pending)
         page += 1
 
     print(f"[done] scanned={scanned}, updated={updated}")
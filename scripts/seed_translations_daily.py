@@ -1,8 +1,10 @@
 # scripts/seed_translations_daily.py
 from __future__ import annotations
 
+import json
 import os
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any
 
 from openai import OpenAI
@@ -11,6 +13,7 @@ from app.core.supabase_client import supabase
 # config
 BATCH_LIMIT = int(os.getenv("SEED_TRANSLATE_BATCH", "50"))
 SLEEP_SEC = float(os.getenv("SEED_TRANSLATE_SLEEP", "0.2"))
+WORKERS = int(os.getenv("SEED_TRANSLATE_WORKERS", "5"))
 
 TARGETS = [
     ("yo", "answer_yoruba"),
@@ -19,6 +22,8 @@ TARGETS = [
     ("pcm", "answer_pidgin"),  # adjust if your column is answer_pcmd
 ]
 
+LANG_NAMES = {"yo": "Yoruba", "ig": "Igbo", "ha": "Hausa", "pcm": "Nigerian Pidgin"}
+
 def translate_text(client: OpenAI, text_en: str, lang_code: str) -> str:
     prompt = (
         "Translate the text into the requested language.\n"
@@ -37,9 +42,82 @@ def translate_text(client: OpenAI, text_en: str, lang_code: str) -> str:
     out = (r.output_text or "").strip()
     return out
 
+def translate_many(client: OpenAI, text_en: str, lang_codes: List[str]) -> Dict[str, str]:
+    """
+    All missing languages for one row in a single request.
+    Returns only the languages that came back non-empty; callers fill the rest one by one.
+    """
+    wanted = ", ".join(f"{c} ({LANG_NAMES.get(c, c)})" for c in lang_codes)
+    prompt = (
+        "Translate the text into each requested language.\n"
+        "Rules:\n"
+        "- Keep it professional and clear.\n"
+        "- Preserve bullet points and formatting.\n"
+        "- Do NOT add new facts.\n"
+        "- Respond with a JSON object keyed by language code, each value only the translation.\n\n"
+        f"Languages: {wanted}\n\n"
+        f"Text:\n{text_en}"
+    )
+    r = client.responses.create(
+        model=os.getenv("OPENAI_TRANSLATE_MODEL", "gpt-4.1-mini"),
+        input=prompt,
+        text={"format": {"type": "json_object"}},
+    )
+    data = json.loads(r.output_text or "{}")
+    if not isinstance(data, dict):
+        return {}
+    out: Dict[str, str] = {}
+    for c in lang_codes:
+        v = str(data.get(c) or "").strip()
+        if v:
+            out[c] = v
+    return out
+
+def process_row(client: OpenAI, db: Any, row: Dict[str, Any]) -> bool:
+    """Translate a row's missing columns and write them back. True if the row was updated."""
+    ans_en = (row.get("answer_en") or "").strip()
+    if not ans_en:
+        return False
+
+    missing = [(lang_code, col) for lang_code, col in TARGETS if not (row.get(col) or "").strip()]
+    if not missing:
+        return False
+
+    # One request for every missing language; anything it drops falls back to per-language calls.
+    try:
+        batch = translate_many(client, ans_en, [lang_code for lang_code, _ in missing])
+    except Exception:
+        batch = {}
+    time.sleep(SLEEP_SEC)
+
+    patch = {}
+    for lang_code, col in missing:
+        if lang_code in batch:
+            patch[col] = batch[lang_code]
+            continue
+        try:
+            patch[col] = translate_text(client, ans_en, lang_code)
+            time.sleep(SLEEP_SEC)
+        except Exception:
+            # skip if translation fails; try again next run
+            pass
+
+    if not patch:
+        return False
+
+    # mark source/update audit if you want
+    patch["updated_at"] = None  # if your table has updated_at, set it properly; else remove this line
+
+    try:
+        db.table("qa_library").update(patch).eq("id", row["id"]).execute()
+        return True
+    except Exception:
+        return False
+
 def main() -> None:
     # requires OPENAI_API_KEY and Supabase service env to be available in this job
-    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    # The SDK backs off on 429/5xx (honouring Retry-After) before an error reaches us.
+    client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=int(os.getenv("OPENAI_TRANSLATE_MAX_RETRIES", "5")))
 
     db = supabase()
 
@@ -54,36 +132,10 @@ def main() -> None:
     )
 
     rows: List[Dict[str, Any]] = res.data or []
-    updated = 0
 
-    for row in rows:
-        ans_en = (row.get("answer_en") or "").strip()
-        if not ans_en:
-            continue
-
-        patch = {}
-        for lang_code, col in TARGETS:
-            existing = (row.get(col) or "").strip()
-            if existing:
-                continue
-            try:
-                patch[col] = translate_text(client, ans_en, lang_code)
-                time.sleep(SLEEP_SEC)
-            except Exception:
-                # skip if translation fails; try again next run
-                pass
-
-        if not patch:
-            continue
-
-        # mark source/update audit if you want
-        patch["updated_at"] = None  # if your table has updated_at, set it properly; else remove this line
-
-        try:
-            db.table("qa_library").update(patch).eq("id", row["id"]).execute()
-            updated += 1
-        except Exception:
-            pass
+    # Rows are independent and the work is waiting on OpenAI; run a few at once.
+    with ThreadPoolExecutor(max_workers=max(1, WORKERS)) as pool:
+        updated = sum(pool.map(lambda row: process_row(client, db, row), rows))
 
     print({"ok": True, "updated_rows": updated})
 
@@ -1,7 +1,7 @@
 # scripts/translation_seeder.py
 from __future__ import annotations
 import os
-import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Dict, Any, List
 
 from app.core.supabase_client import supabase
@@ -9,9 +9,12 @@ from app.core.supabase_client import supabase
 # If you're using OpenAI SDK in your project already, keep consistent with that.
 from openai import OpenAI
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# The SDK retries 429s and 5xx itself with exponential backoff and honours Retry-After;
+# give it more room than the default 2 so a rate-limit window doesn't burn job attempts.
+client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"), max_retries=int(os.getenv("OPENAI_TRANSLATE_MAX_RETRIES", "5")))
 
 MODEL = os.getenv("OPENAI_TRANSLATE_MODEL", "gpt-4o-mini")  # cheap + good
+WORKERS = int(os.getenv("TRANSLATION_SEEDER_WORKERS", "6"))
 
 LANG_NAME = {"yo": "Yoruba", "ig": "Igbo", "ha": "Hausa", "pcm": "Nigerian Pidgin", "en": "English"}
 
@@ -66,55 +69,75 @@ def update_library_translation(canonical_key: str, target_lang: str, translated:
 
     supabase.table("qa_library").update({col: translated}).eq("canonical_key", canonical_key).execute()
 
+def fetch_sources(canonical_keys: List[str]) -> Dict[str, str]:
+    """answer_en for every enabled qa_library row in the batch, in one query."""
+    keys = sorted({k for k in canonical_keys if k})
+    if not keys:
+        return {}
+    rows = (
+        supabase.table("qa_library")
+        .select("canonical_key, answer_en")
+        .in_("canonical_key", keys)
+        .eq("enabled", True)
+        .execute()
+    ).data or []
+    out: Dict[str, str] = {}
+    for r in rows:
+        ck = r.get("canonical_key")
+        if ck and ck not in out:
+            out[ck] = (r.get("answer_en") or "").strip()
+    return out
+
+def process_job(j: Dict[str, Any], sources: Dict[str, str]) -> None:
+    jid = j["id"]
+    ck = j["canonical_key"]
+    tgt = j["target_lang"]
+    attempts = int(j.get("attempts") or 0) + 1
+
+    try:
+        if ck not in sources:
+            mark_job(jid, "failed", error="source_not_found", attempts=attempts)
+            return
+
+        answer_en = sources[ck]
+        if not answer_en:
+            mark_job(jid, "failed", error="source_empty", attempts=attempts)
+            return
+
+        translated = translate_text(answer_en, tgt)
+        translated = (translated or "").strip()
+        if not translated:
+            mark_job(jid, "failed", error="translation_empty", attempts=attempts)
+            return
+
+        update_library_translation(ck, tgt, translated)
+        mark_job(jid, "done", error=None, attempts=attempts)
+
+    except Exception as e:
+        # fail-safe retries
+        if attempts >= 3:
+            mark_job(jid, "failed", error=str(e)[:300], attempts=attempts)
+        else:
+            # keep pending for retry
+            mark_job(jid, "pending", error=str(e)[:300], attempts=attempts)
+
 def run_batch() -> int:
     jobs = fetch_pending_jobs(limit=25)
     if not jobs:
         return 0
 
-    for j in jobs:
-        jid = j["id"]
-        ck = j["canonical_key"]
-        tgt = j["target_lang"]
-        attempts = int(j.get("attempts") or 0) + 1
-
-        try:
-            # Pull source English from qa_library
-            src = (
-                supabase.table("qa_library")
-                .select("answer_en, enabled")
-                .eq("canonical_key", ck)
-                .eq("enabled", True)
-                .limit(1)
-                .execute()
-            ).data or []
-
-            if not src:
-                mark_job(jid, "failed", error="source_not_found", attempts=attempts)
-                continue
-
-            answer_en = (src[0].get("answer_en") or "").strip()
-            if not answer_en:
-                mark_job(jid, "failed", error="source_empty", attempts=attempts)
-                continue
-
-            translated = translate_text(answer_en, tgt)
-            translated = (translated or "").strip()
-            if not translated:
-                mark_job(jid, "failed", error="translation_empty", attempts=attempts)
-                continue
-
-            update_library_translation(ck, tgt, translated)
-            mark_job(jid, "done", error=None, attempts=attempts)
-
-            time.sleep(0.2)  # gentle pacing
-
-        except Exception as e:
-            # fail-safe retries
-            if attempts >= 3:
-                mark_job(jid, "failed", error=str(e)[:300], attempts=attempts)
-            else:
-                # keep pending for retry
-                mark_job(jid, "pending", error=str(e)[:300], attempts=attempts)
+    # Source text for the whole batch up front instead of one qa_library query per job.
+    try:
+        sources = fetch_sources([j["canonical_key"] for j in jobs])
+    except Exception as e:
+        for j in jobs:
+            attempts = int(j.get("attempts") or 0) + 1
+            mark_job(j["id"], "failed" if attempts >= 3 else "pending", error=str(e)[:300], attempts=attempts)
+        return len(jobs)
+
+    # Jobs are independent and network-bound; translate a few at a time.
+    with ThreadPoolExecutor(max_workers=max(1, WORKERS)) as pool:
+        list(pool.map(lambda j: process_job(j, sources), jobs))
 
     return len(jobs)
 
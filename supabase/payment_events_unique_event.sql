@@ -0,0 +1,38 @@
+-- Naija Tax Guide: one payment_events row per webhook event
+-- Safe to run more than once. Moves extra copies into payment_events_archive (nothing is
+-- deleted without a copy), so run it on its own rather than together with
+-- subscription_indexes.sql.
+
+-- handle_payment_success(): claims each webhook event with insert ... on conflict (event_id) do nothing.
+-- Required for the single-statement idempotency check; without it the service falls back to select-then-insert.
+-- That fallback could record the same event twice under concurrent deliveries, and the unique
+-- index cannot be built over those copies. The first copy stays; the rest are moved to
+-- payment_events_archive in one statement, with writers locked out, before the index is built.
+begin;
+
+create table if not exists public.payment_events_archive
+  (like public.payment_events);
+
+alter table public.payment_events_archive
+  add column if not exists archived_at timestamptz not null default now();
+
+-- Service-side history only; not exposed through PostgREST.
+alter table public.payment_events_archive enable row level security;
+revoke all on public.payment_events_archive from anon, authenticated;
+
+lock table public.payment_events in share row exclusive mode;
+
+with moved as (
+  delete from public.payment_events a
+   using public.payment_events b
+   where a.event_id = b.event_id
+     and a.ctid > b.ctid
+  returning a.*
+)
+insert into public.payment_events_archive
+select * from moved;
+
+create unique index if not exists uq_payment_events_event_id
+  on public.payment_events(event_id);
+
+commit;
@@ -0,0 +1,10 @@
+-- Naija Tax Guide: indexes backing Paystack payment lookups
+-- Safe to run more than once. Every statement is create-if-not-exists.
+
+-- billing._find_transaction() falls back to paystack_events by reference.
+create index if not exists idx_paystack_events_reference
+  on public.paystack_events(reference);
+
+-- Account payment history (admin / PAY4 lookups filter by account_id, newest first).
+create index if not exists idx_paystack_transactions_account_created
+  on public.paystack_transactions(account_id, created_at desc);
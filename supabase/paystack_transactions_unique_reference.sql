@@ -0,0 +1,13 @@
+-- Naija Tax Guide: one paystack_transactions row per Paystack reference
+-- Safe to run more than once. Kept out of payment_indexes.sql because it fails while
+-- duplicate references exist, and a failure here must not roll back the other indexes.
+
+-- billing._remember_transaction(): upsert ... on_conflict=reference, and every webhook /
+-- verify / PAY4 lookup by reference. Deliberately not partial: PostgREST's on_conflict
+-- cannot name an index predicate, and NULL references never collide in a unique index anyway.
+-- Duplicates are payment records, so they are not deleted automatically. List them with
+--   select reference, count(*) from public.paystack_transactions
+--    where reference is not null group by reference having count(*) > 1;
+-- and merge them by hand before running this file.
+create unique index if not exists uq_paystack_transactions_reference
+  on public.paystack_transactions(reference);
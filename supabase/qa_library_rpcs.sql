@@ -0,0 +1,52 @@
+-- Naija Tax Guide: RPCs used by the qa_library maintenance scripts
+-- Safe to run more than once. Functions are create-or-replace.
+
+-- scripts/backfill_canonical_key.py and tools/translate_seeder.py: write a whole page of
+-- per-row column values in one UPDATE instead of one PATCH per row. A PostgREST upsert cannot do this: its insert half
+-- is checked against the table's NOT NULL columns, which these partial rows never carry,
+-- and it would insert a partial row for an id deleted mid-run. This only ever updates.
+-- p_rows is [{"id": ..., "<column>": <value>, ...}, ...]; rows may carry different column
+-- subsets. A column a row does not carry (or sends as null) keeps its current value.
+-- Returns the number of rows updated.
+create or replace function public.bms_bulk_patch_rows(
+  p_table text,
+  p_rows jsonb
+)
+returns int
+language plpgsql
+as $$
+declare
+  v_set text;
+  v_count int;
+begin
+  if p_table not in ('qa_library', 'qa_cache') then
+    raise exception 'bms_bulk_patch_rows: table % is not allowed', p_table;
+  end if;
+  if jsonb_typeof(p_rows) is distinct from 'array' or jsonb_array_length(p_rows) = 0 then
+    return 0;
+  end if;
+
+  select string_agg(format('%1$I = coalesce(r.%1$I, t.%1$I)', k), ', ' order by k)
+    into v_set
+    from (
+      select distinct k
+        from jsonb_array_elements(p_rows) e,
+             jsonb_object_keys(e) k
+       where k <> 'id'
+    ) keys;
+  if v_set is null then
+    return 0;
+  end if;
+
+  -- jsonb_populate_recordset casts every value (id included) to the table's column types.
+  execute format(
+    'update public.%1$I t set %2$s from jsonb_populate_recordset(null::public.%1$I, $1) r where t.id = r.id',
+    p_table, v_set
+  ) using p_rows;
+  get diagnostics v_count = row_count;
+  return v_count;
+end;
+$$;
+
+revoke execute on function public.bms_bulk_patch_rows(text, jsonb) from public, anon, authenticated;
+grant execute on function public.bms_bulk_patch_rows(text, jsonb) to service_role;
@@ -0,0 +1,36 @@
+-- Naija Tax Guide: RPCs used by app/services/referral_service.py
+-- Safe to run more than once. Functions are create-or-replace, indexes create-if-not-exists.
+
+-- _load_referral_chain(): walk referrals upward from the paying account in one round trip.
+-- Returns one row per level: level 1 is the paying account's own referral row, level 2 the
+-- referral row of its referrer, and so on up to p_depth.
+create or replace function public.bms_referral_chain(
+  p_referred_account_id uuid,
+  p_depth int default 2
+)
+returns table(level int, referral jsonb)
+language sql
+stable
+as $$
+  with recursive chain as (
+    select 1 as level, r.referrer_account_id, to_jsonb(r) as referral
+      from public.referrals r
+     where r.referred_account_id = p_referred_account_id
+    union all
+    select c.level + 1, p.referrer_account_id, to_jsonb(p)
+      from chain c
+      join public.referrals p on p.referred_account_id = c.referrer_account_id
+     where c.level < p_depth
+  )
+  select chain.level, chain.referral
+    from chain
+   order by chain.level;
+$$;
+
+revoke execute on function public.bms_referral_chain(uuid, int) from public, anon, authenticated;
+grant execute on function public.bms_referral_chain(uuid, int) to service_role;
+
+-- Each recursive step is an equality lookup on referred_account_id.
+create index if not exists idx_referrals_referred_account_id
+  on public.referrals(referred_account_id)
+  include (referrer_account_id);
@@ -0,0 +1,35 @@
+-- Naija Tax Guide: indexes backing the subscription service queries
+-- Safe to run more than once. Every statement is create-if-not-exists.
+
+-- expire_overdue_subscriptions(): update ... where status = 'active' and current_period_end < now()
+-- Partial index keeps the cron sweep a bounded range scan over active rows only.
+create index if not exists idx_user_subscriptions_active_period_end
+  on public.user_subscriptions(current_period_end)
+  where status = 'active';
+
+-- current_user_subscriptions view: distinct on (account_id) order by updated_at desc, created_at desc.
+create index if not exists idx_user_subscriptions_account_updated
+  on public.user_subscriptions(account_id, updated_at desc nulls last, created_at desc);
+
+-- channel_subscription_service: get_user_subscription() and the activation fallback filter
+-- by account_id and take the newest row by created_at.
+create index if not exists idx_user_subscriptions_account_created
+  on public.user_subscriptions(account_id, created_at desc);
+
+-- channel_credit_service.get_or_create_account_id(): accounts lookup by channel identity.
+-- Redundant where the (provider, provider_user_id) unique constraint behind the accounts
+-- upsert already exists; skip it there.
+create index if not exists idx_accounts_provider_user_id
+  on public.accounts(provider, provider_user_id);
+
+-- channel_subscription_service._load_plans_from_db(): select ... from plans where active.
+create index if not exists idx_plans_active_plan_code
+  on public.plans(plan_code)
+  where active;
+
+-- get_user_subscription() (is_active = true, newest first) and the deactivate step of
+-- bms_activate_channel_subscription() only touch active rows; a partial index keeps
+-- those lookups small no matter how much subscription history accumulates.
+create index if not exists idx_user_subscriptions_account_active_created
+  on public.user_subscriptions(account_id, created_at desc)
+  where is_active = true;
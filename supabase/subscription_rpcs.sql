@@ -0,0 +1,216 @@
+-- Naija Tax Guide: RPCs used by app/services/subscriptions_service.py
+-- Safe to run more than once. Functions are create-or-replace.
+
+-- Latest subscription row per account. Replaces "order by ... desc limit 1" in callers
+-- that need the current row (bms_subscription_status).
+-- A plain view rather than a materialized one: with the (account_id, updated_at desc)
+-- index the distinct-on is a short index walk, and nothing needs refreshing on write.
+-- security_invoker so the caller's RLS on user_subscriptions applies, and not readable
+-- through PostgREST with the anon / authenticated keys; only the service role reads it.
+create or replace view public.current_user_subscriptions
+  with (security_invoker = true) as
+select distinct on (us.account_id) us.*
+  from public.user_subscriptions us
+ order by us.account_id, us.updated_at desc nulls last, us.created_at desc;
+
+revoke all on public.current_user_subscriptions from anon, authenticated;
+grant select on public.current_user_subscriptions to service_role;
+
+-- Current row per account with the access classification derived in SQL.
+-- Same rule as subscriptions_service._status_from_row(): active status and
+-- a period end that is unset or not yet past. Read by bms_subscription_status().
+-- Same access rules as current_user_subscriptions: invoker rights, service role only.
+create or replace view public.current_subscription_status
+  with (security_invoker = true) as
+select us.account_id,
+       us.plan_code,
+       us.status,
+       us.current_period_end,
+       us.updated_at,
+       lower(coalesce(us.status, '')) = 'active'
+         and (us.current_period_end is null or us.current_period_end >= now()) as active
+  from public.current_user_subscriptions us;
+
+revoke all on public.current_subscription_status from anon, authenticated;
+grant select on public.current_subscription_status to service_role;
+
+-- get_subscription_status() fast path.
+-- Returns the view row as-is; the query shape never changes, so Postgres reuses the
+-- cached plan for every call.
+-- Returns null when the account has no subscription row.
+create or replace function public.bms_subscription_status(p_account_id uuid)
+returns jsonb
+language sql
+stable
+as $$
+  select jsonb_build_object(
+    'plan_code', s.plan_code,
+    'status', s.status,
+    'current_period_end', s.current_period_end,
+    'active', s.active
+  )
+  from public.current_subscription_status s
+  where s.account_id = p_account_id;
+$$;
+
+revoke execute on function public.bms_subscription_status(uuid) from public, anon, authenticated;
+grant execute on function public.bms_subscription_status(uuid) to service_role;
+
+-- channel_subscription_service.activate_subscription(): deactivate previous rows, then
+-- update the latest row (or insert one) in a single transaction / single round trip.
+create or replace function public.bms_activate_channel_subscription(
+  p_account_id uuid,
+  p_plan_code text,
+  p_period_end timestamptz
+)
+returns void
+language plpgsql
+as $$
+begin
+  update public.user_subscriptions
+     set is_active = false, status = 'inactive', updated_at = now()
+   where account_id = p_account_id
+     and is_active = true;
+
+  update public.user_subscriptions
+     set plan_code = p_plan_code,
+         status = 'active',
+         is_active = true,
+         current_period_end = p_period_end,
+         updated_at = now()
+   where id = (
+     select id
+       from public.user_subscriptions
+      where account_id = p_account_id
+      order by created_at desc
+      limit 1
+   );
+
+  if not found then
+    insert into public.user_subscriptions (account_id, plan_code, status, is_active, current_period_end, created_at, updated_at)
+    values (p_account_id, p_plan_code, 'active', true, p_period_end, now(), now());
+  end if;
+end;
+$$;
+
+revoke execute on function public.bms_activate_channel_subscription(uuid, text, timestamptz) from public, anon, authenticated;
+grant execute on function public.bms_activate_channel_subscription(uuid, text, timestamptz) to service_role;
+
+-- expire_overdue_subscriptions(): apply plans queued by handle_payment_success(upgrade_mode="at_expiry").
+-- Locks due rows with SKIP LOCKED so two overlapping cron runs split the work instead of
+-- both switching (and extending) the same row; the swap and the next_plan_code clear are
+-- one statement. Returns the number of rows switched.
+create or replace function public.bms_apply_due_plan_changes(
+  p_days int default 30,
+  p_limit int default 500
+)
+returns integer
+language plpgsql
+as $$
+declare
+  v_applied integer;
+begin
+  with due as (
+    select id
+      from public.user_subscriptions
+     where next_plan_code is not null
+       and current_period_end is not null
+       and current_period_end <= now()
+     order by current_period_end
+     limit p_limit
+     for update skip locked
+  )
+  update public.user_subscriptions us
+     set plan_code = us.next_plan_code,
+         next_plan_code = null,
+         status = 'active',
+         is_active = true,
+         current_period_end = now() + make_interval(days => p_days),
+         updated_at = now()
+    from due
+   where us.id = due.id;
+
+  get diagnostics v_applied = row_count;
+  return v_applied;
+end;
+$$;
+
+revoke execute on function public.bms_apply_due_plan_changes(int, int) from public, anon, authenticated;
+grant execute on function public.bms_apply_due_plan_changes(int, int) to service_role;
+
+-- expire_overdue_subscriptions() fast path: same predicate as the table UPDATE fallback
+-- (status = 'active' and current_period_end < now(), served by
+-- idx_user_subscriptions_active_period_end), in bounded batches. SKIP LOCKED leaves rows
+-- that an activation is currently writing for the next run instead of blocking on them.
+-- Returns the number of rows expired.
+create or replace function public.bms_expire_overdue_subscriptions(p_limit int default 1000)
+returns integer
+language plpgsql
+as $$
+declare
+  v_expired integer;
+begin
+  with due as (
+    select id
+      from public.user_subscriptions
+     where status = 'active'
+       and current_period_end < now()
+     order by current_period_end
+     limit p_limit
+     for update skip locked
+  )
+  update public.user_subscriptions us
+     set status = 'inactive',
+         updated_at = now()
+    from due
+   where us.id = due.id;
+
+  get diagnostics v_expired = row_count;
+  return v_expired;
+end;
+$$;
+
+revoke execute on function public.bms_expire_overdue_subscriptions(int) from public, anon, authenticated;
+grant execute on function public.bms_expire_overdue_subscriptions(int) to service_role;
+
+-- handle_payment_success(upgrade_mode="now"): claim the webhook event and activate in one
+-- transaction / one round trip. If the activation raises, the claim rolls back with it, so
+-- a retried delivery is not mistaken for a duplicate. Needs uq_payment_events_event_id
+-- (payment_events_unique_event.sql) and the existing bms_activate_subscription.
+-- Returns {"duplicate": true} when the event was already recorded, otherwise
+-- {"duplicate": false, "activation": <bms_activate_subscription result>}.
+create or replace function public.bms_record_payment_and_activate(
+  p_event_id text,
+  p_provider text,
+  p_reference text,
+  p_raw jsonb,
+  p_account_id uuid,
+  p_plan_code text,
+  p_days int default 30
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_activation jsonb;
+begin
+  insert into public.payment_events (event_id, provider, reference, raw)
+  values (p_event_id, p_provider, p_reference, p_raw)
+  on conflict (event_id) do nothing;
+
+  if not found then
+    return jsonb_build_object('duplicate', true);
+  end if;
+
+  v_activation := to_jsonb(public.bms_activate_subscription(
+    p_account_id => p_account_id,
+    p_plan_code => p_plan_code,
+    p_days => p_days
+  ));
+
+  return jsonb_build_object('duplicate', false, 'activation', v_activation);
+end;
+$$;
+
+revoke execute on function public.bms_record_payment_and_activate(text, text, text, jsonb, uuid, text, int) from public, anon, authenticated;
+grant execute on function public.bms_record_payment_and_activate(text, text, text, jsonb, uuid, text, int) to service_role;
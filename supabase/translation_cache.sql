@@ -0,0 +1,11 @@
+-- Naija Tax Guide: content-addressed translation cache for tools/translate_seeder.py
+-- Safe to run more than once.
+
+-- hash = sha256("<lang>|<answer_en>"); the seeder reads it before calling OpenAI and
+-- upserts every new translation, so repeated answers are only ever translated once.
+create table if not exists public.translation_cache (
+  hash text primary key,
+  lang text not null,
+  output text not null,
+  created_at timestamptz not null default now()
+);
@@ -0,0 +1,48 @@
+-- Naija Tax Guide: one user_subscriptions row per account
+-- Safe to run more than once. Moves superseded rows into user_subscriptions_archive
+-- (nothing is deleted without a copy), so run it on its own rather than together with
+-- subscription_indexes.sql.
+
+-- Conflict target for user_subscriptions upserts (billing _safe_upsert and channel activation).
+-- Until it exists the services fall back to select-then-update/insert.
+-- The unique index cannot be built while any account has more than one row. Every row
+-- except the account's current one (the row current_user_subscriptions reports: newest
+-- updated_at, then newest created_at) is copied to user_subscriptions_archive and then
+-- removed, in one transaction with writers locked out, before the index is built.
+begin;
+
+create table if not exists public.user_subscriptions_archive
+  (like public.user_subscriptions);
+
+alter table public.user_subscriptions_archive
+  add column if not exists archived_at timestamptz not null default now();
+
+-- Service-side history only; not exposed through PostgREST.
+alter table public.user_subscriptions_archive enable row level security;
+revoke all on public.user_subscriptions_archive from anon, authenticated;
+
+lock table public.user_subscriptions in share row exclusive mode;
+
+with ranked as (
+  select id,
+         row_number() over (
+           partition by account_id
+           order by updated_at desc nulls last, created_at desc
+         ) as rn
+    from public.user_subscriptions
+   where account_id is not null
+),
+moved as (
+  delete from public.user_subscriptions us
+   using ranked r
+   where us.id = r.id
+     and r.rn > 1
+  returning us.*
+)
+insert into public.user_subscriptions_archive
+select * from moved;
+
+create unique index if not exists uq_user_subscriptions_account_id
+  on public.user_subscriptions(account_id);
+
+commit;
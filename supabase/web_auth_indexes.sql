@@ -0,0 +1,31 @@
+-- Naija Tax Guide: indexes backing the web OTP / web session queries
+-- Safe to run more than once. Every statement is create-if-not-exists.
+
+-- web_auth_service: bms_claim_web_otp() and the _find_latest_otp() fallback take the newest
+-- OTP for (contact, purpose) regardless of state; with this index that is a single index
+-- probe instead of a sort over every code the contact has ever requested.
+create index if not exists idx_web_otps_contact_purpose_created
+  on public.web_otps(contact, purpose, created_at desc);
+
+-- web_otp_service._find_latest_active_otp(): same lookup restricted to used = false.
+-- Partial, so it stays small however many consumed codes accumulate.
+create index if not exists idx_web_otps_contact_purpose_unused
+  on public.web_otps(contact, purpose, created_at desc)
+  where used = false;
+
+-- cleanup_expired_web_auth(): range scans on expiry so the cron delete never walks the table.
+create index if not exists idx_web_otps_expires_at
+  on public.web_otps(expires_at);
+
+create index if not exists idx_web_sessions_expires_at
+  on public.web_sessions(expires_at);
+
+-- Every authenticated request: web_auth_service._lookup_token_plain() and
+-- core.auth._lookup_session() fetch the session by token_hash.
+-- Redundant where a unique constraint on web_sessions.token_hash already exists (the
+-- session insert retries on 23505, so many deployments have one); skip it there.
+-- Deliberately not partial on "revoked is not true": the lookups fetch revoked rows too,
+-- so they can report token_revoked, and the planner cannot use a partial index for a
+-- query that does not repeat its predicate.
+create index if not exists idx_web_sessions_token_hash
+  on public.web_sessions(token_hash);
@@ -0,0 +1,129 @@
+-- Naija Tax Guide: RPCs used by app/services/web_auth_service.py
+-- Safe to run more than once. Functions are create-or-replace.
+
+-- verify_web_otp_and_issue_token(): check and consume the latest OTP for a contact in
+-- one round trip (previously a select followed by a separate "mark used" patch).
+-- The row lock means two concurrent verifies of the same code cannot both succeed.
+-- Returns {"status": ok | not_found | already_used | expired | invalid, "otp_id", "expires_at"}.
+create or replace function public.bms_claim_web_otp(
+  p_contact text,
+  p_purpose text,
+  p_code_hash text
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_otp public.web_otps%rowtype;
+begin
+  select * into v_otp
+    from public.web_otps
+   where contact = p_contact
+     and purpose = p_purpose
+   order by created_at desc
+   limit 1
+   for update;
+
+  if not found then
+    return jsonb_build_object('status', 'not_found');
+  end if;
+
+  if v_otp.used is true then
+    return jsonb_build_object('status', 'already_used', 'otp_id', v_otp.id);
+  end if;
+
+  if v_otp.expires_at <= now() then
+    return jsonb_build_object('status', 'expired', 'otp_id', v_otp.id, 'expires_at', v_otp.expires_at);
+  end if;
+
+  if v_otp.code_hash is distinct from p_code_hash then
+    return jsonb_build_object('status', 'invalid', 'otp_id', v_otp.id);
+  end if;
+
+  update public.web_otps
+     set used = true,
+         used_at = now()
+   where id = v_otp.id;
+
+  return jsonb_build_object('status', 'ok', 'otp_id', v_otp.id, 'expires_at', v_otp.expires_at);
+end;
+$$;
+
+revoke execute on function public.bms_claim_web_otp(text, text, text) from public, anon, authenticated;
+grant execute on function public.bms_claim_web_otp(text, text, text) to service_role;
+
+-- verify_web_otp_and_issue_token(): revoke the account's open sessions and insert the
+-- new one in a single transaction (previously a PATCH followed by a separate POST).
+-- p_session is the row the service would otherwise POST to web_sessions; a unique
+-- violation on token_hash rolls the revoke back too, and the service retries.
+create or replace function public.bms_issue_web_session(
+  p_session jsonb
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_new public.web_sessions;
+begin
+  v_new := jsonb_populate_record(null::public.web_sessions, p_session);
+
+  update public.web_sessions
+     set revoked = true,
+         revoked_at = now()
+   where account_id = v_new.account_id
+     and revoked is not true;
+
+  insert into public.web_sessions (
+    token_hash, account_id, expires_at, revoked, fingerprint, ip, user_agent, last_seen_at
+  )
+  values (
+    v_new.token_hash, v_new.account_id, v_new.expires_at, false, v_new.fingerprint,
+    v_new.ip, v_new.user_agent, v_new.last_seen_at
+  )
+  returning * into v_new;
+
+  return to_jsonb(v_new);
+end;
+$$;
+
+revoke execute on function public.bms_issue_web_session(jsonb) from public, anon, authenticated;
+grant execute on function public.bms_issue_web_session(jsonb) to service_role;
+
+-- POST /internal/cron/cleanup-web-auth: delete OTPs and sessions that expired more than
+-- p_keep_hours ago, at most p_batch_limit rows per table per call.
+-- Only expired rows go: an older unexpired OTP must never become the "latest" code for a
+-- contact, and rate limits / locks only look back minutes, not days.
+create or replace function public.cleanup_expired_web_auth(
+  p_batch_limit int default 5000,
+  p_keep_hours int default 24
+)
+returns jsonb
+language plpgsql
+as $$
+declare
+  v_cutoff timestamptz := now() - make_interval(hours => greatest(p_keep_hours, 1));
+  v_otps int;
+  v_sessions int;
+begin
+  delete from public.web_otps
+   where id in (
+     select id from public.web_otps
+      where expires_at < v_cutoff
+      limit greatest(p_batch_limit, 1)
+   );
+  get diagnostics v_otps = row_count;
+
+  delete from public.web_sessions
+   where id in (
+     select id from public.web_sessions
+      where expires_at < v_cutoff
+      limit greatest(p_batch_limit, 1)
+   );
+  get diagnostics v_sessions = row_count;
+
+  return jsonb_build_object('web_otps', v_otps, 'web_sessions', v_sessions);
+end;
+$$;
+
+revoke execute on function public.cleanup_expired_web_auth(int, int) from public, anon, authenticated;
+grant execute on function public.cleanup_expired_web_auth(int, int) to service_role;
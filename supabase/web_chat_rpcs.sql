@@ -0,0 +1,29 @@
+-- Naija Tax Guide: RPCs used by app/services/web_chat_service.py and app/routes/web_chat.py
+-- Safe to run more than once. Functions are create-or-replace.
+
+-- append_message(): insert a chat message and bump its session's updated_at in one
+-- round trip (previously an insert followed by a separate update).
+-- The session update is scoped to p_account_id, same as the Python fallback.
+create or replace function public.bms_append_chat_message(
+  p_session_id uuid,
+  p_account_id uuid,
+  p_role text,
+  p_content text
+)
+returns void
+language sql
+as $$
+  with msg as (
+    insert into public.web_chat_messages (session_id, account_id, role, content)
+    values (p_session_id, p_account_id, p_role, p_content)
+    returning session_id
+  )
+  update public.web_chat_sessions s
+     set updated_at = now()
+    from msg
+   where s.id = msg.session_id
+     and s.account_id = p_account_id;
+$$;
+
+revoke execute on function public.bms_append_chat_message(uuid, uuid, text, text) from public, anon, authenticated;
+grant execute on function public.bms_append_chat_message(uuid, uuid, text, text) to service_role;
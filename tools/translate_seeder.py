@@ -3,10 +3,15 @@ from __future__ import annotations
 import os
 import sys
 import json
+import hashlib
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Dict, Any, Optional, Tuple
 
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 SUPABASE_URL = os.getenv("SUPABASE_URL", "").strip()
 SUPABASE_SERVICE_ROLE_KEY = os.getenv("SUPABASE_SERVICE_ROLE_KEY", "").strip()
@@ -15,6 +20,20 @@ OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "").strip()
 OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4.1-mini").strip()
 
 BATCH_LIMIT = int(os.getenv("SEED_BATCH_LIMIT", "25"))
+SEED_CONCURRENCY = int(os.getenv("SEED_CONCURRENCY", "8"))
+MAX_PAGES = int(os.getenv("SEED_MAX_PAGES", "0"))
+# Content-addressed store of finished translations (supabase/translation_cache.sql),
+# so boilerplate answers repeated across rows are translated once. Empty disables it.
+CACHE_TABLE = os.getenv("SEED_TRANSLATION_CACHE_TABLE", "translation_cache").strip()
+# Interactive OpenAI calls per second across all workers (0 = no cap). 429s are still
+# retried by the session with Retry-After; this keeps the workers from causing them.
+OPENAI_RPS = float(os.getenv("SEED_OPENAI_RPS", "5"))
+# Per-item failures are collected and written here as JSONL at the end of the run.
+FAILURES_FILE = os.getenv("SEED_FAILURES_FILE", "translate_failures.jsonl").strip()
+# --batch mode: how often to check on the OpenAI batch job, and how many requests to
+# queue across pages before submitting one (OpenAI caps a batch at 50,000).
+BATCH_POLL_SECONDS = float(os.getenv("SEED_BATCH_POLL_SECONDS", "30"))
+BATCH_MAX_REQUESTS = int(os.getenv("SEED_BATCH_MAX_REQUESTS", "50000"))
 
 TARGET_LANGS = ["pcm", "yo", "ig", "ha"]
 
@@ -26,27 +45,193 @@ LANG_TO_COL = {
     "ha": "answer_ha",
 }
 
-def _sb_headers() -> Dict[str, str]:
-    return {
-        "apikey": SUPABASE_SERVICE_ROLE_KEY,
-        "Authorization": f"Bearer {SUPABASE_SERVICE_ROLE_KEY}",
-        "Content-Type": "application/json",
-    }
+def _build_session(retry_posts: bool = True) -> requests.Session:
+    # One keep-alive pool for Supabase and OpenAI, sized for the translation workers.
+    # Retries back off on 429/5xx and honour Retry-After; the final response is still
+    # returned so raise_for_status() reports it.
+    # retry_posts=False leaves POST out: a retried Files upload or Batch create after a
+    # 5xx that had in fact succeeded would upload the file or start the batch twice.
+    session = requests.Session()
+    methods = ["GET", "POST", "PATCH"] if retry_posts else ["GET"]
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=[429, 500, 502, 503, 504],
+        allowed_methods=frozenset(methods),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(max_retries=retry, pool_connections=4, pool_maxsize=max(10, SEED_CONCURRENCY))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+_SESSION = _build_session()
+# OpenAI Files / Batches (--batch mode): POSTs there are not idempotent.
+_BATCH_SESSION = _build_session(retry_posts=False)
+
+class _TokenBucket:
+    """Thread-safe token bucket: acquire() only blocks when callers outrun `rate` per second."""
+
+    def __init__(self, rate: float, burst: Optional[float] = None) -> None:
+        self.rate = rate
+        self.capacity = burst if burst is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+
+_OPENAI_BUCKET = _TokenBucket(OPENAI_RPS)
+
+_failures: List[Dict[str, Any]] = []
+_failures_lock = threading.Lock()
+
+def _record_failure(stage: str, error: Any, **fields: Any) -> None:
+    with _failures_lock:
+        _failures.append({"stage": stage, **fields, "error": str(error)[:500]})
+
+def _report_failures() -> None:
+    if not _failures:
+        return
+    by_stage: Dict[str, int] = {}
+    for f in _failures:
+        by_stage[f["stage"]] = by_stage.get(f["stage"], 0) + 1
+    summary: Dict[str, Any] = {"failures": len(_failures), "by_stage": by_stage}
+    if FAILURES_FILE:
+        try:
+            with open(FAILURES_FILE, "w", encoding="utf-8") as fh:
+                fh.write("\n".join(json.dumps(f, ensure_ascii=False) for f in _failures) + "\n")
+            summary["file"] = FAILURES_FILE
+        except OSError as e:
+            summary["file_error"] = str(e)
+    print(json.dumps(summary), file=sys.stderr)
+
+# Credentials are read once at import; build the fixed headers and URLs once too.
+_SB_HEADERS = {
+    "apikey": SUPABASE_SERVICE_ROLE_KEY,
+    "Authorization": f"Bearer {SUPABASE_SERVICE_ROLE_KEY}",
+    "Content-Type": "application/json",
+}
+_SB_PATCH_HEADERS = {**_SB_HEADERS, "Prefer": "return=representation"}
+_SB_UPSERT_HEADERS = {**_SB_HEADERS, "Prefer": "resolution=merge-duplicates,return=minimal"}
+
+_OPENAI_BASE = "https://api.openai.com/v1"
+_OPENAI_RESPONSES_URL = f"{_OPENAI_BASE}/responses"
+_OPENAI_AUTH = {"Authorization": f"Bearer {OPENAI_API_KEY}"}
+_OPENAI_JSON_HEADERS = {**_OPENAI_AUTH, "Content-Type": "application/json"}
+
+_LANG_NAME = {"pcm": "Nigerian Pidgin", "yo": "Yorùbá", "ig": "Igbo", "ha": "Hausa"}
 
 def _sb_get(path: str, params: Dict[str, str]) -> Any:
     url = f"{SUPABASE_URL}/rest/v1/{path}"
-    r = requests.get(url, headers=_sb_headers(), params=params, timeout=60)
+    r = _SESSION.get(url, headers=_SB_HEADERS, params=params, timeout=60)
     r.raise_for_status()
     return r.json()
 
 def _sb_patch(path: str, params: Dict[str, str], payload: Dict[str, Any]) -> Any:
     url = f"{SUPABASE_URL}/rest/v1/{path}"
-    headers = _sb_headers()
-    headers["Prefer"] = "return=representation"
-    r = requests.patch(url, headers=headers, params=params, data=json.dumps(payload), timeout=60)
+    r = _SESSION.patch(url, headers=_SB_PATCH_HEADERS, params=params, data=json.dumps(payload), timeout=60)
+    r.raise_for_status()
+    return r.json()
+
+def _sb_upsert(path: str, params: Dict[str, str], payload: List[Dict[str, Any]]) -> None:
+    url = f"{SUPABASE_URL}/rest/v1/{path}"
+    r = _SESSION.post(url, headers=_SB_UPSERT_HEADERS, params=params, data=json.dumps(payload), timeout=60)
+    r.raise_for_status()
+
+def _sb_rpc(fn: str, payload: Dict[str, Any]) -> Any:
+    url = f"{SUPABASE_URL}/rest/v1/rpc/{fn}"
+    r = _SESSION.post(url, headers=_SB_HEADERS, data=json.dumps(payload), timeout=60)
     r.raise_for_status()
     return r.json()
 
+def _pg_code(exc: Exception) -> str:
+    # PostgREST error bodies carry the Postgres SQLSTATE as "code".
+    try:
+        return str((exc.response.json() or {}).get("code") or "")  # type: ignore[attr-defined]
+    except Exception:
+        return ""
+
+def _cache_key(text: str, lang: str) -> str:
+    return hashlib.sha256(f"{lang}|{text}".encode("utf-8")).hexdigest()
+
+def _cache_get(keys: List[str]) -> Dict[str, str]:
+    if not CACHE_TABLE or not keys:
+        return {}
+    out: Dict[str, str] = {}
+    try:
+        for i in range(0, len(keys), 100):
+            chunk = keys[i:i + 100]
+            for r in _sb_get(CACHE_TABLE, params={"select": "hash,output", "hash": f"in.({','.join(chunk)})"}) or []:
+                if r.get("hash") and r.get("output"):
+                    out[r["hash"]] = r["output"]
+    except Exception as e:
+        print(f"Translation cache lookup skipped ({CACHE_TABLE}): {e}", file=sys.stderr)
+    return out
+
+def _cache_put(done: Dict[str, str], jobs: Dict[str, Tuple[str, str]]) -> None:
+    if not CACHE_TABLE or not done:
+        return
+    try:
+        _sb_upsert(
+            CACHE_TABLE,
+            params={"on_conflict": "hash"},
+            payload=[{"hash": k, "lang": jobs[k][1], "output": t} for k, t in done.items()],
+        )
+    except Exception as e:
+        print(f"Translation cache write skipped ({CACHE_TABLE}): {e}", file=sys.stderr)
+
+_SYSTEM_PROMPT = (
+    "You are a professional tax support translator for Nigerian audiences. "
+    "Translate the user-facing answer accurately into the requested language. "
+    "Rules:\n"
+    "- Keep the meaning exact.\n"
+    "- Keep lists, bullets, and numbering.\n"
+    "- Keep any **bold** markers as-is.\n"
+    "- Do not add extra commentary.\n"
+    "- Output only the translated text.\n"
+)
+
+def _lang_name(lang: str) -> str:
+    return _LANG_NAME.get(lang, lang)
+
+def _openai_payload(text: str, target_lang: str) -> Dict[str, Any]:
+    user = f"Translate to {_lang_name(target_lang)}:\n\n{text}"
+
+    return {
+        "model": OPENAI_MODEL,
+        "input": [
+            {"role": "system", "content": _SYSTEM_PROMPT},
+            {"role": "user", "content": user},
+        ],
+        "temperature": 0.2,
+    }
+
+def _output_text(data: Dict[str, Any]) -> str:
+    # Responses API output extraction (robust)
+    out_text = ""
+    try:
+        for item in data.get("output", []):
+            for c in item.get("content", []):
+                if c.get("type") == "output_text":
+                    out_text += c.get("text", "")
+    except Exception:
+        pass
+
+    return (out_text or "").strip()
+
 def _openai_translate(text: str, target_lang: str) -> str:
     """
     Uses OpenAI Responses API.
@@ -55,105 +240,323 @@ def _openai_translate(text: str, target_lang: str) -> str:
     if not OPENAI_API_KEY:
         raise RuntimeError("OPENAI_API_KEY missing")
 
-    lang_name = {"pcm": "Nigerian Pidgin", "yo": "Yorùbá", "ig": "Igbo", "ha": "Hausa"}.get(target_lang, target_lang)
-
-    system = (
-        "You are a professional tax support translator for Nigerian audiences. "
-        "Translate the user-facing answer accurately into the requested language. "
-        "Rules:\n"
-        "- Keep the meaning exact.\n"
-        "- Keep lists, bullets, and numbering.\n"
-        "- Keep any **bold** markers as-is.\n"
-        "- Do not add extra commentary.\n"
-        "- Output only the translated text.\n"
+    _OPENAI_BUCKET.acquire()
+    r = _SESSION.post(
+        _OPENAI_RESPONSES_URL,
+        headers=_OPENAI_JSON_HEADERS,
+        data=json.dumps(_openai_payload(text, target_lang)),
+        timeout=120,
     )
+    r.raise_for_status()
+    return _output_text(r.json())
 
-    user = f"Translate to {lang_name}:\n\n{text}"
+def _openai_translate_multi(text: str, langs: List[str]) -> Dict[str, str]:
+    """
+    All of a row's missing languages in one Responses call (JSON mode): the source text and
+    instructions are sent once instead of once per language. Returns only non-empty results.
+    """
+    if not OPENAI_API_KEY:
+        raise RuntimeError("OPENAI_API_KEY missing")
 
-    url = "https://api.openai.com/v1/responses"
+    wanted = ", ".join(f"{lang} ({_lang_name(lang)})" for lang in langs)
+    user = (
+        f"Translate into each of: {wanted}.\n"
+        "Return a JSON object keyed by language code; each value is only that translation.\n\n"
+        f"{text}"
+    )
     payload = {
         "model": OPENAI_MODEL,
         "input": [
-            {"role": "system", "content": system},
+            {"role": "system", "content": _SYSTEM_PROMPT},
             {"role": "user", "content": user},
         ],
         "temperature": 0.2,
+        "text": {"format": {"type": "json_object"}},
     }
 
-    r = requests.post(
-        url,
-        headers={"Authorization": f"Bearer {OPENAI_API_KEY}", "Content-Type": "application/json"},
+    _OPENAI_BUCKET.acquire()
+    r = _SESSION.post(
+        _OPENAI_RESPONSES_URL,
+        headers=_OPENAI_JSON_HEADERS,
         data=json.dumps(payload),
+        timeout=180,
+    )
+    r.raise_for_status()
+    data = json.loads(_output_text(r.json()) or "{}")
+    if not isinstance(data, dict):
+        return {}
+    out: Dict[str, str] = {}
+    for lang in langs:
+        v = str(data.get(lang) or "").strip()
+        if v:
+            out[lang] = v
+    return out
+
+def _openai_batch_translate(jobs: Dict[str, Tuple[str, str]]) -> Tuple[Dict[str, str], Dict[str, Any]]:
+    """
+    --batch mode: submit every translation ({cache_key: (text, lang)}) as one OpenAI Batch job
+    (half price, no per-call round trips), wait for it, and return ({cache_key: translation},
+    {cache_key: error}) for the requests that succeeded / failed.
+    """
+    if not OPENAI_API_KEY:
+        raise RuntimeError("OPENAI_API_KEY missing")
+
+    lines = [
+        json.dumps({
+            "custom_id": key,
+            "method": "POST",
+            "url": "/v1/responses",
+            "body": _openai_payload(text, lang),
+        })
+        for key, (text, lang) in jobs.items()
+    ]
+
+    r = _BATCH_SESSION.post(
+        f"{_OPENAI_BASE}/files",
+        headers=_OPENAI_AUTH,
+        data={"purpose": "batch"},
+        files={"file": ("translate_seeder.jsonl", "\n".join(lines).encode("utf-8"), "application/jsonl")},
         timeout=120,
     )
     r.raise_for_status()
-    data = r.json()
+    input_file_id = r.json()["id"]
 
-    # Responses API output extraction (robust)
-    out_text = ""
-    try:
-        for item in data.get("output", []):
-            for c in item.get("content", []):
-                if c.get("type") == "output_text":
-                    out_text += c.get("text", "")
-    except Exception:
-        pass
+    r = _BATCH_SESSION.post(
+        f"{_OPENAI_BASE}/batches",
+        headers=_OPENAI_JSON_HEADERS,
+        data=json.dumps({"input_file_id": input_file_id, "endpoint": "/v1/responses", "completion_window": "24h"}),
+        timeout=60,
+    )
+    r.raise_for_status()
+    batch = r.json()
+    print(f"Submitted batch {batch['id']} with {len(lines)} requests; waiting...")
 
-    return (out_text or "").strip()
+    while batch.get("status") not in {"completed", "failed", "expired", "cancelled"}:
+        time.sleep(BATCH_POLL_SECONDS)
+        r = _BATCH_SESSION.get(f"{_OPENAI_BASE}/batches/{batch['id']}", headers=_OPENAI_AUTH, timeout=60)
+        r.raise_for_status()
+        batch = r.json()
+
+    if batch.get("status") != "completed" or not batch.get("output_file_id"):
+        raise RuntimeError(f"batch {batch['id']} ended with status={batch.get('status')}")
+
+    r = _BATCH_SESSION.get(f"{_OPENAI_BASE}/files/{batch['output_file_id']}/content", headers=_OPENAI_AUTH, timeout=300)
+    r.raise_for_status()
+
+    out: Dict[str, str] = {}
+    errors: Dict[str, Any] = {}
+    for line in r.text.splitlines():
+        if not line.strip():
+            continue
+        item = json.loads(line)
+        resp = item.get("response") or {}
+        if resp.get("status_code") != 200:
+            errors[str(item.get("custom_id"))] = item.get("error") or resp.get("body")
+            continue
+        text = _output_text(resp.get("body") or {})
+        if item.get("custom_id") and text:
+            out[item["custom_id"]] = text
+    return out, errors
+
+# PostgREST or=(...) matching rows where any target column is null or empty.
+_MISSING_FILTER = "(" + ",".join(f"{c}.is.null,{c}.eq." for c in LANG_TO_COL.values()) + ")"
 
 def _needs_translation(row: Dict[str, Any], col: str) -> bool:
     v = row.get(col)
     return not (isinstance(v, str) and v.strip())
 
-def main() -> int:
-    if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
-        print("Missing SUPABASE_URL or SUPABASE_SERVICE_ROLE_KEY", file=sys.stderr)
-        return 2
-
-    # Pull rows that have answer_en but are missing at least one target lang column
-    # NOTE: Supabase REST filter syntax: col=is.null / col=not.is.null
-    # We'll fetch a batch and decide in code (simpler + robust).
-    rows = _sb_get(
-        "qa_library",
-        params={
-            "select": "id,canonical_key,enabled,answer_en,answer_pcm,answer_yo,answer_ig,answer_ha,updated_at",
-            "enabled": "eq.true",
-            "answer_en": "not.is.null",
-            "limit": str(BATCH_LIMIT),
-            "order": "updated_at.asc",
-        },
-    )
+# supabase/qa_library_rpcs.sql. Cleared once PostgREST reports the function missing; the
+# rest of the run patches row by row.
+BULK_PATCH_RPC = "bms_bulk_patch_rows"
+_MISSING_RPC_CODES = {"PGRST202", "42883"}
+_bulk_rpc_ok = True
 
-    if not rows:
-        print("No rows found.")
+def _write_updates(updates: Dict[Any, Dict[str, Any]]) -> int:
+    """
+    One bms_bulk_patch_rows call (a single UPDATE over every row; a column a row does not
+    fill keeps its value) instead of one PATCH per row. If it fails, one PATCH per row.
+    """
+    global _bulk_rpc_ok
+    if not updates:
         return 0
 
-    translated = 0
+    if _bulk_rpc_ok:
+        rows = [{"id": row_id, **update} for row_id, update in updates.items()]
+        try:
+            return int(_sb_rpc(BULK_PATCH_RPC, {"p_table": "qa_library", "p_rows": rows}) or 0)
+        except Exception as e:
+            if _pg_code(e) in _MISSING_RPC_CODES:
+                _bulk_rpc_ok = False
+                print(f"{BULK_PATCH_RPC} is not deployed; patching row by row for the rest of the run", file=sys.stderr)
+            else:
+                print(f"Bulk update of {len(rows)} rows failed, patching one by one: {e}", file=sys.stderr)
+
+    written = 0
+    for row_id, update in updates.items():
+        try:
+            # patch by id
+            _sb_patch("qa_library", params={"id": f"eq.{row_id}"}, payload=update)
+            written += 1
+        except Exception as e:
+            _record_failure("write", e, id=row_id, columns=sorted(update))
+    return written
+
+def _fetch_page(after_id: Any) -> List[Dict[str, Any]]:
+    # Pull rows that have answer_en but are missing at least one target lang column
+    # NOTE: Supabase REST filter syntax: col=is.null / col=not.is.null
+    # The "missing" test runs server-side so every row in the batch has work to do;
+    # _needs_translation still decides per column (it also treats whitespace as missing).
+    params = {
+        "select": "id,answer_en,answer_pcm,answer_yo,answer_ig,answer_ha",
+        "enabled": "eq.true",
+        "answer_en": "not.is.null",
+        "or": _MISSING_FILTER,
+        "limit": str(BATCH_LIMIT),
+        # Keyset on id: rows this run writes (or fails on) never shift later pages.
+        "order": "id.asc",
+    }
+    if after_id is not None:
+        params["id"] = f"gt.{after_id}"
+    return _sb_get("qa_library", params=params) or []
 
+def _plan_page(rows: List[Dict[str, Any]]) -> Dict[str, Any]:
+    # One job per distinct (text, lang): identical answers across rows share a translation.
+    tasks: List[Tuple[Any, str, str]] = []
+    jobs: Dict[str, Tuple[str, str]] = {}
+    ids_by_key: Dict[str, List[Any]] = {}
     for row in rows:
+        needed = [lang for lang in TARGET_LANGS if _needs_translation(row, LANG_TO_COL[lang])]
+        if not needed:
+            continue
         base = (row.get("answer_en") or "").strip()
         if not base:
             continue
+        for lang in needed:
+            key = _cache_key(base, lang)
+            tasks.append((row["id"], lang, key))
+            jobs[key] = (base, lang)
+            ids_by_key.setdefault(key, []).append(row["id"])
+
+    cached = _cache_get(list(jobs))
+    pending = {k: v for k, v in jobs.items() if k not in cached}
+    return {"tasks": tasks, "jobs": jobs, "ids_by_key": ids_by_key, "cached": cached, "pending": pending}
 
-        update: Dict[str, Any] = {}
+def _translate_interactive(pending: Dict[str, Tuple[str, str]], ids_by_key: Dict[str, List[Any]]) -> Dict[str, str]:
+    # Asks for all of a text's missing languages in one call; any language that call
+    # fails or omits is retried on its own.
+    langs_by_text: Dict[str, List[str]] = {}
+    for text, lang in pending.values():
+        langs_by_text.setdefault(text, []).append(lang)
 
-        for lang in TARGET_LANGS:
-            col = LANG_TO_COL[lang]
-            if _needs_translation(row, col):
+    def _run(text: str) -> Dict[str, str]:
+        langs = langs_by_text[text]
+        got: Dict[str, str] = {}
+        if len(langs) > 1:
+            try:
+                got = _openai_translate_multi(text, langs)
+            except Exception as e:
+                _record_failure("translate_multi", e, ids=ids_by_key[_cache_key(text, langs[0])], langs=langs)
+
+        out: Dict[str, str] = {}
+        for lang in langs:
+            key = _cache_key(text, lang)
+            t = got.get(lang)
+            if not t:
                 try:
-                    t = _openai_translate(base, lang)
-                    if t:
-                        update[col] = t
-                        time.sleep(0.2)  # light throttle
+                    t = _openai_translate(text, lang)
                 except Exception as e:
-                    print(f"Translate failed for id={row.get('id')} lang={lang}: {e}", file=sys.stderr)
+                    _record_failure("translate", e, ids=ids_by_key[key], lang=lang)
+            if t:
+                out[key] = t
+        return out
 
-        if update:
-            # patch by id
-            _sb_patch("qa_library", params={"id": f"eq.{row['id']}"}, payload=update)
-            translated += 1
+    # Every text is independent and waits on OpenAI; run them concurrently.
+    done: Dict[str, str] = {}
+    with ThreadPoolExecutor(max_workers=max(1, SEED_CONCURRENCY)) as pool:
+        for out in pool.map(_run, langs_by_text):
+            done.update(out)
+    return done
+
+def _translate_batch(plans: List[Dict[str, Any]]) -> Dict[str, str]:
+    # One OpenAI Batch job for every page's pending work (keys shared across pages go once).
+    pending: Dict[str, Tuple[str, str]] = {}
+    ids_by_key: Dict[str, List[Any]] = {}
+    for plan in plans:
+        pending.update(plan["pending"])
+        for key in plan["pending"]:
+            ids_by_key.setdefault(key, []).extend(plan["ids_by_key"][key])
+    if not pending:
+        return {}
+
+    done, errors = _openai_batch_translate(pending)
+    for key, err in errors.items():
+        if key in pending:
+            _record_failure("translate", err, ids=ids_by_key[key], lang=pending[key][1])
+    return done
+
+def _finish_page(plan: Dict[str, Any], done: Dict[str, str]) -> int:
+    done = {k: v for k, v in done.items() if k in plan["pending"]}
+    _cache_put(done, plan["jobs"])
+
+    outputs = {**plan["cached"], **done}
+    updates: Dict[Any, Dict[str, Any]] = {}
+    for row_id, lang, key in plan["tasks"]:
+        t = outputs.get(key)
+        if t:
+            updates.setdefault(row_id, {})[LANG_TO_COL[lang]] = t
+
+    return _write_updates(updates)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    batch_mode = "--batch" in argv
+
+    if not SUPABASE_URL or not SUPABASE_SERVICE_ROLE_KEY:
+        print("Missing SUPABASE_URL or SUPABASE_SERVICE_ROLE_KEY", file=sys.stderr)
+        return 2
+
+    # Work through the whole backlog in SEED_BATCH_LIMIT pages (SEED_MAX_PAGES caps a run; 0 = no cap).
+    # --batch queues pages until BATCH_MAX_REQUESTS and submits them as a single Batch job,
+    # rather than waiting out one job per page.
+    translated = 0
+    pages = 0
+    after_id: Any = None
+    queued: List[Dict[str, Any]] = []
+    queued_keys: set = set()
+
+    def _flush() -> int:
+        done = _translate_batch(queued)
+        written = sum(_finish_page(plan, done) for plan in queued)
+        queued.clear()
+        queued_keys.clear()
+        return written
+
+    while not MAX_PAGES or pages < MAX_PAGES:
+        rows = _fetch_page(after_id)
+        if not rows:
+            break
+        pages += 1
+        after_id = rows[-1]["id"]
+        plan = _plan_page(rows)
+        if not batch_mode:
+            translated += _finish_page(plan, _translate_interactive(plan["pending"], plan["ids_by_key"]))
+            continue
+        new_keys = set(plan["pending"]) - queued_keys
+        if queued and len(queued_keys) + len(new_keys) > BATCH_MAX_REQUESTS:
+            translated += _flush()
+            new_keys = set(plan["pending"])
+        queued.append(plan)
+        queued_keys.update(new_keys)
+
+    if queued:
+        translated += _flush()
+
+    if not pages:
+        print("No rows found.")
+        return 0
 
     print(f"Done. Updated rows: {translated}")
+    _report_failures()
     return 0
 
 if __name__ == "__main__":